@@ -16,7 +16,7 @@ class CommentRequest(BaseModel):
     content: str = Field(..., description="댓글 내용")
 
 
-def create_comment_controller(request: CommentRequest) -> dict:
+async def create_comment_controller(request: CommentRequest) -> dict:
     content = request.content.strip()
     if not content:
         raise HTTPException(
@@ -27,7 +27,7 @@ def create_comment_controller(request: CommentRequest) -> dict:
     logger.info(f"Processing comment request: post_id={request.post_id}, content_length={len(content)}")
     
     try:
-        moderation_result = moderate_comment(content)
+        moderation_result = await moderate_comment(content)
         logger.info(f"Moderation result: {moderation_result}")
         
         if moderation_result["blocked"]:
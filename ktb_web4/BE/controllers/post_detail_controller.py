@@ -32,7 +32,7 @@ def post_like_controller(post_id: int, email: str):
 
 
 # 댓글 등록
-def comment_add_controller(
+async def comment_add_controller(
     post_id: int,
     text: str,
     email: str | None = None,
@@ -45,7 +45,7 @@ def comment_add_controller(
             detail="댓글을 입력해주세요",
         )
 
-    moderation_result = moderate_comment(content)
+    moderation_result = await moderate_comment(content)
     if moderation_result["blocked"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -63,7 +63,7 @@ def comment_add_controller(
 
 
 # 댓글 수정
-def comment_update_controller(post_id: int, comment_id: int, text: str):
+async def comment_update_controller(post_id: int, comment_id: int, text: str):
     content = text.strip()
     if not content:
         raise HTTPException(
@@ -71,7 +71,7 @@ def comment_update_controller(post_id: int, comment_id: int, text: str):
             detail="댓글을 입력해주세요",
         )
 
-    moderation_result = moderate_comment(content)
+    moderation_result = await moderate_comment(content)
     if moderation_result["blocked"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
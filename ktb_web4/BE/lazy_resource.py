@@ -0,0 +1,47 @@
+"""
+한 번만 초기화되는 공유 리소스 (임베딩 모델, FAISS 인덱스 등).
+
+- 처음 get() 을 호출한 스레드가 factory 를 실행하고, 동시에 들어온 다른 호출자는 그 결과를 기다림
+- 초기화가 끝난 뒤의 get() 은 락 없이 바로 반환 (double-checked locking)
+- factory 가 예외를 던지면 로드되지 않은 상태로 남고, 다음 호출에서 다시 시도
+"""
+
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyResource(Generic[T]):
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value: T | None = None
+        # factory 가 실제로 실행된 횟수 (동시 초기화 검증용)
+        self.load_count = 0
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value  # type: ignore[return-value]
+        with self._lock:
+            if not self._loaded:
+                self.load_count += 1
+                self._value = self._factory()
+                self._loaded = True
+        return self._value  # type: ignore[return-value]
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def peek(self) -> T | None:
+        """로드되어 있으면 값, 아니면 None (로드를 유발하지 않음)."""
+        return self._value if self._loaded else None
+
+    def set(self, value: T) -> None:
+        """이미 만들어진 값으로 채움 (오프라인 도구 등에서 사용)."""
+        with self._lock:
+            self._value = value
+            self._loaded = True
@@ -0,0 +1,144 @@
+"""
+Ollama 호출용 공용 비동기 HTTP 클라이언트.
+
+- 프로세스 전체에서 httpx.AsyncClient 하나를 공유 (keep-alive 커넥션 풀)
+- 호출마다 timeout 지정
+- HTTP 클라이언트가 연결을 끊으면 진행 중인 LLM 요청을 취소 (run_until_disconnected, stream_until_disconnected)
+
+네트워크/HTTP 오류(httpx.HTTPError)와 JSON 파싱 오류는 그대로 전파하므로,
+호출하는 쪽에서 도메인에 맞는 HTTPException 으로 변환한다.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Awaitable, Dict, TypeVar
+
+import httpx
+from fastapi import HTTPException, Request
+
+T = TypeVar("T")
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_CONNECT_TIMEOUT = 5.0
+
+# 클라이언트 연결 끊김 확인 주기 (초)
+DISCONNECT_POLL_INTERVAL = 0.5
+# nginx 관례: Client Closed Request
+CLIENT_CLOSED_REQUEST = 499
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """애플리케이션 종료 시 커넥션 풀 정리."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def post_json(url: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """JSON 요청을 보내고 JSON 응답을 반환. 4xx/5xx 는 httpx.HTTPStatusError."""
+    response = await get_client().post(
+        url,
+        json=payload,
+        timeout=httpx.Timeout(timeout, connect=min(timeout, LLM_CONNECT_TIMEOUT)),
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def stream_json_lines(
+    url: str, payload: Dict[str, Any], timeout: float
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    스트리밍 응답(NDJSON, Ollama `"stream": true`)을 한 줄씩 JSON 으로 파싱해 yield.
+    - timeout 은 전체 생성 시간이 아니라 청크 사이 read 간격에 적용
+    - 소비하는 쪽이 중단(취소)되면 응답을 닫아 Ollama 생성도 중단됨
+    """
+    async with get_client().stream(
+        "POST",
+        url,
+        json=payload,
+        timeout=httpx.Timeout(timeout, connect=min(timeout, LLM_CONNECT_TIMEOUT)),
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _wait_until_done(request: Request, task: asyncio.Future) -> None:
+    """task 가 끝날 때까지 기다리며 연결 끊김을 확인. 끊기면 499 HTTPException (task 취소는 호출하는 쪽에서)."""
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return
+        if await request.is_disconnected():
+            raise HTTPException(
+                status_code=CLIENT_CLOSED_REQUEST,
+                detail="클라이언트 연결이 끊어져 요청을 취소했습니다.",
+            )
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    awaitable 을 실행하다가 요청한 HTTP 클라이언트가 연결을 끊으면 취소.
+    - 취소되면 httpx 가 Ollama 와의 연결을 닫으므로 생성도 중단됨
+    - 끊긴 클라이언트에게는 응답이 전달되지 않으므로 499 로 요청을 마무리
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        await _wait_until_done(request, task)
+        return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def _next(iterator: AsyncIterator[T]) -> T:
+    return await iterator.__anext__()
+
+
+async def stream_until_disconnected(
+    request: Request, items: AsyncIterator[T]
+) -> AsyncIterator[T]:
+    """
+    items 를 그대로 yield 하다가 요청한 HTTP 클라이언트가 연결을 끊으면 중단 (499).
+    - 다음 조각을 기다리는 동안에도 연결 끊김을 확인 (다음 조각을 보낼 때까지 미루지 않음)
+    - 중단되면 items 를 닫으므로 Ollama 생성도 중단됨
+    """
+    iterator = items.__aiter__()
+    try:
+        while True:
+            task = asyncio.ensure_future(_next(iterator))
+            try:
+                await _wait_until_done(request, task)
+            except BaseException:
+                task.cancel()
+                await asyncio.wait({task})  # items 가 취소를 처리한 뒤에 닫도록
+                raise
+            try:
+                item = task.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,11 +1,12 @@
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 
+import httpx
 from fastapi import HTTPException, status
 
+from BE import llm_client
+
 logger = logging.getLogger(__name__)
 
 # Allow override so different models/endpoints can be tested without code changes.
@@ -13,7 +14,7 @@ OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 MODERATION_MODEL = os.getenv("OLLAMA_MODERATION_MODEL", "llama3")
 
 
-def _call_ollama(prompt: str) -> str:
+async def _call_ollama(prompt: str) -> str:
     """Send a single non-streaming generation request to Ollama."""
     url = f"{OLLAMA_HOST.rstrip('/')}/api/generate"
     payload = {
@@ -23,32 +24,23 @@ def _call_ollama(prompt: str) -> str:
         "options": {"temperature": 0, "top_p": 0.1},
     }
 
-    data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(
-        url, data=data, headers={"Content-Type": "application/json"}
-    )
-
     try:
-        with urllib.request.urlopen(request, timeout=15) as response:
-            body = response.read().decode("utf-8")
-    except urllib.error.URLError as exc:
+        parsed = await llm_client.post_json(url, payload, timeout=15)
+    except httpx.HTTPError as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="AI 필터 서버에 연결할 수 없습니다. Ollama가 실행 중인지 확인해주세요.",
         ) from exc
-    except Exception as exc:  # pragma: no cover - defensive
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="AI 필터 처리 중 오류가 발생했습니다.",
-        ) from exc
-
-    try:
-        parsed = json.loads(body)
     except json.JSONDecodeError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="AI 필터 응답을 읽을 수 없습니다.",
         ) from exc
+    except Exception as exc:  # pragma: no cover - defensive
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AI 필터 처리 중 오류가 발생했습니다.",
+        ) from exc
 
     response_text = parsed.get("response", "").strip()
     if not response_text:
@@ -88,7 +80,7 @@ def _should_block(response_text: str) -> bool:
     return True
 
 
-def moderate_comment(content: str) -> dict:
+async def moderate_comment(content: str) -> dict:
     """Check whether a comment should be blocked for profanity or hate speech."""
     logger.info(f"Moderating comment: '{content[:50]}...' (length: {len(content)})")
     
@@ -109,7 +101,7 @@ def moderate_comment(content: str) -> dict:
     )
 
     try:
-        response_text = _call_ollama(prompt)
+        response_text = await _call_ollama(prompt)
         blocked = _should_block(response_text)
         
         logger.info(f"Moderation result for comment '{content[:50]}...': blocked={blocked}, response='{response_text}'")
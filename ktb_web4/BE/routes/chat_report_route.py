@@ -1,9 +1,23 @@
-from typing import List
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Literal
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from BE.sof_langchain import answer_question, generate_conversation_report
+from BE.llm_client import (
+    CLIENT_CLOSED_REQUEST,
+    run_until_disconnected,
+    stream_until_disconnected,
+)
+# 검색 스택(BE.sof_langchain)은 이 라우터를 처음 쓸 때 import (BE/sof_stack.py)
+from BE.sof_stack import load_sof, sof_stack
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/chat_report", tags=["chat_report"])
@@ -11,10 +25,18 @@ router = APIRouter(prefix="/chat_report", tags=["chat_report"])
 
 class ChatRequest(BaseModel):
     question: str
+    fusion: Literal["linear", "rrf", "minmax"] | None = Field(
+        default=None, description="FAISS + BM25 융합 방식 (기본: SOF_FUSION_METHOD)"
+    )
+    alpha: float | None = Field(
+        default=None, ge=0.0, le=1.0, description="semantic 가중치 (기본: SOF_FUSION_ALPHA)"
+    )
+    debug: bool = Field(default=False, description="검색 디버그 정보(rerank 점수 등) 포함")
 
 
 class ChatResponse(BaseModel):
     answer: str
+    debug: Dict[str, Any] | None = None
 
 
 class ChatTurn(BaseModel):
@@ -24,21 +46,181 @@ class ChatTurn(BaseModel):
 
 class ReportRequest(BaseModel):
     history: List[ChatTurn]
+    session_id: str | None = Field(
+        default=None, description="대화 세션 ID (이전 대화 요약 캐시를 세션별로 구분)"
+    )
 
 
 class ReportResponse(BaseModel):
     report: str
 
 
+class SearchScope(BaseModel):
+    year_from: int | None = None
+    year_to: int | None = None
+    chapter: str | None = Field(
+        default=None, description="Global Economy / Consumer Shifts / Fashion System"
+    )
+
+
+class ScopedSearchRequest(BaseModel):
+    query: str
+    scopes: List[SearchScope] = Field(
+        default_factory=lambda: [SearchScope()],
+        description="범위별로 따로 검색 (예: 2023 vs 2025 Consumer Shifts 비교)",
+    )
+    k: int = Field(default=8, ge=1, le=50)
+    fusion: Literal["linear", "rrf", "minmax"] | None = None
+    alpha: float | None = Field(default=None, ge=0.0, le=1.0)
+
+
+class SearchHit(BaseModel):
+    year: int | None = None
+    chapter: str | None = None
+    region: str | None = None
+    source: str
+    page: int | None = None
+    content: str
+
+
+class ScopedSearchResult(BaseModel):
+    scope: SearchScope
+    hits: List[SearchHit]
+
+
+class ScopedSearchResponse(BaseModel):
+    results: List[ScopedSearchResult]
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest):
-    answer = answer_question(req.question)
-    return ChatResponse(answer=answer)
+async def chat(req: ChatRequest, request: Request):
+    sof = await load_sof()
+    answer, debug = await run_until_disconnected(
+        request, sof.answer_question_debug(req.question, req.fusion, req.alpha)
+    )
+    return ChatResponse(answer=answer, debug=debug if req.debug else None)
 
 
 @router.post("/report", response_model=ReportResponse)
-async def report(req: ReportRequest):
-    report_text = generate_conversation_report(
-        [{"role": t.role, "content": t.content} for t in req.history]
+async def report(req: ReportRequest, request: Request):
+    sof = await load_sof()
+    report_text = await run_until_disconnected(
+        request,
+        sof.generate_conversation_report(
+            [{"role": t.role, "content": t.content} for t in req.history],
+            req.session_id,
+        ),
     )
     return ReportResponse(report=report_text)
+
+
+@router.post("/search", response_model=ScopedSearchResponse)
+async def search(req: ScopedSearchRequest):
+    """연도 범위/챕터 그룹 안에서만 SoF 청크 검색 (LLM 호출 없음)"""
+    if not req.query.strip():
+        raise HTTPException(status_code=400, detail="검색어를 입력해주세요.")
+
+    sof = await load_sof()
+    results = await run_in_threadpool(
+        sof.scoped_search_many,
+        req.query,
+        [scope.model_dump() for scope in req.scopes],
+        combined_k=req.k,
+        fusion=req.fusion,
+        alpha=req.alpha,
+    )
+    return ScopedSearchResponse(
+        results=[
+            ScopedSearchResult(
+                scope=scope,
+                hits=[
+                    SearchHit(
+                        year=d.metadata.get("year"),
+                        chapter=d.metadata.get("chapter"),
+                        region=d.metadata.get("region"),
+                        source=os.path.basename(d.metadata.get("source", "")),
+                        page=d.metadata.get("page"),
+                        content=d.page_content,
+                    )
+                    for d in docs
+                ],
+            )
+            for scope, docs in zip(req.scopes, results)
+        ]
+    )
+
+
+def _event(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+async def _ndjson_stream(
+    request: Request, tokens: AsyncIterator[str], started: float, endpoint: str
+) -> AsyncIterator[str]:
+    """
+    토큰 스트림을 NDJSON 이벤트로 변환.
+    - 클라이언트가 연결을 끊으면 토큰을 기다리는 중이라도 생성을 중단
+    - {"type": "token", "content": "..."} : 생성된 토큰 조각
+    - {"type": "done", "ttft_ms": ..., "total_ms": ...} : 정상 종료 (TTFT = 요청 수신 ~ 첫 토큰)
+    - {"type": "error", "detail": "..."} : 스트림 도중 오류 (상태 코드는 이미 200 으로 전송됨)
+    """
+    ttft_ms = None
+    try:
+        async for piece in stream_until_disconnected(request, tokens):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+                sof_stack.peek().record_ttft(endpoint, ttft_ms)
+            yield _event({"type": "token", "content": piece})
+    except HTTPException as exc:
+        if exc.status_code == CLIENT_CLOSED_REQUEST:
+            logger.info("%s 스트리밍 중 클라이언트 연결이 끊어져 생성을 중단했습니다.", endpoint)
+            return
+        yield _event({"type": "error", "detail": exc.detail})
+        return
+
+    total_ms = (time.perf_counter() - started) * 1000
+    logger.info("%s 스트리밍 완료: TTFT %.0fms, 전체 %.0fms", endpoint, ttft_ms or 0, total_ms)
+    yield _event({"type": "done", "ttft_ms": ttft_ms, "total_ms": total_ms})
+
+
+@router.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    """/chat 의 스트리밍 버전 (application/x-ndjson)"""
+    started = time.perf_counter()
+    sof = await load_sof()
+    # 첫 토큰 전의 검색/캐시 조회도 연결이 끊기면 취소
+    tokens = await run_until_disconnected(
+        request, sof.answer_question_stream(req.question, req.fusion, req.alpha)
+    )
+    return StreamingResponse(
+        _ndjson_stream(request, tokens, started, "chat"), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/report/stream")
+async def report_stream(req: ReportRequest, request: Request):
+    """/report 의 스트리밍 버전 (application/x-ndjson)"""
+    started = time.perf_counter()
+    sof = await load_sof()
+    # 첫 토큰 전의 이전 대화 요약/검색도 연결이 끊기면 취소
+    tokens = await run_until_disconnected(
+        request,
+        sof.generate_conversation_report_stream(
+            [{"role": t.role, "content": t.content} for t in req.history],
+            req.session_id,
+        ),
+    )
+    return StreamingResponse(
+        _ndjson_stream(request, tokens, started, "report"), media_type="application/x-ndjson"
+    )
+
+
+@router.get("/stats")
+async def stats() -> Dict[str, Any]:
+    """검색 캐시 hit/miss, 스트리밍 TTFT 등 운영 지표"""
+    sof = sof_stack.peek()
+    if sof is None:
+        # 통계를 보려고 검색 스택을 import 하지 않음 (아직 채팅 요청이 없었던 워커)
+        return {"search_stack": {"loaded": False}}
+    # 검색 서비스를 쓰면 서비스에 통계를 묻는 동기 호출(최대 SOF_RETRIEVAL_TIMEOUT)이 있으므로 스레드풀에서 실행
+    return await run_in_threadpool(sof.get_stats)
@@ -1,15 +1,18 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from BE.controllers.comment_controller import CommentRequest, create_comment_controller
+from BE.llm_client import run_until_disconnected
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 
 @router.post("/")
-async def create_comment(request: CommentRequest):
+async def create_comment(request: CommentRequest, http_request: Request):
     """
     댓글 작성 엔드포인트
     - POST /comments
     - Body: { "content": "댓글 내용", "post_id": 1 (optional) }
     """
-    return create_comment_controller(request)
+    return await run_until_disconnected(
+        http_request, create_comment_controller(request)
+    )
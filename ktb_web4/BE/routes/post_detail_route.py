@@ -30,18 +30,18 @@ def toggle_like(post_id: int, email: str = Form(...)):
 
 # 댓글 생성
 @router.post("/{post_id}/comments")
-def add_comment(
+async def add_comment(
     post_id: int,
     text: str = Form(...),
     email: str = Form(""),
     nickname: str = Form(""),
 ):
-    return comment_add_controller(post_id, text, email, nickname)
+    return await comment_add_controller(post_id, text, email, nickname)
 
 # 댓글 수정
 @router.put("/{post_id}/comments/{comment_id}")
-def update_comment(post_id: int, comment_id: int, text: str = Form(...)):
-    return comment_update_controller(post_id, comment_id, text)
+async def update_comment(post_id: int, comment_id: int, text: str = Form(...)):
+    return await comment_update_controller(post_id, comment_id, text)
 
 # 댓글 삭제
 @router.delete("/{post_id}/comments/{comment_id}")
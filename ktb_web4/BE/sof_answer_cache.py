@@ -0,0 +1,105 @@
+"""
+answer_question 용 시맨틱 답변 캐시.
+
+- 키: (프롬프트에 들어간 청크 ID 해시, LLM 모델명, 시스템 프롬프트 해시, 인덱스 fingerprint)
+- 같은 키 안에서 질문 임베딩의 코사인 유사도가 threshold 이상이면 저장된 답변을 반환
+- 엔트리는 생성 시각(age)을 가지며 TTL 이 지나면 만료
+- 인덱스나 시스템 프롬프트가 바뀌면 키가 달라지므로 이전 답변은 재사용되지 않음
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def context_fingerprint(chunk_ids: Iterable[Any]) -> str:
+    """프롬프트에 들어간 청크 ID 목록(순서 포함)의 해시."""
+    return hashlib.sha256("\x1f".join(map(str, chunk_ids)).encode("utf-8")).hexdigest()
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: float = 60 * 60,
+        max_entries: int = 512,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # key -> [(정규화된 질문 벡터, 답변, 생성 시각)], key 단위 LRU
+        self._buckets: "OrderedDict[Tuple, List[Tuple[np.ndarray, str, float]]]" = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def lookup(self, key: Tuple, question_vector) -> Tuple[str, float] | None:
+        """(답변, age 초) 또는 None."""
+        if self.max_entries <= 0:
+            return None
+        query = self._unit(question_vector)
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket:
+                live = [e for e in bucket if now - e[2] <= self.ttl_seconds]
+                self._size -= len(bucket) - len(live)
+                if live:
+                    self._buckets[key] = live
+                    self._buckets.move_to_end(key)
+                    sims = np.stack([e[0] for e in live]) @ query
+                    best = int(np.argmax(sims))
+                    if sims[best] >= self.threshold:
+                        self.hits += 1
+                        return live[best][1], now - live[best][2]
+                else:
+                    del self._buckets[key]
+            self.misses += 1
+            return None
+
+    def store(self, key: Tuple, question_vector, answer: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._buckets.setdefault(key, []).append(
+                (self._unit(question_vector), answer, time.time())
+            )
+            self._buckets.move_to_end(key)
+            self._size += 1
+            while self._size > self.max_entries:
+                _, evicted = self._buckets.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
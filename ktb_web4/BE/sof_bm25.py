@@ -0,0 +1,382 @@
+"""
+SoF 코퍼스용 BM25 키워드 인덱스.
+
+- 오프라인 빌드 단계에서 term 통계(postings, 문서 길이, IDF)를 계산해 `bm25_index/` 에 저장
+- 서버에서는 저장된 배열을 numpy memmap 으로 열어 재토크나이즈 없이 바로 사용
+- 문서 번호(doc id)는 FAISS 인덱스의 row 번호와 동일
+- 빌드 당시 FAISS 인덱스의 fingerprint 를 함께 저장하고, 현재 인덱스와 다르면 로드를 거부
+- 토크나이저는 이름으로 선택(TOKENIZERS)하며, 빌드와 쿼리에 같은 토크나이저를 쓰도록 인덱스에 이름을 기록
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+BM25_FORMAT_VERSION = 1
+
+# rank_bm25.BM25Okapi 기본값과 동일 (기존 BM25Retriever 랭킹 유지)
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+DEFAULT_EPSILON = 0.25
+
+_META_FILE = "meta.json"
+_VOCAB_FILE = "vocab.json"
+_ARRAY_FILES = ("doc_len", "idf", "term_offsets", "postings_doc", "postings_tf")
+
+
+class StaleBM25IndexError(RuntimeError):
+    """저장된 BM25 인덱스가 현재 FAISS 인덱스/설정과 맞지 않을 때 발생."""
+
+
+def whitespace_tokenize(text: str) -> List[str]:
+    """BM25Retriever 기본 전처리(`str.split`)와 동일한 토크나이저."""
+    return text.split()
+
+
+_WORD_RE = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+# 명사 뒤에 붙는 주요 조사 (긴 것부터 매칭)
+KOREAN_PARTICLES = tuple(
+    sorted(
+        [
+            "으로부터", "에서부터", "에게서", "으로서", "으로써", "이라는", "에서는",
+            "에서도", "에서의", "에게는", "으로는", "까지", "부터", "에서", "에게",
+            "으로", "처럼", "보다", "라는", "이나", "과의", "와의", "로서", "로써",
+            "은", "는", "이", "가", "을", "를", "의", "에", "도", "와", "과", "로", "만",
+        ],
+        key=len,
+        reverse=True,
+    )
+)
+
+
+def _strip_particle(word: str) -> str:
+    for particle in KOREAN_PARTICLES:
+        # 어간이 한 글자만 남으면 조사가 아니라 단어의 일부일 가능성이 높음 (예: 나이, 경기)
+        if word.endswith(particle) and len(word) - len(particle) >= 2:
+            word = word[: -len(particle)]
+            break
+    # 복수 접미사 "들" (소비자들 -> 소비자)
+    if word.endswith("들") and len(word) >= 3:
+        word = word[:-1]
+    return word
+
+
+def korean_tokenize(text: str) -> List[str]:
+    """
+    한국어 질문용 경량 토크나이저 (외부 형태소 분석기 없이 오프라인 동작).
+    - NFKC 정규화 + 소문자화, 구두점 제거
+    - 한글 어절은 조사를 떼어 어간으로 ("공급망의", "공급망은" -> "공급망")
+    - 세 글자 이상 한글 어간은 글자 bigram 도 추가해 복합명사 부분 매칭 ("공급망관리" -> "공급", "급망", ...)
+    """
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if not ("가" <= word[0] <= "힣"):
+            tokens.append(word)
+            continue
+        if word in KOREAN_PARTICLES:
+            # 영문/숫자 뒤에 붙어 분리된 조사 ("SNS에서" -> "sns", "에서")
+            continue
+        stem = _strip_particle(word)
+        tokens.append(stem)
+        if len(stem) >= 3:
+            tokens.extend(stem[i : i + 2] for i in range(len(stem) - 1))
+    return tokens
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    "whitespace": whitespace_tokenize,
+    "ko": korean_tokenize,
+}
+
+
+def get_tokenizer(name: str) -> Callable[[str], List[str]]:
+    try:
+        return TOKENIZERS[name]
+    except KeyError:
+        raise ValueError(
+            f"알 수 없는 BM25 토크나이저입니다: {name} (사용 가능: {', '.join(TOKENIZERS)})"
+        ) from None
+
+
+def faiss_fingerprint(faiss_dir: str) -> str:
+    """faiss_index/ 의 index.faiss + index.pkl 내용으로 만든 sha256 fingerprint."""
+    digest = hashlib.sha256()
+    for name in ("index.faiss", "index.pkl"):
+        with open(os.path.join(faiss_dir, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """
+    CSR 형태의 postings 로 저장한 BM25Okapi 인덱스.
+    - term t 의 postings: postings_doc/postings_tf[term_offsets[t]:term_offsets[t + 1]]
+    """
+
+    def __init__(
+        self,
+        vocab: List[str],
+        doc_len: np.ndarray,
+        idf: np.ndarray,
+        term_offsets: np.ndarray,
+        postings_doc: np.ndarray,
+        postings_tf: np.ndarray,
+        avgdl: float,
+        fingerprint: str,
+        tokenizer: str = "whitespace",
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        epsilon: float = DEFAULT_EPSILON,
+    ):
+        self.vocab = vocab
+        self.term_ids: Dict[str, int] = {t: i for i, t in enumerate(vocab)}
+        self.doc_len = doc_len
+        self.idf = idf
+        self.term_offsets = term_offsets
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.avgdl = avgdl
+        self.fingerprint = fingerprint
+        self.tokenizer = tokenizer
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        # 문서 길이 정규화 항은 쿼리와 무관하므로 한 번만 계산
+        self._norm = k1 * (1 - b + b * np.asarray(doc_len, dtype=np.float64) / avgdl)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(
+        cls,
+        tokenized_docs: Iterable[List[str]],
+        fingerprint: str,
+        tokenizer: str = "whitespace",
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        epsilon: float = DEFAULT_EPSILON,
+    ) -> "BM25Index":
+        """토큰화된 문서 목록(FAISS row 순서)으로 인덱스를 만든다."""
+        term_ids: Dict[str, int] = {}
+        per_term: List[List[Tuple[int, int]]] = []
+        doc_len: List[int] = []
+
+        for doc_id, tokens in enumerate(tokenized_docs):
+            doc_len.append(len(tokens))
+            freqs: Dict[str, int] = {}
+            for tok in tokens:
+                freqs[tok] = freqs.get(tok, 0) + 1
+            for tok, tf in freqs.items():
+                tid = term_ids.setdefault(tok, len(per_term))
+                if tid == len(per_term):
+                    per_term.append([])
+                per_term[tid].append((doc_id, tf))
+
+        n_docs = len(doc_len)
+        if n_docs == 0:
+            raise ValueError("BM25 인덱스를 만들 문서가 없습니다.")
+
+        # rank_bm25.BM25Okapi._calc_idf 와 동일: 음수 idf 는 epsilon * 평균 idf 로 보정
+        idf = np.empty(len(per_term), dtype=np.float64)
+        for tid, postings in enumerate(per_term):
+            df = len(postings)
+            idf[tid] = math.log(n_docs - df + 0.5) - math.log(df + 0.5)
+        average_idf = sum(idf.tolist()) / len(idf) if len(idf) else 0.0
+        idf[idf < 0] = epsilon * average_idf
+
+        term_offsets = np.zeros(len(per_term) + 1, dtype=np.int64)
+        term_offsets[1:] = np.cumsum([len(p) for p in per_term])
+        postings_doc = np.empty(int(term_offsets[-1]), dtype=np.int32)
+        postings_tf = np.empty(int(term_offsets[-1]), dtype=np.int32)
+        for tid, postings in enumerate(per_term):
+            start, end = term_offsets[tid], term_offsets[tid + 1]
+            postings_doc[start:end] = [d for d, _ in postings]
+            postings_tf[start:end] = [tf for _, tf in postings]
+
+        return cls(
+            vocab=list(term_ids),
+            doc_len=np.asarray(doc_len, dtype=np.int32),
+            idf=idf,
+            term_offsets=term_offsets,
+            postings_doc=postings_doc,
+            postings_tf=postings_tf,
+            avgdl=sum(doc_len) / n_docs,
+            fingerprint=fingerprint,
+            tokenizer=tokenizer,
+            k1=k1,
+            b=b,
+            epsilon=epsilon,
+        )
+
+    def save(self, index_dir: str) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        meta_path = os.path.join(index_dir, _META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        np.save(os.path.join(index_dir, "doc_len.npy"), self.doc_len)
+        np.save(os.path.join(index_dir, "idf.npy"), self.idf)
+        np.save(os.path.join(index_dir, "term_offsets.npy"), self.term_offsets)
+        np.save(os.path.join(index_dir, "postings_doc.npy"), self.postings_doc)
+        np.save(os.path.join(index_dir, "postings_tf.npy"), self.postings_tf)
+        with open(os.path.join(index_dir, _VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+
+        # meta.json 을 마지막에 써서, 중간에 실패한 빌드가 유효한 인덱스로 보이지 않게 함
+        meta = {
+            "format_version": BM25_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "tokenizer": self.tokenizer,
+            "n_docs": self.n_docs,
+            "n_terms": len(self.vocab),
+            "avgdl": self.avgdl,
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+        }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(
+        cls,
+        index_dir: str,
+        expected_fingerprint: str,
+        expected_tokenizer: str = "whitespace",
+    ) -> "BM25Index":
+        """
+        저장된 인덱스를 memmap 으로 연다.
+        - 디렉토리/파일이 없으면 FileNotFoundError
+        - FAISS fingerprint, 포맷 버전, 토크나이저가 다르면 StaleBM25IndexError
+        """
+        with open(os.path.join(index_dir, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("format_version") != BM25_FORMAT_VERSION:
+            raise StaleBM25IndexError(
+                f"BM25 인덱스 포맷 버전이 다릅니다: {meta.get('format_version')}"
+            )
+        if meta.get("fingerprint") != expected_fingerprint:
+            raise StaleBM25IndexError(
+                "BM25 인덱스가 현재 faiss_index 와 다른 인덱스로부터 빌드되었습니다."
+            )
+        if meta.get("tokenizer") != expected_tokenizer:
+            raise StaleBM25IndexError(
+                f"BM25 인덱스 토크나이저가 다릅니다: {meta.get('tokenizer')}"
+            )
+
+        arrays = {
+            name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+            for name in _ARRAY_FILES
+        }
+        with open(os.path.join(index_dir, _VOCAB_FILE), encoding="utf-8") as f:
+            vocab = json.load(f)
+
+        if len(arrays["doc_len"]) != meta["n_docs"] or len(vocab) != meta["n_terms"]:
+            raise StaleBM25IndexError("BM25 인덱스 파일이 손상되었습니다.")
+
+        return cls(
+            vocab=vocab,
+            avgdl=meta["avgdl"],
+            fingerprint=meta["fingerprint"],
+            tokenizer=meta["tokenizer"],
+            k1=meta["k1"],
+            b=meta["b"],
+            epsilon=meta["epsilon"],
+            **arrays,
+        )
+
+    def _term_contributions(self, query_tokens: List[str], cache: Dict | None = None):
+        """
+        쿼리 토큰별 (postings doc id, 점수 기여분) 배열 목록. 쿼리에 중복된 토큰은 중복 가산.
+        - cache: 여러 쿼리를 함께 채점할 때 term 별 기여분을 공유하기 위한 dict
+        """
+        parts = []
+        for tok in query_tokens:
+            tid = self.term_ids.get(tok)
+            if tid is None:
+                continue
+            if cache is not None and tid in cache:
+                parts.append(cache[tid])
+                continue
+            start, end = self.term_offsets[tid], self.term_offsets[tid + 1]
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float64)
+            part = (docs, self.idf[tid] * (tf * (self.k1 + 1) / (tf + self._norm[docs])))
+            if cache is not None:
+                cache[tid] = part
+            parts.append(part)
+        return parts
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """모든 문서에 대한 BM25 점수 (rank_bm25.BM25Okapi.get_scores 와 동일한 값)."""
+        scores = np.zeros(self.n_docs)
+        for docs, contrib in self._term_contributions(query_tokens):
+            scores[docs] += contrib
+        return scores
+
+    def score_matches(
+        self,
+        query_tokens: List[str],
+        cache: Dict | None = None,
+        allowed: np.ndarray | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        쿼리 term 을 하나라도 포함한 문서만 점수 계산 (비용 ∝ 매칭 postings 수).
+        - bincount 는 배열 순서대로 누적하므로 토큰 순서별 합산 결과가 get_scores 와 동일
+        - allowed: 문서별 bool mask. 주어지면 mask 가 True 인 문서만 채점 (필터 검색)
+        """
+        parts = self._term_contributions(query_tokens, cache)
+        if not parts:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        docs = np.concatenate([d for d, _ in parts])
+        contrib = np.concatenate([c for _, c in parts])
+        if allowed is not None:
+            keep = allowed[docs]
+            docs, contrib = docs[keep], contrib[keep]
+        doc_ids, inverse = np.unique(docs, return_inverse=True)
+        return doc_ids, np.bincount(inverse, weights=contrib)
+
+    def top_k(
+        self, query_tokens: List[str], k: int, allowed: np.ndarray | None = None
+    ) -> List[Tuple[int, float]]:
+        """
+        점수 상위 k개 문서의 (doc id, score). 매칭 문서만 top-k heap 으로 선택.
+        - 동점이면 doc id 가 큰 문서 우선 (기존 np.argsort(...)[::-1] 순서와 동일)
+        - 쿼리 term 이 전혀 없는 문서(0점)로 k개를 채우지 않음
+        """
+        return self._top_k(query_tokens, k, allowed=allowed)
+
+    def top_k_many(
+        self,
+        queries_tokens: List[List[str]],
+        k: int,
+        allowed: np.ndarray | None = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """여러 쿼리를 함께 채점. 쿼리 사이에 겹치는 term 의 기여분은 한 번만 계산."""
+        cache: Dict = {}
+        return [self._top_k(tokens, k, cache, allowed) for tokens in queries_tokens]
+
+    def _top_k(
+        self,
+        query_tokens: List[str],
+        k: int,
+        cache: Dict | None = None,
+        allowed: np.ndarray | None = None,
+    ) -> List[Tuple[int, float]]:
+        doc_ids, scores = self.score_matches(query_tokens, cache, allowed)
+        top = heapq.nlargest(k, zip(scores.tolist(), doc_ids.tolist()))
+        return [(doc_id, score) for score, doc_id in top]
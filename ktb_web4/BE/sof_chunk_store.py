@@ -0,0 +1,246 @@
+"""
+SoF 청크 저장소 (pickle docstore 대체).
+
+- 청크 본문은 UTF-8 blob 하나(text.bin)에 이어 붙이고, row 별 시작 위치를 text_offsets 에 저장
+- 메타데이터는 컬럼 배열: page / year 는 정수, source / chapter / region 은 값 목록에 대한 코드 (None = -1)
+- 모든 파일을 numpy memmap 으로 열어, 필요한 row 의 본문만 그때그때 디코딩
+- chunk id = FAISS 인덱스 row 번호 (docstore UUID 대신 정수 ID 사용)
+- 빌드 당시 FAISS 인덱스의 fingerprint 를 함께 저장하고, 현재 인덱스와 다르면 로드를 거부
+- 빌드 시 거의 같은 청크 그룹(dup_group, sof_dedup)을 계산해 함께 저장하고 통계를 meta.json 에 기록
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from BE.sof_dedup import (
+    DEFAULT_DEDUP_THRESHOLD,
+    dedup_stats,
+    minhash_signatures,
+    near_duplicate_groups,
+)
+
+
+CHUNK_STORE_FORMAT_VERSION = 2
+
+_META_FILE = "meta.json"
+_TEXT_FILE = "text.bin"
+_INT_COLUMNS = {"page": np.int32, "year": np.int16}
+_CODED_COLUMNS = ("source", "chapter", "region")
+_ARRAY_FILES = ("text_offsets", "dup_group") + tuple(_INT_COLUMNS) + _CODED_COLUMNS
+
+# 저장하는 메타데이터 필드 (검색/format_docs/API 응답에서 쓰는 것만)
+METADATA_FIELDS = ("source", "page", "year", "chapter", "region")
+
+
+class StaleChunkStoreError(RuntimeError):
+    """저장된 청크 저장소가 현재 FAISS 인덱스와 맞지 않을 때 발생."""
+
+
+class Chunk:
+    """
+    청크 하나에 대한 가벼운 view. Document 처럼 page_content / metadata 로 접근하지만
+    접근할 때만 blob 에서 읽어 옴.
+    """
+
+    __slots__ = ("store", "id")
+
+    def __init__(self, store: "ChunkStore", row: int):
+        self.store = store
+        self.id = row
+
+    @property
+    def page_content(self) -> str:
+        return self.store.text(self.id)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.store.metadata(self.id)
+
+    def __repr__(self) -> str:
+        return f"Chunk(id={self.id}, metadata={self.metadata!r})"
+
+
+class ChunkStore:
+    def __init__(
+        self,
+        text: np.ndarray,
+        text_offsets: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        labels: Dict[str, List[str]],
+        fingerprint: str,
+        dup_group: np.ndarray,
+        dedup: Dict[str, Any],
+    ):
+        self._text = text
+        self.text_offsets = text_offsets
+        self.columns = columns
+        self.labels = labels
+        self.fingerprint = fingerprint
+        # row -> 거의 같은 청크 그룹 id (그룹의 가장 작은 row), 빌드 시점 중복 통계
+        self.dup_group = dup_group
+        self.dedup = dedup
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self.text_offsets) - 1
+
+    def __len__(self) -> int:
+        return self.n_chunks
+
+    # --- 조회 ---
+
+    def text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return self._text[start:end].tobytes().decode("utf-8")
+
+    def texts(self) -> Iterator[str]:
+        for row in range(self.n_chunks):
+            yield self.text(row)
+
+    def _decode(self, field: str, code: int) -> Any:
+        if code < 0:
+            return None
+        return self.labels[field][code] if field in self.labels else code
+
+    def value(self, field: str, row: int) -> Any:
+        return self._decode(field, int(self.columns[field][row]))
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        return {field: self.value(field, row) for field in METADATA_FIELDS}
+
+    def chunk(self, row: int) -> Chunk:
+        return Chunk(self, int(row))
+
+    def rows_by(self, field: str) -> Dict[Any, np.ndarray]:
+        """field 값 -> 해당 청크 row 배열 (정렬됨). 컬럼 배열만으로 계산."""
+        codes = np.asarray(self.columns[field])
+        order = np.argsort(codes, kind="stable").astype(np.int64)
+        values, starts = np.unique(codes[order], return_index=True)
+        return {
+            self._decode(field, code): rows
+            for code, rows in zip(values.tolist(), np.split(order, starts[1:]))
+        }
+
+    # --- 빌드 / 저장 ---
+
+    @classmethod
+    def build(
+        cls,
+        docs: Iterable[Any],
+        fingerprint: str,
+        dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD,
+    ) -> "ChunkStore":
+        """FAISS row 순서대로 나열된 Document 들로 저장소를 만든다."""
+        blob = bytearray()
+        offsets = [0]
+        texts: List[str] = []
+        raw: Dict[str, List[Any]] = {field: [] for field in METADATA_FIELDS}
+        for doc in docs:
+            texts.append(doc.page_content)
+            blob += doc.page_content.encode("utf-8")
+            offsets.append(len(blob))
+            for field in METADATA_FIELDS:
+                raw[field].append(doc.metadata.get(field))
+
+        columns: Dict[str, np.ndarray] = {}
+        labels: Dict[str, List[str]] = {}
+        for field, dtype in _INT_COLUMNS.items():
+            columns[field] = np.asarray(
+                [-1 if v is None else int(v) for v in raw[field]], dtype=dtype
+            )
+        for field in _CODED_COLUMNS:
+            labels[field] = sorted({str(v) for v in raw[field] if v is not None})
+            code_of = {label: i for i, label in enumerate(labels[field])}
+            columns[field] = np.asarray(
+                [-1 if v is None else code_of[str(v)] for v in raw[field]],
+                dtype=np.int16,
+            )
+
+        dup_group = near_duplicate_groups(minhash_signatures(texts), dedup_threshold)
+        return cls(
+            text=np.frombuffer(bytes(blob), dtype=np.uint8),
+            text_offsets=np.asarray(offsets, dtype=np.int64),
+            columns=columns,
+            labels=labels,
+            fingerprint=fingerprint,
+            dup_group=dup_group,
+            dedup=dedup_stats(dup_group, raw["source"], dedup_threshold),
+        )
+
+    def save(self, store_dir: str) -> None:
+        os.makedirs(store_dir, exist_ok=True)
+        meta_path = os.path.join(store_dir, _META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        with open(os.path.join(store_dir, _TEXT_FILE), "wb") as f:
+            f.write(self._text.tobytes())
+        np.save(os.path.join(store_dir, "text_offsets.npy"), self.text_offsets)
+        np.save(os.path.join(store_dir, "dup_group.npy"), self.dup_group)
+        for field, column in self.columns.items():
+            np.save(os.path.join(store_dir, f"{field}.npy"), column)
+
+        # meta.json 을 마지막에 써서, 중간에 실패한 빌드가 유효한 저장소로 보이지 않게 함
+        meta = {
+            "format_version": CHUNK_STORE_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "n_chunks": self.n_chunks,
+            "text_bytes": int(self.text_offsets[-1]),
+            "labels": self.labels,
+            "dedup": self.dedup,
+        }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, store_dir: str, expected_fingerprint: str) -> "ChunkStore":
+        """
+        저장된 청크 저장소를 memmap 으로 연다.
+        - 디렉토리/파일이 없으면 FileNotFoundError
+        - FAISS fingerprint, 포맷 버전이 다르면 StaleChunkStoreError
+        """
+        with open(os.path.join(store_dir, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("format_version") != CHUNK_STORE_FORMAT_VERSION:
+            raise StaleChunkStoreError(
+                f"청크 저장소 포맷 버전이 다릅니다: {meta.get('format_version')}"
+            )
+        if meta.get("fingerprint") != expected_fingerprint:
+            raise StaleChunkStoreError(
+                "청크 저장소가 현재 faiss_index 와 다른 인덱스로부터 빌드되었습니다."
+            )
+
+        arrays = {
+            name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+            for name in _ARRAY_FILES
+        }
+        text_offsets = arrays.pop("text_offsets")
+        dup_group = arrays.pop("dup_group")
+        text_path = os.path.join(store_dir, _TEXT_FILE)
+        text = (
+            np.memmap(text_path, dtype=np.uint8, mode="r")
+            if meta["text_bytes"]
+            else np.empty(0, dtype=np.uint8)
+        )
+
+        if (
+            len(text_offsets) != meta["n_chunks"] + 1
+            or len(text) != meta["text_bytes"]
+            or len(dup_group) != meta["n_chunks"]
+            or any(len(column) != meta["n_chunks"] for column in arrays.values())
+        ):
+            raise StaleChunkStoreError("청크 저장소 파일이 손상되었습니다.")
+
+        return cls(
+            text=text,
+            text_offsets=text_offsets,
+            columns=arrays,
+            labels=meta["labels"],
+            fingerprint=meta["fingerprint"],
+            dup_group=dup_group,
+            dedup=meta["dedup"],
+        )
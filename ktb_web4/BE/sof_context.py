@@ -0,0 +1,217 @@
+"""
+QA 프롬프트용 참고 문서(context) 구성.
+
+- 검색/rerank 순서대로 청크를 넣되, 토큰 예산(SOF_CONTEXT_TOKEN_BUDGET)을 넘지 않는 만큼만 채움
+  - 토큰 수는 답변 LLM 의 토크나이저로 셈 (지정하지 않았거나 로드 실패 시 글자 수 기반 추정)
+  - 예산에 맞지 않는 청크는 건너뛰고 다음(더 짧은) 청크를 시도 (첫 청크는 문장 단위로 잘라서라도 넣음)
+- 거의 같은 청크(연도별 리포트에 반복되는 같은 페이지 등)는 먼저 들어간 것 하나만 사용
+  - 단어 3-gram shingle 의 Jaccard 유사도로 판단
+- 청크 본문은 질문 키워드가 들어 있는 문장과 앞뒤 문장만 남기고 잘라냄 (매칭이 없으면 전체 유지)
+"""
+
+import re
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+
+SHINGLE_SIZE = 3
+TRIM_MARK = "…"
+
+# 질문 키워드에서 뺄 영어 기능어 (문장 매칭 기준을 흐리는 것들만)
+_STOPWORDS = frozenset(
+    "the and for are was were with that this from what which how why who when where "
+    "does did can could should would about into than then them they their there these "
+    "those have has had its his her our your you not but also".split()
+)
+
+# 문장 끝 구두점 뒤 공백 또는 빈 줄에서 나눔 (PDF 추출 텍스트의 줄바꿈은 문장 경계가 아님)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?。])\s+|\n\s*\n")
+_SHINGLE_WORD_RE = re.compile(r"\w+")
+_ASCII_RE = re.compile(r"[\x00-\x7f]")
+
+
+# --- 토큰 수 ---
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 보수적 추정: ASCII 4글자당 1토큰, 그 외(한글 등) 1글자당 1토큰."""
+    ascii_chars = len(_ASCII_RE.findall(text))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+class HFTokenCounter:
+    """Hugging Face tokenizer.json 으로 토큰 수를 셈 (예: llama3 토크나이저 저장소 이름)."""
+
+    def __init__(self, name: str):
+        from tokenizers import Tokenizer
+
+        self.name = name
+        self._tokenizer = Tokenizer.from_pretrained(name)
+
+    def __call__(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+# --- 중복 / 문장 잘라내기 ---
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[Tuple[str, ...]]:
+    words = _SHINGLE_WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return frozenset([tuple(words)]) if words else frozenset()
+    return frozenset(tuple(words[i : i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: FrozenSet, b: FrozenSet) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def query_terms(question: str, tokenize: Callable[[str], List[str]]) -> Set[str]:
+    """문장 매칭에 쓸 질문 키워드 (BM25 토크나이저 결과에서 짧은 영문 토큰 / 기능어 제외)."""
+    return {
+        t
+        for t in tokenize(question)
+        if t not in _STOPWORDS and (len(t) >= 3 or not t.isascii())
+    }
+
+
+def split_sentences(text: str) -> List[str]:
+    """문장 목록 (문장 안의 줄바꿈/연속 공백은 공백 하나로)."""
+    return [" ".join(s.split()) for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+def trim_to_matches(
+    text: str,
+    terms: Set[str],
+    tokenize: Callable[[str], List[str]],
+    window: int = 1,
+) -> str:
+    """
+    terms 가 들어 있는 문장과 앞뒤 window 문장만 남김.
+    생략된 구간은 TRIM_MARK 로 표시하고, 매칭되는 문장이 없으면 원문 그대로.
+    """
+    if not terms:
+        return text
+    sentences = split_sentences(text)
+    matched = [i for i, s in enumerate(sentences) if terms.intersection(tokenize(s))]
+    if not matched:
+        return text
+
+    keep = sorted(
+        {
+            j
+            for i in matched
+            for j in range(max(0, i - window), min(len(sentences), i + window + 1))
+        }
+    )
+    if len(keep) == len(sentences):
+        return text
+
+    parts: List[str] = []
+    prev = None
+    for i in keep:
+        if prev is not None and i != prev + 1:
+            parts.append(TRIM_MARK)
+        parts.append(sentences[i])
+        prev = i
+    if keep[0] > 0:
+        parts.insert(0, TRIM_MARK)
+    if keep[-1] < len(sentences) - 1:
+        parts.append(TRIM_MARK)
+    return " ".join(parts)
+
+
+def _truncate_to_budget(
+    header: str, body: str, count_tokens: Callable[[str], int], token_budget: int
+) -> str:
+    sentences = split_sentences(body)
+    kept: List[str] = []
+    for sentence in sentences:
+        candidate = " ".join(kept + [sentence, TRIM_MARK])
+        if count_tokens(header + "\n" + candidate) > token_budget:
+            break
+        kept.append(sentence)
+    return " ".join(kept + [TRIM_MARK]) if kept else body
+
+
+# --- 구성 ---
+
+
+def pack_context(
+    docs: Sequence[Any],
+    header: Callable[[Any], str],
+    count_tokens: Callable[[str], int],
+    token_budget: int,
+    max_chunks: int = 8,
+    terms: Iterable[str] = (),
+    tokenize: Callable[[str], List[str]] | None = None,
+    dedup_threshold: float = 0.85,
+    trim_window: int = 1,
+) -> Tuple[str, List[Any], Dict[str, Any]]:
+    """
+    docs(관련도 순)로 토큰 예산 안의 참고 문서 문자열을 만든다.
+    - token_budget <= 0 이면 예산 없이 상위 max_chunks 개를 그대로 사용 (잘라내기/중복 제거 없음)
+    - 반환: (참고 문서 문자열, 실제로 들어간 청크 목록, 디버그 정보)
+    """
+    terms = set(terms)
+    blocks: List[str] = []
+    packed: List[Any] = []
+    packed_shingles: List[FrozenSet] = []
+    info: Dict[str, Any] = {
+        "token_budget": token_budget,
+        "tokens": 0,
+        "chunks": [],
+        "duplicates": [],
+        "over_budget": [],
+    }
+    separator_tokens = count_tokens("\n\n")
+
+    for d in docs:
+        if len(packed) >= max_chunks:
+            break
+        if token_budget <= 0:
+            block = header(d) + "\n" + d.page_content
+            blocks.append(block)
+            packed.append(d)
+            info["chunks"].append({"chunk_id": d.id, "tokens": count_tokens(block)})
+            continue
+
+        doc_shingles = shingles(d.page_content)
+        duplicate_of = next(
+            (
+                p.id
+                for p, s in zip(packed, packed_shingles)
+                if jaccard(doc_shingles, s) >= dedup_threshold
+            ),
+            None,
+        )
+        if duplicate_of is not None:
+            info["duplicates"].append({"chunk_id": d.id, "duplicate_of": duplicate_of})
+            continue
+
+        body = d.page_content
+        if tokenize is not None:
+            body = trim_to_matches(body, terms, tokenize, trim_window)
+        block = header(d) + "\n" + body
+        tokens = count_tokens(block) + (separator_tokens if blocks else 0)
+        if not blocks and tokens > token_budget:
+            # 첫 청크도 예산보다 길면 빈 문맥 대신 앞 문장부터 예산만큼만 사용
+            body = _truncate_to_budget(header(d), body, count_tokens, token_budget)
+            block = header(d) + "\n" + body
+            tokens = count_tokens(block)
+        if info["tokens"] + tokens > token_budget:
+            info["over_budget"].append({"chunk_id": d.id, "tokens": tokens})
+            continue
+
+        blocks.append(block)
+        packed.append(d)
+        packed_shingles.append(doc_shingles)
+        info["tokens"] += tokens
+        info["chunks"].append(
+            {"chunk_id": d.id, "tokens": tokens, "trimmed": body != d.page_content}
+        )
+
+    if token_budget <= 0:
+        info["tokens"] = count_tokens("\n\n".join(blocks))
+    return "\n\n".join(blocks), packed, info
@@ -0,0 +1,141 @@
+"""
+연도별 리포트에 반복되는 거의 같은 청크(boilerplate, 매년 실리는 차트 설명 등) 묶기.
+
+- 인덱스 빌드 시점에 청크마다 MinHash 서명(단어 3-gram shingle, 64개 해시)을 계산
+- LSH banding(16 band x 4 row)으로 후보 쌍만 뽑아, 추정 Jaccard 유사도가 threshold 이상이면 같은 그룹
+  (union-find, 그룹 id = 그룹에서 가장 작은 row)
+- 검색 시에는 융합 순서대로 그룹마다 처음 나온(가장 점수가 높은) 청크 하나만 남김
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+
+DEFAULT_DEDUP_THRESHOLD = 0.6
+NUM_PERM = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# 해시 함수 i: (h XOR seed_i) * mult_i (mod 2^64). mult_i 가 홀수라 64비트 공간의 순열이 됨
+_rng = np.random.default_rng(20240601)
+_SEEDS = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+_MULTS = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        shingles = {
+            " ".join(words[i : i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        }
+    else:
+        shingles = {" ".join(words)} if words else set()
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def minhash_signatures(texts: Iterable[str]) -> np.ndarray:
+    """(N, NUM_PERM) uint64 MinHash 서명. 빈 청크는 모든 값이 최댓값."""
+    signatures = []
+    with np.errstate(over="ignore"):
+        for text in texts:
+            hashes = _shingle_hashes(text)
+            if len(hashes) == 0:
+                signatures.append(np.full(NUM_PERM, _MASK64, dtype=np.uint64))
+                continue
+            permuted = (hashes[:, None] ^ _SEEDS[None, :]) * _MULTS[None, :]
+            signatures.append(permuted.min(axis=0))
+    if not signatures:
+        return np.empty((0, NUM_PERM), dtype=np.uint64)
+    return np.vstack(signatures)
+
+
+def near_duplicate_groups(
+    signatures: np.ndarray, threshold: float = DEFAULT_DEDUP_THRESHOLD
+) -> np.ndarray:
+    """row -> 그룹 id (int32). 중복이 없는 청크는 자기 자신의 row."""
+    n = len(signatures)
+    parent = np.arange(n, dtype=np.int64)
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return int(x)
+
+    empty = (signatures == _MASK64).all(axis=1)
+    rows_per_band = NUM_PERM // LSH_BANDS
+    checked = set()
+    for band in range(LSH_BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        block = np.ascontiguousarray(
+            signatures[:, band * rows_per_band : (band + 1) * rows_per_band]
+        )
+        for row in range(n):
+            if not empty[row]:
+                buckets.setdefault(block[row].tobytes(), []).append(row)
+        for members in buckets.values():
+            for i, first in enumerate(members):
+                for other in members[i + 1 :]:
+                    if (first, other) in checked:
+                        continue
+                    checked.add((first, other))
+                    similarity = float(np.mean(signatures[first] == signatures[other]))
+                    if similarity >= threshold:
+                        a, b = find(first), find(other)
+                        if a != b:
+                            parent[max(a, b)] = min(a, b)
+
+    return np.fromiter((find(row) for row in range(n)), dtype=np.int32, count=n)
+
+
+def dedup_stats(
+    groups: np.ndarray, sources: List[Any], threshold: float
+) -> Dict[str, Any]:
+    """
+    인덱스 빌드 시점 통계.
+    - duplicate_chunks: 대표 청크가 아닌(검색에서 가려질 수 있는) 청크 수
+    - cross_source_groups: 서로 다른 리포트에 걸친 그룹 수 (연도 간 반복)
+    - by_source: 소스별로 다른 청크의 중복인 청크 수
+    """
+    groups = np.asarray(groups)
+    n = len(groups)
+    sizes = Counter(groups.tolist())
+    duplicate_rows = np.flatnonzero(groups != np.arange(n))
+    members: Dict[int, set] = {}
+    for row, group in enumerate(groups.tolist()):
+        if sizes[group] > 1:
+            members.setdefault(group, set()).add(sources[row])
+    by_source = Counter(sources[row] for row in duplicate_rows.tolist())
+    return {
+        "threshold": threshold,
+        "n_chunks": n,
+        "groups_with_duplicates": len(members),
+        "duplicate_chunks": int(len(duplicate_rows)),
+        "largest_group": max(sizes.values(), default=0),
+        "cross_source_groups": sum(1 for s in members.values() if len(s) > 1),
+        "by_source": {str(k): v for k, v in sorted(by_source.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+def collapse(rows: np.ndarray, groups: np.ndarray, k: int) -> np.ndarray:
+    """점수 순 rows 에서 그룹마다 처음 나온 row 만 남긴 상위 k개 (순서 유지)."""
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return rows
+    _, first = np.unique(groups[rows], return_index=True)
+    return rows[np.sort(first)][:k]
@@ -0,0 +1,186 @@
+"""
+질의 임베딩 캐시.
+
+- HuggingFaceEmbeddings 등 LangChain Embeddings 객체를 감싸 같은 질의를 다시 인코딩하지 않음
+- 키: NFKC 정규화 + 공백 정리한 질의 텍스트
+- LRU + TTL, 전체 바이트 크기 기준 eviction
+- 선택적으로 디스크(.npz)에 저장해 재시작 후에도 유지
+  (namespace = 모델/백엔드, 다른 namespace 로 저장된 파일은 읽지 않음)
+"""
+
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings 래퍼. embed_query / embed_documents 결과를 텍스트 단위로 캐시.
+    - 엔트리 크기 = 벡터 바이트 + 키(UTF-8) 바이트, 합계가 max_bytes 를 넘으면 오래 안 쓴 것부터 제거
+    - ttl_seconds 가 지난 엔트리는 miss 로 처리
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 24 * 60 * 60,
+        persist_path: str | None = None,
+        namespace: str = "",
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+
+        # key -> (vector, created_at, nbytes)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float, int]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path and os.path.exists(persist_path):
+            self._load(persist_path)
+
+    # --- LangChain Embeddings 인터페이스 ---
+
+    def embed_query(self, text: str) -> List[float]:
+        key = ("query", normalize_query(text))
+        cached = self._get(key)
+        if cached is not None:
+            return cached.tolist()
+        vector = self.embeddings.embed_query(text)
+        self._put(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """캐시에 없는 텍스트만 모아 한 번의 배치로 인코딩."""
+        keys = [("documents", normalize_query(t)) for t in texts]
+        results: List[List[float] | None] = []
+        missing: Dict[Tuple[str, str], List[int]] = {}
+        for i, key in enumerate(keys):
+            cached = self._get(key)
+            results.append(cached.tolist() if cached is not None else None)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            vectors = self.embeddings.embed_documents([texts[i] for i in first])
+            for (key, positions), vector in zip(missing.items(), vectors):
+                self._put(key, vector)
+                for i in positions:
+                    results[i] = list(vector)
+        return results  # type: ignore[return-value]
+
+    # --- 캐시 ---
+
+    def _get(self, key) -> np.ndarray | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, vector, created_at: float | None = None) -> None:
+        array = np.asarray(vector, dtype=np.float32)
+        nbytes = array.nbytes + len(key[1].encode("utf-8"))
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (array, created_at or time.time(), nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key) -> None:
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    # --- 디스크 저장 ---
+
+    def save(self) -> None:
+        """persist_path 에 현재 캐시를 저장 (임시 파일에 쓴 뒤 교체)."""
+        if not self.persist_path:
+            return
+        with self._lock:
+            items = list(self._entries.items())
+        if not items:
+            return
+
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                kinds=np.array([k[0] for k, _ in items]),
+                texts=np.array([k[1] for k, _ in items]),
+                vectors=np.stack([v[0] for _, v in items]),
+                created_at=np.array([v[1] for _, v in items]),
+                namespace=np.array(self.namespace),
+            )
+        os.replace(tmp_path, self.persist_path)
+
+    def _load(self, path: str) -> None:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                saved = str(data["namespace"]) if "namespace" in data.files else ""
+                if saved != self.namespace:
+                    logger.warning(
+                        "임베딩 캐시 파일이 다른 모델/백엔드(%s)로 만들어져 무시합니다: %s",
+                        saved or "unknown",
+                        path,
+                    )
+                    return
+                rows = zip(
+                    data["kinds"].tolist(),
+                    data["texts"].tolist(),
+                    data["vectors"],
+                    data["created_at"].tolist(),
+                )
+                now = time.time()
+                for kind, text, vector, created_at in rows:
+                    if now - created_at <= self.ttl_seconds:
+                        self._put((kind, text), vector, created_at=created_at)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("임베딩 캐시 파일을 읽을 수 없어 무시합니다: %s (%s)", path, exc)
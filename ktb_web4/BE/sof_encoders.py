@@ -0,0 +1,197 @@
+"""
+질의 임베딩 모델(encoder) 백엔드.
+
+- torch     : HuggingFaceEmbeddings (sentence-transformers + PyTorch, fp32). 기존 방식이자 인덱스 수집에 쓰는 방식
+- onnx      : 같은 모델의 ONNX export 를 ONNX Runtime 으로 실행 (torch 를 로드하지 않아 RSS/시작 시간이 작음)
+- onnx_int8 : ONNX 동적 int8 양자화 모델. 저장소에 양자화 파일이 없으면 fp32 ONNX 를 로컬에서 양자화
+- ONNX 백엔드는 sentence-transformers 설정(sentence_bert_config.json, 1_Pooling, modules.json)을 읽어
+  같은 max_seq_length / pooling / Normalize 를 적용하므로 torch 백엔드로 만든 인덱스를 그대로 검색할 수 있음
+- 모델 이름은 Hugging Face 저장소 이름 또는 로컬 디렉토리 (다국어 모델로 바꾸면 인덱스를 같은 모델로 다시 수집해야 함)
+"""
+
+import json
+import logging
+import os
+import platform
+from typing import Any, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+ENCODER_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+ONNX_MODEL_FILE = "onnx/model.onnx"
+# sentence-transformers 저장소가 함께 배포하는 동적 int8 양자화 파일 (CPU 명령어 세트별)
+ONNX_INT8_FILES = {
+    "x86_64": "onnx/model_quint8_avx2.onnx",
+    "AMD64": "onnx/model_quint8_avx2.onnx",
+    "arm64": "onnx/model_qint8_arm64.onnx",
+    "aarch64": "onnx/model_qint8_arm64.onnx",
+}
+LOCAL_INT8_FILE = "model_int8_local.onnx"
+
+
+def _fetch(model_name: str, filename: str) -> str | None:
+    """모델 저장소(또는 로컬 디렉토리)의 파일 경로. 없으면 None."""
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        return path if os.path.exists(path) else None
+
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.errors import EntryNotFoundError
+
+    try:
+        return hf_hub_download(model_name, filename)
+    except EntryNotFoundError:
+        return None
+
+
+def _read_json(model_name: str, filename: str) -> Any:
+    path = _fetch(model_name, filename)
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _quantize(model_path: str) -> str:
+    """fp32 ONNX 모델을 동적 int8 양자화해 같은 디렉토리에 저장 (이미 있으면 재사용)."""
+    output = os.path.join(os.path.dirname(model_path), LOCAL_INT8_FILE)
+    if not os.path.exists(output):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("ONNX 모델 int8 양자화: %s -> %s", model_path, output)
+        quantize_dynamic(model_path, f"{output}.tmp", weight_type=QuantType.QUInt8)
+        os.replace(f"{output}.tmp", output)
+    return output
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    sentence-transformers 모델의 ONNX export 로 임베딩 (LangChain Embeddings 인터페이스).
+    - 토크나이즈는 tokenizers(Rust), forward pass 는 ONNX Runtime, pooling/정규화는 numpy
+    - embed_documents 는 길이순으로 정렬해 배치를 만들어 padding 을 줄이고, 결과는 입력 순서로 되돌림
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        onnx_file: str = "",
+        batch_size: int = 32,
+        threads: int = 0,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        if onnx_file:
+            model_path = _fetch(model_name, onnx_file)
+        elif quantized:
+            int8_file = ONNX_INT8_FILES.get(platform.machine())
+            model_path = _fetch(model_name, int8_file) if int8_file else None
+            if model_path is None:
+                fp32_path = _fetch(model_name, ONNX_MODEL_FILE)
+                model_path = _quantize(fp32_path) if fp32_path else None
+        else:
+            model_path = _fetch(model_name, ONNX_MODEL_FILE)
+        if model_path is None:
+            raise FileNotFoundError(
+                f"{model_name} 에 ONNX 모델({onnx_file or ONNX_MODEL_FILE})이 없습니다."
+            )
+        self.model_path = model_path
+
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        self._output_name = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+
+        st_config = _read_json(model_name, "sentence_bert_config.json") or {}
+        pooling = _read_json(model_name, "1_Pooling/config.json") or {}
+        modules = _read_json(model_name, "modules.json") or []
+        self.max_length = int(st_config.get("max_seq_length", 512))
+        self.cls_pooling = bool(pooling.get("pooling_mode_cls_token"))
+        self.normalize = any(m.get("type", "").endswith("Normalize") for m in modules)
+
+        tokenizer_path = _fetch(model_name, "tokenizer.json")
+        if tokenizer_path is None:
+            raise FileNotFoundError(f"{model_name} 에 tokenizer.json 이 없습니다.")
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(self.max_length)
+        if self.tokenizer.padding is None:
+            pad_token = next(
+                (t for t in ("[PAD]", "<pad>") if self.tokenizer.token_to_id(t) is not None),
+                None,
+            )
+            self.tokenizer.enable_padding(
+                pad_id=self.tokenizer.token_to_id(pad_token) if pad_token else 0,
+                pad_token=pad_token or "[PAD]",
+            )
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feed = {name: value for name, value in feed.items() if name in self._input_names}
+        hidden = self.session.run([self._output_name], feed)[0]
+
+        if self.cls_pooling:
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        vectors = None
+        for start in range(0, len(texts), self.batch_size):
+            rows = order[start : start + self.batch_size]
+            batch = self._encode([texts[i] for i in rows])
+            if vectors is None:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[rows] = batch
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def load_encoder(
+    backend: str,
+    model_name: str = DEFAULT_EMBED_MODEL,
+    onnx_file: str = "",
+    threads: int = 0,
+) -> Embeddings:
+    """backend 이름으로 질의 임베딩 모델 생성."""
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend in ("onnx", "onnx_int8"):
+        return OnnxEmbeddings(
+            model_name,
+            quantized=backend == "onnx_int8",
+            onnx_file=onnx_file,
+            threads=threads,
+        )
+    raise ValueError(f"알 수 없는 임베딩 백엔드입니다: {backend} ({', '.join(ENCODER_BACKENDS)})")
+
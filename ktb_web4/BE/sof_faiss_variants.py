@@ -0,0 +1,174 @@
+"""
+SoF FAISS 인덱스 변형 (flat / IVF-Flat / IVF-PQ / HNSW).
+
+- 배포된 faiss_index/index.faiss (IndexFlatL2) 의 벡터를 그대로 꺼내 같은 row 순서로 다른 인덱스를 빌드
+  -> chunk id(FAISS row) 와 청크 저장소 / BM25 인덱스의 대응 관계가 그대로 유지됨
+- 변형 인덱스는 faiss_index/index.<variant>.faiss 로 저장하고, 빌드 당시 flat 인덱스의
+  fingerprint 를 index.<variant>.json 에 함께 기록 (다르면 로드를 거부)
+- IVF 계열은 direct map 을 만들어 두어 reconstruct 가 가능하게 함 (IVF-PQ 의 reconstruct 는 양자화된 근사 벡터)
+- 필터/그룹 범위 검색은 변형과 무관하게 flat 인덱스의 원래 벡터로 정확 검색 (sof_langchain._row_vectors)
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict
+
+import faiss
+import numpy as np
+
+
+FAISS_VARIANTS = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# 빌드 기본값 (현재 코퍼스 규모 ~수천 청크 기준)
+DEFAULT_PQ_M = 48  # 384 차원 -> 서브벡터 8차원씩
+MAX_PQ_NBITS = 8
+DEFAULT_HNSW_M = 32
+DEFAULT_HNSW_EF_CONSTRUCTION = 80
+
+
+class StaleFaissVariantError(RuntimeError):
+    """저장된 변형 인덱스가 현재 flat 인덱스로부터 빌드된 것이 아닐 때 발생."""
+
+
+def variant_path(faiss_dir: str, variant: str) -> str:
+    if variant == "flat":
+        return os.path.join(faiss_dir, "index.faiss")
+    return os.path.join(faiss_dir, f"index.{variant}.faiss")
+
+
+def _meta_path(faiss_dir: str, variant: str) -> str:
+    return os.path.join(faiss_dir, f"index.{variant}.json")
+
+
+def default_nlist(n_vectors: int) -> int:
+    """IVF 리스트 수: sqrt(N) (리스트당 학습 샘플이 충분하도록 작게 잡음)."""
+    return max(1, int(math.sqrt(n_vectors)))
+
+
+def default_pq_nbits(n_vectors: int) -> int:
+    """PQ 코드 비트 수: 코드북(2^nbits 중심) 학습에 중심당 39개 이상 샘플이 있도록 (최대 8)."""
+    nbits = MAX_PQ_NBITS
+    while nbits > 4 and n_vectors < 39 * (1 << nbits):
+        nbits -= 1
+    return nbits
+
+
+def build_variant(vectors: np.ndarray, variant: str, **options: Any) -> faiss.Index:
+    """
+    vectors (row 순서 유지) 로 variant 인덱스를 빌드.
+    - options: nlist, pq_m, pq_nbits, hnsw_m, ef_construction
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+
+    if variant == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif variant in ("ivf_flat", "ivf_pq"):
+        nlist = options.get("nlist") or default_nlist(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if variant == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                dim,
+                nlist,
+                options.get("pq_m") or DEFAULT_PQ_M,
+                options.get("pq_nbits") or default_pq_nbits(n),
+            )
+        index.train(vectors)
+    elif variant == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, options.get("hnsw_m") or DEFAULT_HNSW_M)
+        index.hnsw.efConstruction = (
+            options.get("ef_construction") or DEFAULT_HNSW_EF_CONSTRUCTION
+        )
+    else:
+        raise ValueError(f"unknown FAISS variant: {variant!r} (choices: {FAISS_VARIANTS})")
+
+    index.add(vectors)
+    return index
+
+
+def save_variant(
+    index: faiss.Index, faiss_dir: str, variant: str, fingerprint: str, options: Dict
+) -> None:
+    meta_path = _meta_path(faiss_dir, variant)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    faiss.write_index(index, variant_path(faiss_dir, variant))
+
+    # 메타 파일을 마지막에 써서, 중간에 실패한 빌드가 유효한 인덱스로 보이지 않게 함
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "variant": variant,
+                "fingerprint": fingerprint,
+                "ntotal": int(index.ntotal),
+                "options": options,
+            },
+            f,
+            indent=2,
+        )
+
+
+def saved_options(faiss_dir: str, variant: str) -> Dict | None:
+    """저장된 변형 인덱스의 빌드 옵션. 빌드된 적이 없으면 None."""
+    try:
+        with open(_meta_path(faiss_dir, variant), encoding="utf-8") as f:
+            return json.load(f).get("options", {})
+    except FileNotFoundError:
+        return None
+
+
+def configure(index: faiss.Index, nprobe: int, ef_search: int) -> faiss.Index:
+    """검색 시점 파라미터 설정 (IVF: nprobe, HNSW: efSearch)."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        ivf.make_direct_map()
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+    return index
+
+
+def load_variant(
+    faiss_dir: str,
+    variant: str,
+    expected_fingerprint: str,
+    nprobe: int = 8,
+    ef_search: int = 64,
+) -> faiss.Index:
+    """
+    variant 인덱스를 로드.
+    - 파일이 없으면 FileNotFoundError
+    - 현재 flat 인덱스의 fingerprint 와 다르면 StaleFaissVariantError
+    """
+    if variant not in FAISS_VARIANTS:
+        raise ValueError(f"unknown FAISS variant: {variant!r} (choices: {FAISS_VARIANTS})")
+    if variant != "flat":
+        with open(_meta_path(faiss_dir, variant), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != expected_fingerprint:
+            raise StaleFaissVariantError(
+                f"{variant} 인덱스가 현재 faiss_index 와 다른 인덱스로부터 빌드되었습니다."
+            )
+    index = faiss.read_index(variant_path(faiss_dir, variant))
+    return configure(index, nprobe, ef_search)
+
+
+def search_params(index: faiss.Index, selector=None):
+    """
+    IDSelector 를 넘길 때 인덱스 종류에 맞는 SearchParameters.
+    - params 를 넘기면 인덱스에 설정된 nprobe / efSearch 대신 params 값이 쓰이므로 함께 복사
+    - IVF / HNSW 에서는 selector 가 탐색한 리스트/이웃 안에서만 적용되므로 k개가 보장되지 않음
+      (필터 검색은 sof_langchain._semantic_search_many 처럼 선택된 row 에서 정확 검색)
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    elif isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return params
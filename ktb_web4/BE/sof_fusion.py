@@ -0,0 +1,117 @@
+"""
+하이브리드 검색 융합 (FAISS + BM25).
+
+- 청크를 텍스트가 아닌 정수 ID(FAISS row = docstore 순서)로 다루고 NumPy 배열로 한 번에 채점
+- method
+  - "linear": 순위 선형 점수 (n - rank) / n  (기존 hybrid_search 방식)
+  - "rrf"   : Reciprocal Rank Fusion, 1 / (rrf_k + rank + 1)
+  - "minmax": FAISS 거리·BM25 점수를 각각 min-max 정규화한 실제 점수
+- 최종 점수 = alpha * semantic + (1 - alpha) * keyword
+- 동점이면 먼저 등장한 청크 우선 (semantic 결과 순서 → keyword 결과 순서)
+- fuse_lists: 질의 변형(원문 / 영어 번역 등)별 검색 결과 목록을 가중 RRF 로 다시 융합
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+FUSION_METHODS = ("linear", "rrf", "minmax")
+RRF_K = 60
+
+
+def _rank_linear(n: int) -> np.ndarray:
+    return (n - np.arange(n, dtype=np.float64)) / (n or 1)
+
+
+def _rank_rrf(n: int, rrf_k: int) -> np.ndarray:
+    return 1.0 / (rrf_k + 1.0 + np.arange(n, dtype=np.float64))
+
+
+def _minmax(values: np.ndarray) -> np.ndarray:
+    if len(values) == 0:
+        return values
+    low = values.min()
+    span = values.max() - low
+    if span <= 0:
+        return np.ones(len(values), dtype=np.float64)
+    return (values - low) / span
+
+
+def _component_scores(
+    ranked_scores: np.ndarray, method: str, higher_is_better: bool, rrf_k: int
+) -> np.ndarray:
+    n = len(ranked_scores)
+    if method == "linear":
+        return _rank_linear(n)
+    if method == "rrf":
+        return _rank_rrf(n, rrf_k)
+    if method == "minmax":
+        values = np.asarray(ranked_scores, dtype=np.float64)
+        return _minmax(values if higher_is_better else -values)
+    raise ValueError(f"unknown fusion method: {method!r} (choices: {FUSION_METHODS})")
+
+
+def fuse(
+    semantic_rows: np.ndarray,
+    semantic_distances: np.ndarray,
+    keyword_rows: np.ndarray,
+    keyword_scores: np.ndarray,
+    k: int,
+    method: str = "linear",
+    alpha: float = 0.6,
+    rrf_k: int = RRF_K,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    순위가 매겨진 두 결과 목록을 융합해 상위 k개의 (chunk row, 융합 점수) 반환.
+    - semantic_distances: FAISS L2 거리 (작을수록 관련), keyword_scores: BM25 점수
+    - 각 목록 안에서 row 는 중복되지 않는다고 가정 (FAISS / BM25 top-k 결과)
+    """
+    semantic_rows = np.asarray(semantic_rows, dtype=np.int64)
+    keyword_rows = np.asarray(keyword_rows, dtype=np.int64)
+
+    rows = np.concatenate([semantic_rows, keyword_rows])
+    if len(rows) == 0:
+        return rows, np.empty(0, dtype=np.float64)
+
+    contributions = np.concatenate(
+        [
+            alpha * _component_scores(semantic_distances, method, False, rrf_k),
+            (1 - alpha) * _component_scores(keyword_scores, method, True, rrf_k),
+        ]
+    )
+
+    unique_rows, first_seen, inverse = np.unique(
+        rows, return_index=True, return_inverse=True
+    )
+    totals = np.bincount(inverse, weights=contributions, minlength=len(unique_rows))
+
+    order = np.lexsort((first_seen, -totals))[:k]
+    return unique_rows[order], totals[order]
+
+
+def fuse_lists(
+    row_lists: Sequence[np.ndarray],
+    k: int,
+    weights: Sequence[float] | None = None,
+    rrf_k: int = RRF_K,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    순위 목록 여러 개를 가중 RRF 로 융합해 상위 k개의 (chunk row, 점수) 반환.
+    - 동점이면 앞쪽 목록에서 먼저 등장한 청크 우선
+    """
+    weights = [1.0] * len(row_lists) if weights is None else list(weights)
+    parts: List[np.ndarray] = [np.asarray(r, dtype=np.int64) for r in row_lists]
+    rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    if len(rows) == 0:
+        return rows, np.empty(0, dtype=np.float64)
+
+    contributions = np.concatenate(
+        [w * _rank_rrf(len(r), rrf_k) for w, r in zip(weights, parts)]
+    )
+    unique_rows, first_seen, inverse = np.unique(
+        rows, return_index=True, return_inverse=True
+    )
+    totals = np.bincount(inverse, weights=contributions, minlength=len(unique_rows))
+
+    order = np.lexsort((first_seen, -totals))[:k]
+    return unique_rows[order], totals[order]
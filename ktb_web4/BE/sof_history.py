@@ -0,0 +1,140 @@
+"""
+리포트 생성용 대화 기록 압축.
+
+- 프론트엔드는 리포트를 요청할 때마다 전체 대화를 보내므로, 오래된 턴은 누적 요약(rolling summary)으로 접고
+  최근 턴만 원문으로 프롬프트에 넣음
+- 요약은 "대화 앞부분(prefix)" 단위로 캐시: prefix 해시는 턴마다 이어지는 해시 체인
+  (h_i = sha256(h_{i-1} + 턴 i)) 이라, 대화가 뒤에 이어져도 앞부분의 해시는 그대로 유지
+  -> 다음 요청에서는 가장 긴 캐시된 prefix 요약에 새로 접히는 턴만 더해 갱신
+- 접는 경계는 SOF_REPORT_SUMMARY_BLOCK 턴 단위로 맞춰, 턴이 하나 늘 때마다 요약을 다시 만들지 않음
+- 최종 프롬프트가 토큰 상한을 넘으면 긴 턴부터 잘라 상한 안에 맞춤
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+TRIM_MARK = "…"
+
+
+def format_turn(turn: Dict[str, str]) -> str:
+    role_label = "사용자" if turn.get("role") == "user" else "AI"
+    return f"{role_label}: {turn.get('content', '')}"
+
+
+def prefix_hashes(turns: List[Dict[str, str]], session_id: str | None = None) -> List[str]:
+    """hashes[i] = 앞 i개 턴의 해시 (hashes[0] 은 빈 대화). session_id 가 있으면 세션마다 다른 체인."""
+    digest = hashlib.sha256((session_id or "").encode("utf-8")).hexdigest()
+    hashes = [digest]
+    for turn in turns:
+        payload = f"{digest}\x1e{turn.get('role', '')}\x1f{turn.get('content', '')}"
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        hashes.append(digest)
+    return hashes
+
+
+def fold_boundary(n_turns: int, keep_recent: int, block: int) -> int:
+    """요약으로 접을 앞쪽 턴 수 (block 배수, 최근 keep_recent 턴은 항상 원문)."""
+    foldable = max(0, n_turns - keep_recent)
+    return (foldable // block) * block if block > 0 else foldable
+
+
+def clip_texts(
+    texts: List[str], count_tokens: Callable[[str], int], budget: int
+) -> List[str]:
+    """
+    texts 전체 토큰 수가 budget 을 넘으면 긴 것부터 같은 상한(L)으로 잘라 맞춤.
+    - sum(min(tokens_i, L)) <= budget 인 가장 큰 L 을 찾아, L 을 넘는 텍스트만 글자 수 비율로 자름
+    """
+    tokens = [count_tokens(t) for t in texts]
+    if sum(tokens) <= budget or not texts:
+        return texts
+
+    ordered = sorted(tokens)
+    remaining = max(0, budget)
+    limit = 0
+    for i, t in enumerate(ordered):
+        share = remaining // (len(ordered) - i)
+        if t > share:
+            limit = share
+            break
+        remaining -= t
+    else:  # pragma: no cover - 합계가 budget 이하인 경우는 위에서 반환
+        return texts
+
+    clipped = []
+    for text, t in zip(texts, tokens):
+        if t <= limit:
+            clipped.append(text)
+            continue
+        keep_chars = max(0, len(text) * limit // t - len(TRIM_MARK))
+        while keep_chars > 0 and count_tokens(text[:keep_chars] + TRIM_MARK) > limit:
+            keep_chars = keep_chars * 9 // 10
+        clipped.append(text[:keep_chars] + TRIM_MARK if keep_chars else TRIM_MARK)
+    return clipped
+
+
+class ConversationSummaryCache:
+    """prefix 해시 -> (그 prefix 까지의 누적 요약, 생성 시각). LRU + TTL."""
+
+    def __init__(self, ttl_seconds: float = 6 * 60 * 60, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.folds = 0
+        self.folded_turns = 0
+
+    def longest_prefix(self, hashes: List[str], upto: int) -> Tuple[int, str]:
+        """
+        hashes[1..upto] 중 캐시에 있는 가장 긴 prefix 의 (턴 수, 요약).
+        없으면 (0, "").
+        """
+        now = time.time()
+        with self._lock:
+            for n in range(upto, 0, -1):
+                entry = self._entries.get(hashes[n])
+                if entry is None:
+                    continue
+                summary, created = entry
+                if now - created > self.ttl_seconds:
+                    del self._entries[hashes[n]]
+                    continue
+                self._entries.move_to_end(hashes[n])
+                self.hits += 1
+                return n, summary
+            if upto > 0:
+                self.misses += 1
+            return 0, ""
+
+    def store(self, prefix_hash: str, summary: str, folded_turns: int) -> None:
+        with self._lock:
+            self.folds += 1
+            self.folded_turns += folded_turns
+            if self.max_entries <= 0:
+                return
+            self._entries[prefix_hash] = (summary, time.time())
+            self._entries.move_to_end(prefix_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "folds": self.folds,
+                "folded_turns": self.folded_turns,
+            }
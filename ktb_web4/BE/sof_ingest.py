@@ -0,0 +1,158 @@
+"""
+SoF 코퍼스 수집(ingestion) 단계의 공용 로직.
+
+- 소스 목록: BE/sof_sources.json (PDF 경로 = 청크 metadata 의 source, 연도, 지역, 챕터별 페이지 범위)
+- PDF -> 페이지 단위 로드 (PyPDFLoader) -> RecursiveCharacterTextSplitter(1000 / 200) 청크
+- 청크 metadata: year / chapter / region / source / page (format_docs 와 검색 필터가 쓰는 필드)
+- 임베딩은 배치 단위로 여러 워커 프로세스에 나눠 계산 (워커마다 모델을 한 번만 로드)
+- 증분 처리를 위해 소스별 content hash 를 faiss_index/ingest_state.json 에 기록
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+EMBED_BATCH_SIZE = 64
+
+INGEST_STATE_FILE = "ingest_state.json"
+
+
+# --- 소스 목록 ---
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        sources = json.load(f)["sources"]
+    seen = set()
+    for entry in sources:
+        if entry["source"] in seen:
+            raise ValueError(f"소스 목록에 중복된 source 가 있습니다: {entry['source']}")
+        seen.add(entry["source"])
+    return sources
+
+
+def chapter_for_page(entry: Dict[str, Any], page: int) -> str | None:
+    """페이지 번호(PyPDFLoader 기준 0부터)가 속한 챕터. 범위 밖(표지 등)이면 None."""
+    for chapter_range in entry.get("chapters", []):
+        first, last = chapter_range["pages"]
+        if first <= page <= last:
+            return chapter_range["chapter"]
+    return None
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_signature(entry: Dict[str, Any], content_hash: str) -> str:
+    """PDF 내용 + 소스 목록 항목(연도/챕터 범위 등)의 해시. 둘 중 하나라도 바뀌면 다시 수집."""
+    payload = json.dumps(entry, sort_keys=True, ensure_ascii=False) + content_hash
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- 수집 상태 ---
+
+
+def pipeline_config(embed_model: str) -> Dict[str, Any]:
+    """이 값이 바뀌면 기존 벡터를 재사용할 수 없음 (전체 재임베딩)."""
+    return {
+        "embed_model": embed_model,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+    }
+
+
+def load_state(faiss_dir: str) -> Dict[str, Any] | None:
+    path = os.path.join(faiss_dir, INGEST_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(faiss_dir: str, state: Dict[str, Any]) -> None:
+    path = os.path.join(faiss_dir, INGEST_STATE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# --- 로드 / 청크 분할 ---
+
+
+def load_and_split(path: str, entry: Dict[str, Any]) -> List[Any]:
+    """PDF 하나를 청크 Document 목록으로. source 는 실제 경로가 아니라 소스 목록의 이름을 사용."""
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+    )
+    chunks = splitter.split_documents(PyPDFLoader(path).load())
+    for chunk in chunks:
+        page = chunk.metadata.get("page")
+        chunk.metadata.update(
+            {
+                "source": entry["source"],
+                "year": entry["year"],
+                "chapter": chapter_for_page(entry, page) if page is not None else None,
+                "region": entry.get("region"),
+            }
+        )
+    return chunks
+
+
+# --- 임베딩 (워커 프로세스) ---
+
+_worker_embeddings = None
+
+
+def _init_worker(embed_model: str) -> None:
+    global _worker_embeddings
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    _worker_embeddings = HuggingFaceEmbeddings(model_name=embed_model)
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def embed_texts(
+    texts: List[str],
+    embed_model: str,
+    workers: int = 1,
+    batch_size: int = EMBED_BATCH_SIZE,
+) -> np.ndarray:
+    """
+    텍스트를 batch_size 단위로 나눠 임베딩. 입력 순서대로 (N, dim) 행렬 반환.
+    - workers > 1 이면 spawn 워커 프로세스들이 배치를 나눠 계산
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    if workers <= 1:
+        _init_worker(embed_model)
+        return np.vstack([_embed_batch(batch) for batch in batches])
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(embed_model,),
+    ) as pool:
+        return np.vstack(list(pool.map(_embed_batch, batches)))
@@ -1,68 +1,191 @@
+import asyncio
+import atexit
 import json
+import logging
 import os
-import urllib.error
-import urllib.request
-from collections import defaultdict
-from typing import List, Dict, Any
+import pickle
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Dict, List
 
+import faiss
+import httpx
+import numpy as np
 from dotenv import load_dotenv
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
-from langchain_community.retrievers import BM25Retriever
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from BE.sof_bm25 import (
+    BM25Index,
+    StaleBM25IndexError,
+    faiss_fingerprint,
+    get_tokenizer,
+)
+from BE import llm_client
+from BE.lazy_resource import LazyResource
+from BE.sof_chunk_store import ChunkStore, StaleChunkStoreError
+from BE.sof_dedup import DEFAULT_DEDUP_THRESHOLD, collapse
+from BE.sof_context import HFTokenCounter, estimate_tokens, pack_context, query_terms
+from BE.sof_answer_cache import (
+    SemanticAnswerCache,
+    context_fingerprint,
+    prompt_fingerprint,
+)
+from BE.sof_embedding_cache import CachedEmbeddings, normalize_query
+from BE.sof_encoders import DEFAULT_EMBED_MODEL, ENCODER_BACKENDS, load_encoder
+from BE.sof_history import (
+    ConversationSummaryCache,
+    clip_texts,
+    fold_boundary,
+    format_turn,
+    prefix_hashes,
+)
+from BE.sof_faiss_variants import (
+    FAISS_VARIANTS,
+    StaleFaissVariantError,
+    load_variant,
+    search_params,
+)
+from BE.sof_fusion import FUSION_METHODS, fuse, fuse_lists
+from BE.sof_ingest import load_state
+from BE.sof_query_expansion import Glossary, RewriteCache, has_hangul
+from BE.sof_rerank import CrossEncoderReranker
+from BE.sof_retrieval_service import RetrievalClient
+from BE.sof_singleflight import SingleFlight
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # 로컬 LLM(Ollama) 설정
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 SOF_LLM_MODEL = os.getenv("SOF_LLM_MODEL", "llama3")
 
+# BM25 키워드 검색 토크나이저 (빌드/쿼리 공통). "ko": 조사 분리 + 한글 bigram, "whitespace": 기존 방식
+SOF_BM25_TOKENIZER = os.getenv("SOF_BM25_TOKENIZER", "ko")
+
+# 질의 임베딩 캐시 (LRU + TTL). SOF_EMBED_CACHE_PATH 를 지정하면 종료 시 디스크에 저장
+SOF_EMBED_CACHE_MAX_BYTES = int(os.getenv("SOF_EMBED_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+SOF_EMBED_CACHE_TTL = float(os.getenv("SOF_EMBED_CACHE_TTL", str(24 * 60 * 60)))
+SOF_EMBED_CACHE_PATH = os.getenv("SOF_EMBED_CACHE_PATH") or None
+
+# 시맨틱 답변 캐시: 같은 문맥을 검색한 유사 질문(코사인 >= threshold)에 저장된 답변 재사용
+# SOF_ANSWER_CACHE_MAX_ENTRIES=0 이면 비활성화
+SOF_ANSWER_CACHE_THRESHOLD = float(os.getenv("SOF_ANSWER_CACHE_THRESHOLD", "0.95"))
+SOF_ANSWER_CACHE_TTL = float(os.getenv("SOF_ANSWER_CACHE_TTL", str(60 * 60)))
+SOF_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("SOF_ANSWER_CACHE_MAX_ENTRIES", "512"))
+# 동시에 들어온 같은 질문은 검색과 LLM 호출을 한 번만 실행하고 결과를 공유 (1 이면 사용)
+SOF_SINGLE_FLIGHT = os.getenv("SOF_SINGLE_FLIGHT", "1") == "1"
+
+# FAISS + BM25 융합 방식 ("linear" / "rrf" / "minmax") 과 semantic 가중치 기본값 (요청마다 덮어쓸 수 있음)
+SOF_FUSION_METHOD = os.getenv("SOF_FUSION_METHOD", "linear")
+SOF_FUSION_ALPHA = float(os.getenv("SOF_FUSION_ALPHA", "0.6"))
+
+# 사용할 FAISS 인덱스 종류 ("flat" / "ivf_flat" / "ivf_pq" / "hnsw", python -m BE.tools.build_faiss_variants)
+# 와 검색 파라미터 (IVF 탐색 리스트 수 / HNSW 탐색 폭)
+SOF_FAISS_INDEX = os.getenv("SOF_FAISS_INDEX", "flat")
+SOF_FAISS_NPROBE = int(os.getenv("SOF_FAISS_NPROBE", "8"))
+SOF_FAISS_EF_SEARCH = int(os.getenv("SOF_FAISS_EF_SEARCH", "64"))
+
+# 검색 전용 프로세스 (python -m BE.tools.serve_retrieval) 의 Unix socket 경로
+# 지정하면 웹 워커는 임베딩 모델/FAISS/BM25 를 로드하지 않고 이 프로세스에 검색을 요청 (청크 본문은 각자 memmap 으로 읽음)
+# SOF_RETRIEVAL_BATCH_WAIT_MS / SOF_RETRIEVAL_MAX_BATCH: 서비스가 동시 요청을 한 인코더 배치로 모으는 대기 시간(ms) / 최대 요청 수
+SOF_RETRIEVAL_SOCKET = os.getenv("SOF_RETRIEVAL_SOCKET", "")
+SOF_RETRIEVAL_TIMEOUT = float(os.getenv("SOF_RETRIEVAL_TIMEOUT", "10"))
+SOF_RETRIEVAL_BATCH_WAIT_MS = float(os.getenv("SOF_RETRIEVAL_BATCH_WAIT_MS", "2"))
+SOF_RETRIEVAL_MAX_BATCH = int(os.getenv("SOF_RETRIEVAL_MAX_BATCH", "64"))
+
+# 검색 전 질의 확장 (한국어 질문 -> 영어 변형을 함께 검색해 융합)
+# "glossary": 로컬 용어집 번역/키워드 변형, "llm": 용어집 + LLM 영어 재작성 (시간 제한 안에서만), "off": 원문만
+SOF_QUERY_EXPANSION = os.getenv("SOF_QUERY_EXPANSION", "glossary")
+SOF_QUERY_REWRITE_TIMEOUT_MS = float(os.getenv("SOF_QUERY_REWRITE_TIMEOUT_MS", "1500"))
+
+# 거의 같은 청크(연도별로 반복되는 boilerplate 등, 청크 저장소 빌드 시 계산)는 융합 결과에서 가장 점수가 높은 것 하나만 남김
+SOF_DEDUP = os.getenv("SOF_DEDUP", "1") == "1"
+
+# 융합 결과 상위 N개를 CPU cross-encoder 로 재정렬 (SOF_RERANK=1 일 때만)
+# 시간 예산(ms) 안에 채점한 앞부분만 재정렬, 모델을 로드할 수 없으면 rerank 없이 융합 순서를 그대로 사용
+SOF_RERANK = os.getenv("SOF_RERANK", "0") == "1"
+SOF_RERANK_MODEL = os.getenv("SOF_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+SOF_RERANK_TOP_N = int(os.getenv("SOF_RERANK_TOP_N", "12"))
+SOF_RERANK_BUDGET_MS = float(os.getenv("SOF_RERANK_BUDGET_MS", "150"))
+SOF_RERANK_BATCH_SIZE = int(os.getenv("SOF_RERANK_BATCH_SIZE", "4"))
 
-def _call_ollama_chat(messages: List[Dict[str, str]]) -> str:
+# 참고 문서 토큰 예산 (0 이면 예산 없이 상위 SOF_CONTEXT_MAX_CHUNKS 개를 그대로 사용)
+# 토큰 수는 SOF_CONTEXT_TOKENIZER (Hugging Face tokenizer 저장소 이름, 답변 모델과 같은 것) 로 세고,
+# 비워 두면 글자 수 기반 추정
+SOF_CONTEXT_TOKEN_BUDGET = int(os.getenv("SOF_CONTEXT_TOKEN_BUDGET", "1500"))
+SOF_CONTEXT_MAX_CHUNKS = int(os.getenv("SOF_CONTEXT_MAX_CHUNKS", "8"))
+SOF_CONTEXT_TOKENIZER = os.getenv("SOF_CONTEXT_TOKENIZER", "")
+# 이미 들어간 청크와 단어 3-gram Jaccard 유사도가 이 값 이상이면 제외
+SOF_CONTEXT_DEDUP_THRESHOLD = float(os.getenv("SOF_CONTEXT_DEDUP_THRESHOLD", "0.85"))
+# 질문 키워드가 있는 문장 앞뒤로 남길 문장 수 (음수면 잘라내지 않음)
+SOF_CONTEXT_TRIM_WINDOW = int(os.getenv("SOF_CONTEXT_TRIM_WINDOW", "1"))
+
+# 리포트 프롬프트의 대화 부분 토큰 상한 (0 이면 압축 없이 전체 대화)
+# 넘으면 최근 SOF_REPORT_RECENT_TURNS 턴만 원문으로 두고, 그 앞은 SOF_REPORT_SUMMARY_BLOCK 턴 단위로 누적 요약
+SOF_REPORT_HISTORY_TOKENS = int(os.getenv("SOF_REPORT_HISTORY_TOKENS", "3000"))
+SOF_REPORT_RECENT_TURNS = int(os.getenv("SOF_REPORT_RECENT_TURNS", "6"))
+SOF_REPORT_SUMMARY_BLOCK = int(os.getenv("SOF_REPORT_SUMMARY_BLOCK", "6"))
+SOF_REPORT_SUMMARY_TOKENS = int(os.getenv("SOF_REPORT_SUMMARY_TOKENS", "400"))
+SOF_REPORT_SUMMARY_TTL = float(os.getenv("SOF_REPORT_SUMMARY_TTL", str(6 * 60 * 60)))
+SOF_REPORT_SUMMARY_MAX_ENTRIES = int(os.getenv("SOF_REPORT_SUMMARY_MAX_ENTRIES", "256"))
+
+
+_LLM_UNAVAILABLE_DETAIL = (
+    "패션 리서치용 LLM 서버에 연결할 수 없습니다. "
+    "Ollama가 실행 중인지와 SOF_LLM_MODEL에 지정된 모델이 다운로드되어 있는지 확인해주세요."
+)
+
+
+def _chat_payload(
+    messages: List[Dict[str, str]], stream: bool, num_predict: int | None = None
+) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"temperature": 0.1, "top_p": 0.9}
+    if num_predict is not None:
+        options["num_predict"] = num_predict
+    return {
+        "model": SOF_LLM_MODEL,
+        "messages": messages,
+        "stream": stream,
+        "options": options,
+    }
+
+
+async def _call_ollama_chat(
+    messages: List[Dict[str, str]], num_predict: int | None = None
+) -> str:
     """
-    Ollama /api/chat 엔드포인트로 요청을 보내는 헬퍼.
+    Ollama /api/chat 엔드포인트로 요청을 보내는 헬퍼 (공용 비동기 클라이언트 사용).
     - Ollama 앱이 로컬에서 실행 중이어야 함
     - `ollama pull llama3` 등으로 SOF_LLM_MODEL에 해당하는 모델이 준비되어 있어야 함
+    - num_predict: 생성 토큰 수 상한 (None 이면 모델 기본값)
     """
     url = f"{OLLAMA_HOST.rstrip('/')}/api/chat"
-    payload = {
-        "model": SOF_LLM_MODEL,
-        "messages": messages,
-        "stream": False,
-        "options": {"temperature": 0.1, "top_p": 0.9},
-    }
-
-    data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(
-        url, data=data, headers={"Content-Type": "application/json"}
-    )
 
     try:
-        with urllib.request.urlopen(request, timeout=60) as response:
-            body = response.read().decode("utf-8")
-    except urllib.error.URLError as exc:
+        parsed = await llm_client.post_json(
+            url, _chat_payload(messages, stream=False, num_predict=num_predict), timeout=60
+        )
+    except httpx.HTTPError as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=(
-                "패션 리서치용 LLM 서버에 연결할 수 없습니다. "
-                "Ollama가 실행 중인지와 SOF_LLM_MODEL에 지정된 모델이 다운로드되어 있는지 확인해주세요."
-            ),
-        ) from exc
-    except Exception as exc:  # pragma: no cover - 방어적 코드
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="패션 리서치용 LLM 호출 중 오류가 발생했습니다.",
+            detail=_LLM_UNAVAILABLE_DETAIL,
         ) from exc
-
-    try:
-        parsed = json.loads(body)
     except json.JSONDecodeError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="패션 리서치용 LLM 응답을 읽을 수 없습니다.",
         ) from exc
+    except Exception as exc:  # pragma: no cover - 방어적 코드
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="패션 리서치용 LLM 호출 중 오류가 발생했습니다.",
+        ) from exc
 
     # Ollama /api/chat 응답 형식: { ..., "message": {"role": "assistant", "content": "..."} }
     response_text = parsed.get("message", {}).get("content", "").strip()
@@ -75,142 +198,971 @@ def _call_ollama_chat(messages: List[Dict[str, str]]) -> str:
     return response_text
 
 
-_vectorstore: FAISS | None = None
-_bm25_retriever: BM25Retriever | None = None
-_by_year_chapter: Dict[Any, Any] | None = None
-_by_chapter: Dict[Any, Any] | None = None
+async def _stream_ollama_chat(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """
+    Ollama /api/chat 을 `"stream": true` 로 호출해 생성되는 토큰 조각을 바로 yield.
+    - 오류 매핑은 _call_ollama_chat 과 동일 (스트림 도중 발생하면 소비하는 쪽에서 처리)
+    """
+    url = f"{OLLAMA_HOST.rstrip('/')}/api/chat"
+
+    try:
+        async for chunk in llm_client.stream_json_lines(
+            url, _chat_payload(messages, stream=True), timeout=60
+        ):
+            if chunk.get("error"):
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="패션 리서치용 LLM 호출 중 오류가 발생했습니다.",
+                )
+            piece = chunk.get("message", {}).get("content", "")
+            if piece:
+                yield piece
+    except httpx.HTTPError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=_LLM_UNAVAILABLE_DETAIL,
+        ) from exc
+    except json.JSONDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="패션 리서치용 LLM 응답을 읽을 수 없습니다.",
+        ) from exc
+
+
+_warmup_error: str | None = None
 
 CHAPTER_LABELS = ["Global Economy", "Consumer Shifts", "Fashion System"]
 
+# faiss_index 를 만든 임베딩 모델 (질의 임베딩과 수집 파이프라인이 같은 모델을 써야 함)
+# 다른 모델(다국어 모델 등)로 바꾸면 python -m BE.tools.ingest_sof --full 로 인덱스를 다시 만들어야 함
+SOF_EMBED_MODEL = os.getenv("SOF_EMBED_MODEL", DEFAULT_EMBED_MODEL)
+# 질의 임베딩 백엔드 ("torch" / "onnx" / "onnx_int8", BE/sof_encoders.py)
+# SOF_EMBED_ONNX_FILE: 모델 저장소 안의 ONNX 파일 경로 (비우면 백엔드 기본값), SOF_EMBED_THREADS: ONNX Runtime 스레드 수 (0 이면 기본값)
+SOF_EMBED_BACKEND = os.getenv("SOF_EMBED_BACKEND", "torch")
+SOF_EMBED_ONNX_FILE = os.getenv("SOF_EMBED_ONNX_FILE", "")
+SOF_EMBED_THREADS = int(os.getenv("SOF_EMBED_THREADS", "0"))
 
-def get_vectorstore() -> FAISS:
-    global _vectorstore
-    if _vectorstore is not None:
-        return _vectorstore
+BASE_DIR = os.path.dirname(__file__)
+FAISS_DIR = os.path.join(BASE_DIR, "faiss_index")
+# faiss_index/ 옆에 저장되는 사전 계산 BM25 인덱스 (python -m BE.tools.build_bm25_index)
+BM25_DIR = os.path.join(BASE_DIR, "bm25_index")
+# pickle docstore 대신 쓰는 memmap 청크 저장소 (python -m BE.tools.build_chunk_store)
+CHUNK_STORE_DIR = os.path.join(BASE_DIR, "chunk_store")
+GLOSSARY_PATH = os.path.join(BASE_DIR, "sof_glossary.json")
+
+
+def _load_vectorstore() -> FAISS:
+    if not os.path.isdir(FAISS_DIR):
+        raise HTTPException(
+            status_code=500,
+            detail="faiss_index 디렉토리를 찾을 수 없습니다. ktb_web4/faiss_index 를 확인해주세요.",
+        )
+    if SOF_EMBED_BACKEND not in ENCODER_BACKENDS:
+        raise HTTPException(
+            status_code=500,
+            detail=f"SOF_EMBED_BACKEND 는 {', '.join(ENCODER_BACKENDS)} 중 하나여야 합니다.",
+        )
+    # 수집 기록이 있으면 인덱스를 만든 모델과 같은지 확인 (차원이 같은 다른 모델도 검색 결과가 무의미해짐)
+    indexed_model = ((load_state(FAISS_DIR) or {}).get("config") or {}).get("embed_model")
+    if indexed_model and indexed_model != SOF_EMBED_MODEL:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f"faiss_index 는 {indexed_model} 로 만들어졌습니다. SOF_EMBED_MODEL 을 맞추거나 "
+                "python -m BE.tools.ingest_sof --full 로 다시 수집해주세요."
+            ),
+        )
+
+    encoder = load_encoder(
+        SOF_EMBED_BACKEND,
+        SOF_EMBED_MODEL,
+        onnx_file=SOF_EMBED_ONNX_FILE,
+        threads=SOF_EMBED_THREADS,
+    )
+    index = _load_faiss_index()
+    # 더미 질의 하나를 인코딩해 차원 확인 (첫 forward pass 의 지연 초기화도 여기서 끝남)
+    dim = len(encoder.embed_query("dimension check"))
+    if dim != index.d:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f"임베딩 차원({dim}, {SOF_EMBED_MODEL})이 faiss_index 차원({index.d})과 다릅니다. "
+                "python -m BE.tools.ingest_sof --full 로 다시 수집해주세요."
+            ),
+        )
 
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+    embeddings = CachedEmbeddings(
+        encoder,
+        max_bytes=SOF_EMBED_CACHE_MAX_BYTES,
+        ttl_seconds=SOF_EMBED_CACHE_TTL,
+        persist_path=SOF_EMBED_CACHE_PATH,
+        namespace=f"{SOF_EMBED_MODEL}:{SOF_EMBED_BACKEND}",
+    )
+    if SOF_EMBED_CACHE_PATH:
+        atexit.register(embeddings.save)
+
+    # 청크 본문/메타데이터는 청크 저장소에서 읽으므로 index.pkl(docstore pickle)은 로드하지 않음
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
     )
 
-    base_dir = os.path.dirname(__file__)
-    faiss_dir = os.path.join(base_dir, "faiss_index")
 
-    if not os.path.isdir(faiss_dir):
+def _load_faiss_index() -> faiss.Index:
+    """
+    SOF_FAISS_INDEX 에 지정된 인덱스를 로드.
+    - 변형 인덱스가 없거나 현재 faiss_index 와 맞지 않으면(stale) flat 인덱스로 대체
+    """
+    if SOF_FAISS_INDEX not in FAISS_VARIANTS:
         raise HTTPException(
             status_code=500,
-            detail="faiss_index 디렉토리를 찾을 수 없습니다. ktb_web4/faiss_index 를 확인해주세요.",
+            detail=f"SOF_FAISS_INDEX 는 {', '.join(FAISS_VARIANTS)} 중 하나여야 합니다.",
+        )
+    try:
+        return load_variant(
+            FAISS_DIR,
+            SOF_FAISS_INDEX,
+            expected_fingerprint=get_index_fingerprint(),
+            nprobe=SOF_FAISS_NPROBE,
+            ef_search=SOF_FAISS_EF_SEARCH,
         )
+    except FileNotFoundError:
+        logger.warning(
+            "%s 인덱스를 찾을 수 없어 flat 인덱스를 사용합니다. "
+            "python -m BE.tools.build_faiss_variants 로 미리 빌드해주세요.",
+            SOF_FAISS_INDEX,
+        )
+    except StaleFaissVariantError as exc:
+        logger.warning(
+            "%s 인덱스를 사용할 수 없어 flat 인덱스를 사용합니다: %s", SOF_FAISS_INDEX, exc
+        )
+    return load_variant(FAISS_DIR, "flat", expected_fingerprint=get_index_fingerprint())
 
-    _vectorstore = FAISS.load_local(
-        faiss_dir, embeddings, allow_dangerous_deserialization=True
+
+# 검색 계층 공유 리소스: 동시에 처음 요청이 몰려도 각각 한 번만 로드됨 (BE/lazy_resource.py)
+_vectorstore: LazyResource[FAISS] = LazyResource("vectorstore", _load_vectorstore)
+_index_fingerprint: LazyResource[str] = LazyResource(
+    "index_fingerprint", lambda: faiss_fingerprint(FAISS_DIR)
+)
+
+
+def get_vectorstore() -> FAISS:
+    return _vectorstore.get()
+
+
+def get_index_fingerprint() -> str:
+    """현재 faiss_index 의 fingerprint (캐시 무효화 키로 사용)."""
+    return _index_fingerprint.get()
+
+
+def _connect_retrieval_service() -> RetrievalClient:
+    """검색 서비스에 연결하고, 서비스가 이 워커와 같은 faiss_index 를 쓰는지 확인."""
+    client = RetrievalClient(SOF_RETRIEVAL_SOCKET, timeout=SOF_RETRIEVAL_TIMEOUT)
+    service_fingerprint = client.call("info")["index_fingerprint"]
+    if service_fingerprint != get_index_fingerprint():
+        raise HTTPException(
+            status_code=500,
+            detail="검색 서비스의 faiss_index 가 이 서버와 다릅니다. 검색 서비스를 다시 시작해주세요.",
+        )
+    return client
+
+
+_retrieval_client: LazyResource[RetrievalClient] = LazyResource(
+    "retrieval_service", _connect_retrieval_service
+)
+
+
+def _retrieval_service(use_service: bool = True) -> RetrievalClient | None:
+    """
+    SOF_RETRIEVAL_SOCKET 이 지정되어 있으면 검색 서비스 클라이언트, 아니면 None (이 프로세스에서 검색).
+    - use_service=False: 항상 None (검색 서비스 프로세스 자신)
+    """
+    return _retrieval_client.get() if use_service and SOF_RETRIEVAL_SOCKET else None
+
+
+_answer_cache = SemanticAnswerCache(
+    threshold=SOF_ANSWER_CACHE_THRESHOLD,
+    ttl_seconds=SOF_ANSWER_CACHE_TTL,
+    max_entries=SOF_ANSWER_CACHE_MAX_ENTRIES,
+)
+
+# 진행 중인 검색 (키: 정규화한 질문, fusion, alpha)
+_retrieval_flights = SingleFlight(enabled=SOF_SINGLE_FLIGHT)
+# 진행 중인 답변 생성 (키: 정규화한 질문, 답변 캐시 키 = 참고 문서 fingerprint 등)
+_generation_flights = SingleFlight(enabled=SOF_SINGLE_FLIGHT)
+
+
+# 스트리밍 응답의 time-to-first-token (ms), 최근 N건
+_ttft_ms: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
+# QA 프롬프트 참고 문서 토큰 수, 최근 N건
+_context_tokens: deque = deque(maxlen=500)
+
+
+def record_ttft(endpoint: str, ttft_ms: float) -> None:
+    _ttft_ms[endpoint].append(ttft_ms)
+
+
+def _percentile(values, q: float) -> float:
+    return float(np.percentile(np.asarray(values), q)) if values else 0.0
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    검색/답변 캐시 hit/miss 와 스트리밍 TTFT 통계.
+    - 검색 서비스를 쓰면 서비스에 통계를 묻는 동기 호출이 있으므로 이벤트 루프 밖(스레드풀)에서 호출
+    """
+    stats: Dict[str, Any] = {
+        "answer_cache": _answer_cache.stats(),
+        "single_flight": {
+            "retrieval": _retrieval_flights.stats(),
+            "generation": _generation_flights.stats(),
+        },
+    }
+    client = _retrieval_client.peek()
+    if client is not None:
+        try:
+            stats["retrieval_service"] = client.call("stats")
+        except HTTPException as exc:
+            stats["retrieval_service"] = {"error": exc.detail}
+    vs = _vectorstore.peek()
+    if vs is not None:
+        stats["embedding_cache"] = vs.embedding_function.stats()
+        stats["encoder"] = {
+            "model": SOF_EMBED_MODEL,
+            "backend": SOF_EMBED_BACKEND,
+            "dim": vs.index.d,
+        }
+    reranker = _reranker.peek()
+    if reranker is not None:
+        stats["reranker"] = reranker.stats()
+    elif _reranker_error:
+        stats["reranker"] = {"model": SOF_RERANK_MODEL, "error": _reranker_error}
+    if SOF_QUERY_EXPANSION == "llm":
+        stats["query_rewrite_cache"] = _rewrite_cache.stats()
+    store = _chunk_store.peek()
+    if store is not None:
+        stats["dedup"] = {"enabled": SOF_DEDUP, **store.dedup}
+    stats["ttft_ms"] = {
+        endpoint: {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+        }
+        for endpoint, values in list(_ttft_ms.items())
+    }
+    stats["report_summary"] = _summary_cache.stats()
+    stats["context_tokens"] = {
+        "budget": SOF_CONTEXT_TOKEN_BUDGET,
+        "count": len(_context_tokens),
+        "p50": _percentile(_context_tokens, 50),
+        "p95": _percentile(_context_tokens, 95),
+    }
+    return stats
+
+
+def load_docstore_documents() -> List[Any]:
+    """
+    faiss_index/index.pkl 의 LangChain docstore 를 FAISS row 순서의 Document 목록으로 읽음.
+    - pickle 을 역직렬화하므로 오프라인 도구(build_chunk_store, ingest_sof)에서만 사용
+    """
+    with open(os.path.join(FAISS_DIR, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return [
+        docstore.search(index_to_docstore_id[row])
+        for row in range(len(index_to_docstore_id))
+    ]
+
+
+def build_chunk_store(dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> ChunkStore:
+    return ChunkStore.build(
+        load_docstore_documents(),
+        fingerprint=get_index_fingerprint(),
+        dedup_threshold=dedup_threshold,
     )
-    return _vectorstore
 
 
-def get_bm25_retriever() -> BM25Retriever:
-    global _bm25_retriever
-    if _bm25_retriever is not None:
-      return _bm25_retriever
+def _load_chunk_store() -> ChunkStore:
+    """
+    사전 빌드된 청크 저장소를 memmap 으로 로드.
+    - 저장소가 없거나 현재 faiss_index 와 맞지 않으면(stale) 500
+      (워커마다 index.pkl 을 역직렬화해 다시 빌드하지 않도록 폴백 없음)
+    """
+    try:
+        return ChunkStore.load(
+            CHUNK_STORE_DIR, expected_fingerprint=get_index_fingerprint()
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                "chunk_store 를 찾을 수 없습니다. "
+                "python -m BE.tools.build_chunk_store 로 빌드해주세요."
+            ),
+        ) from exc
+    except StaleChunkStoreError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f"저장된 청크 저장소를 사용할 수 없습니다: {exc} "
+                "python -m BE.tools.build_chunk_store 로 다시 빌드해주세요."
+            ),
+        ) from exc
+
 
-    vs = get_vectorstore()
-    all_docs = list(vs.docstore._dict.values())
-    _bm25_retriever = BM25Retriever.from_documents(all_docs, k=50)
-    return _bm25_retriever
+_chunk_store: LazyResource[ChunkStore] = LazyResource("chunk_store", _load_chunk_store)
 
 
-def get_grouped_docs():
-    global _by_year_chapter, _by_chapter
-    if _by_year_chapter is not None and _by_chapter is not None:
-        return _by_year_chapter, _by_chapter
+def get_chunk_store() -> ChunkStore:
+    """FAISS row 번호 = chunk id 로 본문/메타데이터를 조회하는 청크 저장소."""
+    return _chunk_store.get()
 
-    vs = get_vectorstore()
-    all_docs = list(vs.docstore._dict.values())
 
-    by_year_chapter = defaultdict(list)
-    by_chapter = defaultdict(list)
+def build_bm25_index(tokenizer: str = SOF_BM25_TOKENIZER) -> BM25Index:
+    """청크 저장소의 전체 청크로 BM25 인덱스를 만든다 (doc id = FAISS row)."""
+    tokenize = get_tokenizer(tokenizer)
+    tokenized = (tokenize(text) for text in get_chunk_store().texts())
+    return BM25Index.build(
+        tokenized, fingerprint=get_index_fingerprint(), tokenizer=tokenizer
+    )
+
+
+def _load_bm25_index() -> BM25Index:
+    """
+    사전 빌드된 BM25 인덱스(BE/bm25_index, 저장소에 포함)를 memmap 으로 로드.
+    - 인덱스가 없거나 현재 faiss_index / SOF_BM25_TOKENIZER 와 맞지 않으면(stale) 500
+      (워커마다 메모리에서 다시 빌드하지 않도록 폴백 없음)
+    """
+    try:
+        return BM25Index.load(
+            BM25_DIR,
+            expected_fingerprint=get_index_fingerprint(),
+            expected_tokenizer=SOF_BM25_TOKENIZER,
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                "bm25_index 를 찾을 수 없습니다. "
+                "python -m BE.tools.build_bm25_index 로 빌드해주세요."
+            ),
+        ) from exc
+    except StaleBM25IndexError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f"저장된 BM25 인덱스를 사용할 수 없습니다: {exc} "
+                "python -m BE.tools.build_bm25_index 로 다시 빌드해주세요."
+            ),
+        ) from exc
+
 
-    for d in all_docs:
-        year = d.metadata.get("year")
-        chapter = d.metadata.get("chapter")
-        by_year_chapter[(year, chapter)].append(d)
-        by_chapter[chapter].append(d)
+_bm25_index: LazyResource[BM25Index] = LazyResource("bm25_index", _load_bm25_index)
 
-    _by_year_chapter, _by_chapter = by_year_chapter, by_chapter
-    return _by_year_chapter, _by_chapter
 
+def get_bm25_index() -> BM25Index:
+    return _bm25_index.get()
 
-def hybrid_search(
+
+def _build_row_vectors() -> Dict[str, np.ndarray]:
+    """
+    FAISS row 순서의 전체 임베딩 행렬과 제곱 norm (필터/그룹 범위 안에서의 정확한 L2 검색용).
+    - 항상 flat 인덱스의 원래 벡터 (SOF_FAISS_INDEX=ivf_pq 여도 양자화 오차 없음)
+    """
+    index = get_vectorstore().index
+    if not isinstance(index, faiss.IndexFlat):
+        index = load_variant(FAISS_DIR, "flat", expected_fingerprint=get_index_fingerprint())
+    vectors = index.reconstruct_n(0, index.ntotal).astype(np.float32)
+    return {"vectors": vectors, "sq_norms": np.einsum("ij,ij->i", vectors, vectors)}
+
+
+_row_vectors = LazyResource("row_vectors", _build_row_vectors)
+
+
+def _top_k_by_distance(rows: np.ndarray, distances: np.ndarray, k: int, query_sq_norm: float):
+    """rows 중 거리 상위 k개 (IndexFlatL2 와 같은 순서). (rows, L2 거리) 반환."""
+    k = min(k, len(rows))
+    top = np.argpartition(distances, k - 1)[:k]
+    top = top[np.argsort(distances[top], kind="stable")]
+    # 질의 norm 은 순위에 영향이 없어 마지막에만 더해 실제 L2 거리로 맞춤
+    return rows[top], distances[top] + query_sq_norm
+
+
+def _build_doc_groups() -> Dict[Any, Dict[str, np.ndarray]]:
+    """
+    (year, chapter) 그룹별 FAISS row 번호와 임베딩 행렬을 미리 계산.
+    - 그룹 범위 검색은 전체 인덱스 대신 이 작은 행렬들에서만 거리 계산
+    - 벡터는 _row_vectors (flat 인덱스의 원래 벡터) 에서 잘라 씀
+    """
+    row_vectors = _row_vectors.get()
+    store = get_chunk_store()
+    rows_by_group: Dict[Any, List[int]] = defaultdict(list)
+    for row in range(store.n_chunks):
+        rows_by_group[(store.value("year", row), store.value("chapter", row))].append(row)
+
+    groups = {}
+    for key, rows in rows_by_group.items():
+        row_array = np.asarray(rows, dtype=np.int64)
+        groups[key] = {
+            "rows": row_array,
+            "vectors": row_vectors["vectors"][row_array],
+            "sq_norms": row_vectors["sq_norms"][row_array],
+        }
+    return groups
+
+
+_doc_groups = LazyResource("doc_groups", _build_doc_groups)
+
+
+def _select_groups(
+    year_from: int | None = None,
+    year_to: int | None = None,
+    chapter: str | None = None,
+) -> List[Dict[str, np.ndarray]]:
+    if chapter is not None and chapter not in CHAPTER_LABELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chapter 는 {', '.join(CHAPTER_LABELS)} 중 하나여야 합니다.",
+        )
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise HTTPException(status_code=400, detail="year_from 이 year_to 보다 큽니다.")
+
+    selected = []
+    for (year, group_chapter), group in _doc_groups.get().items():
+        if chapter is not None and group_chapter != chapter:
+            continue
+        if year_from is not None and (year is None or year < year_from):
+            continue
+        if year_to is not None and (year is None or year > year_to):
+            continue
+        selected.append(group)
+    return selected
+
+
+def _scoped_semantic(groups, query_vector: np.ndarray, k: int):
+    """선택된 그룹 행렬에서만 L2 거리 계산 (IndexFlatL2 와 같은 순서). (rows, 거리) 반환."""
+    if not groups:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    rows = np.concatenate([g["rows"] for g in groups])
+    distances = np.concatenate(
+        [g["sq_norms"] - 2.0 * (g["vectors"] @ query_vector) for g in groups]
+    )
+    return _top_k_by_distance(rows, distances, k, float(query_vector @ query_vector))
+
+
+def scoped_rows_many(
+    query: str,
+    scopes: List[Dict[str, Any]],
+    semantic_k: int = 30,
+    keyword_k: int = 30,
+    combined_k: int = 12,
+    fusion: str | None = None,
+    alpha: float | None = None,
+    query_vector: np.ndarray | None = None,
+) -> List[np.ndarray]:
+    """
+    scoped_search_many 의 검색 부분을 이 프로세스에서 실행. 범위마다 융합된 chunk rows.
+    - SOF_RETRIEVAL_SOCKET 과 관계없이 검색 서비스를 거치지 않음 (검색 서비스가 요청을 처리할 때 사용)
+    - query_vector: 이미 계산한 질의 벡터 (None 이면 이 프로세스의 인코더로 임베딩)
+    """
+    fusion, alpha = _fusion_params(fusion, alpha)
+    bm25 = get_bm25_index()
+    selected = [
+        _select_groups(s.get("year_from"), s.get("year_to"), s.get("chapter"))
+        for s in scopes
+    ]
+
+    if query_vector is None:
+        query_vector = _embed_queries(get_vectorstore(), [query])[0]
+    query_tokens = get_tokenizer(bm25.tokenizer)(query)
+
+    results = []
+    for groups in selected:
+        semantic = _scoped_semantic(groups, query_vector, semantic_k)
+        allowed = np.zeros(bm25.n_docs, dtype=bool)
+        for g in groups:
+            allowed[g["rows"]] = True
+        keyword_hits = bm25.top_k(query_tokens, keyword_k, allowed=allowed)
+        results.append(_fuse_rows(semantic, keyword_hits, combined_k, fusion, alpha))
+    return results
+
+
+def scoped_search_many(
+    query: str,
+    scopes: List[Dict[str, Any]],
+    semantic_k: int = 30,
+    keyword_k: int = 30,
+    combined_k: int = 12,
+    fusion: str | None = None,
+    alpha: float | None = None,
+) -> List[List[Any]]:
+    """
+    하나의 질의를 여러 (연도 범위, 챕터) 범위에서 각각 검색 (예: 2023 vs 2025 Consumer Shifts).
+    - scope: {"year_from": int | None, "year_to": int | None, "chapter": str | None}
+    - 질의 임베딩은 한 번만 계산하고, 범위마다 해당 그룹의 사전 계산 임베딩 행렬만 검색
+    - BM25 도 범위에 속한 청크만 채점해 hybrid_search 와 같은 방식으로 융합
+    """
+    args = dict(
+        semantic_k=semantic_k,
+        keyword_k=keyword_k,
+        combined_k=combined_k,
+        fusion=fusion,
+        alpha=alpha,
+    )
+    client = _retrieval_service()
+    if client is not None:
+        row_lists = client.call("scoped_search", [query], scopes=scopes, **args)
+    else:
+        row_lists = scoped_rows_many(query, scopes, **args)
+    return [_chunks(rows) for rows in row_lists]
+
+
+def scoped_search(
     query: str,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    chapter: str | None = None,
     semantic_k: int = 30,
     keyword_k: int = 30,
     combined_k: int = 12,
+    fusion: str | None = None,
+    alpha: float | None = None,
+) -> List[Any]:
+    """연도 범위 / 챕터(CHAPTER_LABELS) 그룹 안에서만 하이브리드 검색."""
+    return scoped_search_many(
+        query,
+        [{"year_from": year_from, "year_to": year_to, "chapter": chapter}],
+        semantic_k=semantic_k,
+        keyword_k=keyword_k,
+        combined_k=combined_k,
+        fusion=fusion,
+        alpha=alpha,
+    )[0]
+
+
+def warm_up(use_service: bool = True) -> None:
+    """
+    검색 계층 전체(임베딩 모델, FAISS, 청크 저장소, BM25, 필터/그룹 행렬)를 미리 로드.
+    - 애플리케이션 시작 시 백그라운드 스레드에서 실행 (main.py lifespan)
+    - SOF_RETRIEVAL_SOCKET 이 지정되어 있으면 검색 서비스에 연결만 함 (use_service=False 면 직접 로드)
+    - 첫 forward pass 의 지연 초기화까지 끝내도록 더미 질의를 한 번 인코딩 (캐시는 거치지 않음)
+    """
+    global _warmup_error
+    started = time.perf_counter()
+    try:
+        get_chunk_store()
+        if use_service and SOF_RETRIEVAL_SOCKET:
+            # 임베딩 모델/FAISS/BM25 는 검색 서비스가 로드
+            _retrieval_client.get()
+        else:
+            vs = get_vectorstore()
+            get_bm25_index()
+            _facet_rows.get()
+            _doc_groups.get()  # _row_vectors 포함
+            vs.embedding_function.embeddings.embed_query("warm up")
+        if SOF_RERANK:
+            _reranker.get()  # 로드 실패는 rerank 비활성화로 처리 (warm-up 실패 아님)
+        _token_counter.get()
+        if SOF_QUERY_EXPANSION != "off":
+            _glossary.get()
+    except Exception as exc:
+        _warmup_error = str(getattr(exc, "detail", exc))
+        logger.error("검색 계층 warm-up 실패: %s", _warmup_error, exc_info=True)
+        return
+    _warmup_error = None
+    logger.info("검색 계층 warm-up 완료 (%.1fs)", time.perf_counter() - started)
+
+
+def readiness(use_service: bool = True) -> Dict[str, Any]:
+    """검색 계층 로드 상태. 모든 구성 요소가 로드되어야 ready (use_service 는 warm_up 과 같음)."""
+    if use_service and SOF_RETRIEVAL_SOCKET:
+        resources = (_chunk_store, _retrieval_client)
+    else:
+        resources = (
+            _vectorstore,
+            _chunk_store,
+            _bm25_index,
+            _facet_rows,
+            _row_vectors,
+            _doc_groups,
+        )
+    # rerank 는 선택 기능이므로 readiness 에 포함하지 않음
+    components = {resource.name: resource.loaded for resource in resources}
+    status_ = {"ready": all(components.values()), "components": components}
+    if _warmup_error:
+        status_["error"] = _warmup_error
+    return status_
+
+
+def _embed_queries(vs: FAISS, queries: List[str]) -> np.ndarray:
+    """질의 목록을 한 번의 배치 forward pass 로 임베딩 (임베딩 캐시 경유)."""
+    return np.asarray(
+        vs.embedding_function.embed_documents(queries), dtype=np.float32
+    )
+
+
+def embed_queries(queries: List[str], use_service: bool = True) -> np.ndarray:
+    """
+    질의 벡터 (검색 서비스를 쓰면 서비스의 인코더/임베딩 캐시에서).
+    - use_service=False: 이 프로세스의 인코더로 임베딩
+    """
+    client = _retrieval_service(use_service)
+    if client is not None:
+        return np.asarray(client.call("embed", queries), dtype=np.float32)
+    return _embed_queries(get_vectorstore(), queries)
+
+
+# 필터로 쓰는 청크 메타데이터 필드
+FACETS = ("year", "chapter", "region")
+
+
+def _build_facet_rows() -> Dict[str, Dict[Any, np.ndarray]]:
+    """facet -> 값 -> 해당 청크의 FAISS row 번호 배열 (정렬됨). 청크 저장소의 컬럼으로 계산."""
+    store = get_chunk_store()
+    return {facet: store.rows_by(facet) for facet in FACETS}
+
+
+_facet_rows = LazyResource("facet_rows", _build_facet_rows)
+
+
+def _filtered_rows(
     chapter_filter: str | None = None,
     region_filter: str | None = None,
+    year_filter: int | None = None,
+) -> np.ndarray | None:
+    """필터를 모두 만족하는 FAISS row 번호 배열. 필터가 없으면 None."""
+    active = {
+        facet: value
+        for facet, value in (
+            ("chapter", chapter_filter),
+            ("region", region_filter),
+            ("year", year_filter),
+        )
+        if value
+    }
+    if not active:
+        return None
+
+    facet_rows = _facet_rows.get()
+    rows: np.ndarray | None = None
+    for facet, value in active.items():
+        matched = facet_rows[facet].get(value, np.empty(0, dtype=np.int64))
+        rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+    return rows
+
+
+def _semantic_search_many(
+    vs: FAISS,
+    queries: List[str],
+    k: int,
+    rows: np.ndarray | None = None,
+    vectors: np.ndarray | None = None,
 ):
-    vs = get_vectorstore()
-    bm25 = get_bm25_retriever()
+    """
+    모든 질의를 한 번의 배치 임베딩 + 한 번의 FAISS search 로 검색.
+    - rows 가 주어지면 해당 청크만 검색해 min(k, len(rows)) 개 확보 (후처리 필터링 없음)
+      - flat 인덱스: IDSelector
+      - IVF / HNSW: selector 는 탐색한 리스트/이웃 안에서만 적용되어 k개를 못 채우므로
+        선택된 row 의 원래 벡터(_row_vectors)에서 정확한 L2 검색
+    - vectors 가 주어지면 (검색 서비스가 미리 배치 인코딩한 경우) 다시 인코딩하지 않음
+    - 반환: 질의마다 (chunk rows, L2 거리) 배열
+    """
+    if vectors is None:
+        vectors = _embed_queries(vs, queries)
+    if rows is None:
+        distances, hits = vs.index.search(vectors, k)
+    elif len(rows) == 0:
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        return [empty for _ in queries]
+    elif isinstance(vs.index, faiss.IndexFlat):
+        params = search_params(vs.index, faiss.IDSelectorBatch(rows))
+        distances, hits = vs.index.search(vectors, min(k, len(rows)), params=params)
+    else:
+        row_vectors = _row_vectors.get()
+        distances = row_vectors["sq_norms"][rows] - 2.0 * (vectors @ row_vectors["vectors"][rows].T)
+        return [
+            _top_k_by_distance(rows, d, k, float(q @ q)) for q, d in zip(vectors, distances)
+        ]
+    found = hits != -1
+    return [(h[m], d[m]) for h, d, m in zip(hits, distances, found)]
 
-    semantic_docs = vs.similarity_search(query, k=semantic_k)
-    keyword_docs = bm25.invoke(query)[:keyword_k]
 
-    def make_key(doc):
-        return (
-            doc.metadata.get("source"),
-            doc.metadata.get("page"),
-            doc.page_content,
+def _fusion_params(fusion: str | None, alpha: float | None):
+    fusion = fusion or SOF_FUSION_METHOD
+    alpha = SOF_FUSION_ALPHA if alpha is None else alpha
+    if fusion not in FUSION_METHODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fusion 은 {', '.join(FUSION_METHODS)} 중 하나여야 합니다.",
         )
+    if not 0.0 <= alpha <= 1.0:
+        raise HTTPException(status_code=400, detail="alpha 는 0 이상 1 이하여야 합니다.")
+    return fusion, alpha
 
-    scores: dict = {}
-    n_sem = len(semantic_docs) or 1
-    n_kw = len(keyword_docs) or 1
 
-    for rank, doc in enumerate(semantic_docs):
-        key = make_key(doc)
-        sem_score = (n_sem - rank) / n_sem
-        prev_sem, prev_kw, prev_doc = scores.get(key, (0.0, 0.0, doc))
-        scores[key] = (max(prev_sem, sem_score), prev_kw, doc)
+def _fuse_rows(semantic, keyword_hits, combined_k: int, fusion: str, alpha: float) -> np.ndarray:
+    """
+    FAISS (rows, 거리) + BM25 [(row, score)] 를 청크 ID 기준으로 융합한 상위 chunk rows.
+    - SOF_DEDUP 이면 거의 같은 청크 그룹마다 가장 점수가 높은 청크만 남긴 뒤 combined_k 개
+    """
+    semantic_rows, semantic_distances = semantic
+    keyword_rows = np.fromiter((row for row, _ in keyword_hits), dtype=np.int64)
+    keyword_scores = np.fromiter((score for _, score in keyword_hits), dtype=np.float64)
+    store = get_chunk_store()
+    rows, _ = fuse(
+        semantic_rows,
+        semantic_distances,
+        keyword_rows,
+        keyword_scores,
+        len(semantic_rows) + len(keyword_rows) if SOF_DEDUP else combined_k,
+        method=fusion,
+        alpha=alpha,
+    )
+    if SOF_DEDUP:
+        rows = collapse(rows, store.dup_group, combined_k)
+    return rows
 
-    for rank, doc in enumerate(keyword_docs):
-        key = make_key(doc)
-        kw_score = (n_kw - rank) / n_kw
-        prev_sem, prev_kw, prev_doc = scores.get(key, (0.0, 0.0, doc))
-        scores[key] = (prev_sem, max(prev_kw, kw_score), doc)
 
-    alpha = 0.6
-    scored_docs = []
-    for sem_score, kw_score, doc in scores.values():
-        final_score = alpha * sem_score + (1 - alpha) * kw_score
+def _fuse(semantic, keyword_hits, combined_k: int, fusion: str, alpha: float):
+    """_fuse_rows 결과를 청크 Document 목록으로."""
+    return _chunks(_fuse_rows(semantic, keyword_hits, combined_k, fusion, alpha))
 
-        if chapter_filter and doc.metadata.get("chapter") != chapter_filter:
-            continue
-        if region_filter and doc.metadata.get("region") != region_filter:
-            continue
 
-        scored_docs.append((final_score, doc))
+def _chunks(rows) -> List[Any]:
+    store = get_chunk_store()
+    return [store.chunk(int(row)) for row in rows]
+
 
-    if not scored_docs:
-        scored_docs = [
-            (alpha * ((n_sem - i) / n_sem), d) for i, d in enumerate(semantic_docs)
+def hybrid_rows_many(
+    queries: List[str],
+    semantic_k: int = 30,
+    keyword_k: int = 30,
+    combined_k: int = 12,
+    chapter_filter: str | None = None,
+    region_filter: str | None = None,
+    year_filter: int | None = None,
+    fusion: str | None = None,
+    alpha: float | None = None,
+    vectors: np.ndarray | None = None,
+) -> List[np.ndarray]:
+    """
+    hybrid_search_many 의 검색 부분을 이 프로세스에서 실행. 질의마다 융합된 chunk rows.
+    - SOF_RETRIEVAL_SOCKET 과 관계없이 검색 서비스를 거치지 않음 (검색 서비스가 요청을 처리할 때 사용)
+    - vectors: 이미 계산한 질의 벡터 (None 이면 이 프로세스의 인코더로 임베딩)
+    - 필터가 있으면 필터를 만족하는 청크만, 결과는 min(combined_k, 필터를 만족하는 청크 수)개
+      (SOF_DEDUP 이면 중복 그룹 수 기준, 부족하면 _top_up 으로 채움)
+    """
+    fusion, alpha = _fusion_params(fusion, alpha)
+
+    vs = get_vectorstore()
+    bm25 = get_bm25_index()
+    tokenize = get_tokenizer(bm25.tokenizer)
+
+    rows = _filtered_rows(chapter_filter, region_filter, year_filter)
+    allowed = None
+    if rows is not None:
+        allowed = np.zeros(bm25.n_docs, dtype=bool)
+        allowed[rows] = True
+    if vectors is None:
+        vectors = _embed_queries(vs, queries)
+
+    semantic_results = _semantic_search_many(vs, queries, semantic_k, rows, vectors)
+    keyword_results = bm25.top_k_many(
+        [tokenize(q) for q in queries], keyword_k, allowed=allowed
+    )
+
+    results = [
+        _fuse_rows(semantic, keyword_hits, combined_k, fusion, alpha)
+        for semantic, keyword_hits in zip(semantic_results, keyword_results)
+    ]
+    if rows is not None:
+        results = [
+            _top_up(fused, vs, rows, vector, combined_k)
+            for fused, vector in zip(results, vectors)
         ]
+    return results
 
-    scored_docs.sort(key=lambda x: x[0], reverse=True)
-    return [d for _, d in scored_docs[:combined_k]]
+
+def _top_up(
+    fused: np.ndarray, vs: FAISS, rows: np.ndarray, query_vector: np.ndarray, combined_k: int
+) -> np.ndarray:
+    """
+    필터 검색 결과가 필터를 만족하는 청크로 채울 수 있는 개수보다 적으면
+    (두 검색 결과가 짧거나 SOF_DEDUP 으로 합쳐진 경우) 필터 안의 semantic 순위로 나머지를 채움.
+    """
+    store = get_chunk_store()
+    target = min(combined_k, len(np.unique(store.dup_group[rows])) if SOF_DEDUP else len(rows))
+    if len(fused) >= target:
+        return fused
+
+    ranked, _ = _semantic_search_many(vs, [""], len(rows), rows, query_vector[None, :])[0]
+    seen_rows = set(fused.tolist())
+    seen_groups = set(store.dup_group[fused].tolist()) if SOF_DEDUP else set()
+    extra = []
+    for row in ranked.tolist():
+        if len(fused) + len(extra) >= target:
+            break
+        group = int(store.dup_group[row])
+        if row in seen_rows or (SOF_DEDUP and group in seen_groups):
+            continue
+        extra.append(row)
+        seen_rows.add(row)
+        seen_groups.add(group)
+    logger.warning(
+        "필터 검색 결과가 %d/%d개뿐이라 필터 안의 semantic 순위로 %d개를 채웠습니다.",
+        len(fused), target, len(extra),
+    )
+    return np.concatenate([fused, np.asarray(extra, dtype=np.int64)])
+
+
+def hybrid_search_many(
+    queries: List[str],
+    semantic_k: int = 30,
+    keyword_k: int = 30,
+    combined_k: int = 12,
+    chapter_filter: str | None = None,
+    region_filter: str | None = None,
+    year_filter: int | None = None,
+    fusion: str | None = None,
+    alpha: float | None = None,
+) -> List[List[Any]]:
+    """
+    여러 질의를 한꺼번에 하이브리드 검색 (리포트 생성, 오프라인 평가용).
+    - 질의 임베딩: 한 번의 배치 forward pass
+    - FAISS: 질의 행렬 전체에 대해 한 번의 search
+    - BM25: 질의 사이에 겹치는 term 의 점수 기여분을 공유해 함께 채점
+    - chapter/region/year 필터는 FAISS·BM25 검색 자체에 적용 (필터에 맞는 청크 안에서만 검색)
+    - fusion / alpha: 융합 방식과 semantic 가중치 (None 이면 SOF_FUSION_METHOD / SOF_FUSION_ALPHA)
+    - SOF_RETRIEVAL_SOCKET 이 지정되어 있으면 검색 서비스가 검색하고, 본문은 이 프로세스의 청크 저장소에서 읽음
+    - 반환: 질의 순서대로 hybrid_search 와 같은 형태의 융합 결과 목록
+    """
+    if not queries:
+        return []
+    args = dict(
+        semantic_k=semantic_k,
+        keyword_k=keyword_k,
+        combined_k=combined_k,
+        chapter_filter=chapter_filter,
+        region_filter=region_filter,
+        year_filter=year_filter,
+        fusion=fusion,
+        alpha=alpha,
+    )
+    client = _retrieval_service()
+    if client is not None:
+        row_lists = client.call("search", queries, **args)
+    else:
+        row_lists = hybrid_rows_many(queries, **args)
+    return [_chunks(rows) for rows in row_lists]
+
+
+def hybrid_search(
+    query: str,
+    semantic_k: int = 30,
+    keyword_k: int = 30,
+    combined_k: int = 12,
+    chapter_filter: str | None = None,
+    region_filter: str | None = None,
+    year_filter: int | None = None,
+    fusion: str | None = None,
+    alpha: float | None = None,
+):
+    return hybrid_search_many(
+        [query],
+        semantic_k=semantic_k,
+        keyword_k=keyword_k,
+        combined_k=combined_k,
+        chapter_filter=chapter_filter,
+        region_filter=region_filter,
+        year_filter=year_filter,
+        fusion=fusion,
+        alpha=alpha,
+    )[0]
+
+
+def expanded_search(
+    variants: List[str],
+    semantic_k: int = 30,
+    keyword_k: int = 30,
+    combined_k: int = 12,
+    fusion: str | None = None,
+    alpha: float | None = None,
+) -> List[Any]:
+    """
+    질의 변형(원문 / 영어 번역 / 키워드)을 한 번의 배치 검색으로 찾고, 변형별 결과를 RRF 로 다시 융합.
+    변형이 하나면 hybrid_search 와 같음.
+    """
+    results = hybrid_search_many(
+        variants,
+        semantic_k=semantic_k,
+        keyword_k=keyword_k,
+        combined_k=combined_k,
+        fusion=fusion,
+        alpha=alpha,
+    )
+    if len(results) == 1:
+        return results[0]
+
+    store = get_chunk_store()
+    row_lists = [np.fromiter((d.id for d in docs), dtype=np.int64) for docs in results]
+    rows, _ = fuse_lists(row_lists, sum(len(r) for r in row_lists))
+    if SOF_DEDUP:
+        rows = collapse(rows, store.dup_group, combined_k)
+    return [store.chunk(row) for row in rows[:combined_k]]
+
+
+def _doc_header(d) -> str:
+    src = os.path.basename(d.metadata.get("source", ""))
+    page = d.metadata.get("page", "?")
+    year = d.metadata.get("year", "")
+    chapter = d.metadata.get("chapter", "")
+    region = d.metadata.get("region", "")
+    if region:
+        return f"[{year} / {chapter} / {region} / {src} p.{page}]"
+    return f"[{year} / {chapter} / {src} p.{page}]"
 
 
 def format_docs(docs) -> str:
-    processed = []
-    for d in docs:
-        src = os.path.basename(d.metadata.get("source", ""))
-        page = d.metadata.get("page", "?")
-        year = d.metadata.get("year", "")
-        chapter = d.metadata.get("chapter", "")
-        region = d.metadata.get("region", "")
-        if region:
-            header = f"[{year} / {chapter} / {region} / {src} p.{page}]"
-        else:
-            header = f"[{year} / {chapter} / {src} p.{page}]"
-        processed.append(header + "\n" + d.page_content)
-    return "\n\n".join(processed)
+    return "\n\n".join(_doc_header(d) + "\n" + d.page_content for d in docs)
+
+
+def _load_token_counter():
+    if SOF_CONTEXT_TOKENIZER:
+        try:
+            return HFTokenCounter(SOF_CONTEXT_TOKENIZER)
+        except Exception as exc:
+            logger.warning(
+                "토크나이저 %s 로드 실패, 글자 수 기반 추정 사용: %s",
+                SOF_CONTEXT_TOKENIZER,
+                exc,
+            )
+    return estimate_tokens
+
+
+_token_counter = LazyResource("context_tokenizer", _load_token_counter)
+
+
+def build_context(question: str, docs: List[Any]):
+    """
+    관련도 순 docs 로 SOF_CONTEXT_TOKEN_BUDGET 안의 참고 문서를 구성.
+    - 반환: (참고 문서 문자열, 실제로 들어간 청크 목록, 디버그 정보)
+    """
+    tokenize = get_tokenizer(SOF_BM25_TOKENIZER)
+    trim = SOF_CONTEXT_TRIM_WINDOW >= 0
+    context, packed, info = pack_context(
+        docs,
+        header=_doc_header,
+        count_tokens=_token_counter.get(),
+        token_budget=SOF_CONTEXT_TOKEN_BUDGET,
+        max_chunks=SOF_CONTEXT_MAX_CHUNKS,
+        terms=query_terms(question, tokenize) if trim else (),
+        tokenize=tokenize if trim else None,
+        dedup_threshold=SOF_CONTEXT_DEDUP_THRESHOLD,
+        trim_window=SOF_CONTEXT_TRIM_WINDOW,
+    )
+    _context_tokens.append(info["tokens"])
+    return context, packed, info
 
 
 QA_SYSTEM_PROMPT = (
@@ -235,20 +1187,228 @@ REPORT_SYSTEM_PROMPT = (
 )
 
 
-def answer_question(question: str) -> str:
-    if not question.strip():
-        raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
+_reranker_error: str | None = None
+
+
+def _load_reranker() -> CrossEncoderReranker | None:
+    """cross-encoder 로드. 실패하면 None 을 캐시해 요청마다 다시 로드하지 않음 (프로세스 재시작 전까지 rerank 비활성화)."""
+    global _reranker_error
+    try:
+        return CrossEncoderReranker(SOF_RERANK_MODEL, batch_size=SOF_RERANK_BATCH_SIZE)
+    except Exception as exc:
+        _reranker_error = str(exc)
+        logger.warning("rerank 모델 로드 실패, rerank 없이 진행: %s", exc, exc_info=True)
+        return None
+
+
+_reranker: LazyResource[CrossEncoderReranker | None] = LazyResource("reranker", _load_reranker)
 
-    _ = get_vectorstore()
 
-    docs = hybrid_search(
-        question,
+def rerank(question: str, docs: List[Any]):
+    """
+    융합 결과 상위 SOF_RERANK_TOP_N 개를 cross-encoder 점수 순으로 재정렬.
+    - 예산 안에 일부만 채점했으면 채점한 앞부분만 재정렬하고 나머지는 융합 순서 그대로
+    - 비활성화 / 모델 로드 실패 / 모델 오류 시 융합 순서 그대로
+    - 반환: (문서 목록, 디버그 정보)
+    """
+    candidates = docs[:SOF_RERANK_TOP_N]
+    debug: Dict[str, Any] = {
+        "enabled": SOF_RERANK,
+        "applied": False,
+        "candidates": [
+            {
+                "chunk_id": d.id,
+                "source": os.path.basename(d.metadata.get("source", "")),
+                "page": d.metadata.get("page"),
+                "fusion_rank": rank,
+                "rerank_score": None,
+            }
+            for rank, d in enumerate(candidates)
+        ],
+    }
+    if not SOF_RERANK or len(candidates) < 2:
+        return docs, debug
+
+    reranker = _reranker.get()
+    if reranker is None:
+        debug["fallback"] = "unavailable"
+        return docs, debug
+
+    started = time.perf_counter()
+    try:
+        scores = reranker.score(
+            question, [d.page_content for d in candidates], SOF_RERANK_BUDGET_MS
+        )
+    except Exception as exc:
+        debug["fallback"] = "error"
+        logger.warning("rerank 실패, 융합 순서 사용: %s", exc)
+        return docs, debug
+    finally:
+        debug["elapsed_ms"] = (time.perf_counter() - started) * 1000
+
+    scored = len(scores)
+    debug["scored"] = scored
+    if scored < len(candidates):
+        logger.info(
+            "rerank 시간 예산(%.0fms) 안에 %d/%d개 채점, 나머지는 융합 순서",
+            SOF_RERANK_BUDGET_MS, scored, len(candidates),
+        )
+    if scored < 2:
+        debug["fallback"] = "budget_exceeded"
+        return docs, debug
+
+    order = np.argsort(-scores, kind="stable")
+    for item, score in zip(debug["candidates"], scores.tolist()):
+        item["rerank_score"] = score
+    debug["candidates"] = [debug["candidates"][i] for i in order] + debug["candidates"][scored:]
+    debug["applied"] = True
+    return [candidates[i] for i in order] + docs[scored:], debug
+
+
+_glossary: LazyResource[Glossary] = LazyResource(
+    "glossary", lambda: Glossary.from_file(GLOSSARY_PATH)
+)
+_rewrite_cache = RewriteCache()
+
+QUERY_REWRITE_SYSTEM_PROMPT = (
+    "Rewrite the user's fashion industry question as a short English search query\n"
+    "for McKinsey & BoF 'State of Fashion' reports. Output only the query, on one line."
+)
+
+
+async def _rewrite_and_cache(question: str) -> str | None:
+    messages = [
+        {"role": "system", "content": QUERY_REWRITE_SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+    ]
+    try:
+        rewrite = await _call_ollama_chat(messages, num_predict=48)
+    except HTTPException as exc:
+        logger.warning("질의 재작성 실패: %s", exc.detail)
+        return None
+    rewrite = rewrite.strip().splitlines()[0].strip().strip('"') if rewrite.strip() else ""
+    if not rewrite or has_hangul(rewrite):
+        return None
+    _rewrite_cache.put(question, rewrite)
+    return rewrite
+
+
+async def _llm_rewrite(question: str) -> str | None:
+    """
+    LLM 영어 재작성 (캐시 우선). SOF_QUERY_REWRITE_TIMEOUT_MS 안에 끝나지 않으면 None.
+    - 시간 초과 시에도 호출은 백그라운드에서 끝까지 진행해 캐시를 채움 (같은 질문의 다음 요청부터 사용)
+    """
+    cached = _rewrite_cache.get(question)
+    if cached is not None:
+        return cached
+    task = asyncio.ensure_future(_rewrite_and_cache(question))
+    try:
+        return await asyncio.wait_for(
+            asyncio.shield(task), timeout=SOF_QUERY_REWRITE_TIMEOUT_MS / 1000
+        )
+    except asyncio.TimeoutError:
+        logger.info("질의 재작성 시간 초과 (%.0fms), 용어집 변형만 사용", SOF_QUERY_REWRITE_TIMEOUT_MS)
+        return None
+
+
+async def expand_query(question: str) -> Dict[str, Any]:
+    """
+    검색에 쓸 질의 변형. {"variants": [...], "english": str | None, "terms": [...], "elapsed_ms": float}
+    - 원문이 항상 첫 번째, 한글이 없는 질문은 원문만
+    """
+    started = time.perf_counter()
+    if SOF_QUERY_EXPANSION == "off":
+        expansion: Dict[str, Any] = {"variants": [question], "english": None, "terms": []}
+    else:
+        expansion = _glossary.get().expand(question)
+        if SOF_QUERY_EXPANSION == "llm" and has_hangul(question):
+            rewrite = await _llm_rewrite(question)
+            if rewrite and rewrite not in expansion["variants"]:
+                expansion["variants"].insert(1, rewrite)
+                expansion["english"] = rewrite
+            expansion["llm_rewrite"] = rewrite
+    expansion["elapsed_ms"] = (time.perf_counter() - started) * 1000
+    return expansion
+
+
+def _retrieve_for_question(
+    question: str,
+    fusion: str | None = None,
+    alpha: float | None = None,
+    expansion: Dict[str, Any] | None = None,
+):
+    """
+    검색 + (선택) rerank + 참고 문서 구성 + 답변 캐시 키 계산 (CPU 작업이므로 스레드풀에서 실행).
+    - expansion(expand_query 결과)이 있으면 질의 변형을 함께 검색하고,
+      rerank 와 문장 잘라내기에는 영어 변형도 사용
+    """
+    expansion = expansion or {"variants": [question], "english": None}
+
+    docs = expanded_search(
+        expansion["variants"],
         semantic_k=30,
         keyword_k=30,
         combined_k=12,
+        fusion=fusion,
+        alpha=alpha,
+    )
+    docs, rerank_debug = rerank(expansion["english"] or question, docs)
+    context, packed, context_debug = build_context(" ".join(expansion["variants"]), docs)
+
+    cache_key = (
+        context_fingerprint(d.id for d in packed),
+        SOF_LLM_MODEL,
+        prompt_fingerprint(QA_SYSTEM_PROMPT),
+        get_index_fingerprint(),
+    )
+    question_vector = embed_queries([question])[0]
+    return (
+        context,
+        cache_key,
+        question_vector,
+        {
+            "query_expansion": expansion,
+            "rerank": rerank_debug,
+            "context": context_debug,
+        },
+    )
+
+
+def _question_key(question: str) -> str:
+    return normalize_query(question).casefold()
+
+
+async def _prepare_answer(
+    question: str, fusion: str | None = None, alpha: float | None = None
+):
+    """
+    검색 후 (캐시된 답변, 프롬프트 메시지, 캐시 키, 질문 벡터, 검색 디버그 정보) 반환.
+    - 같은 문맥을 검색한 유사 질문의 답변이 있으면 메시지 대신 캐시된 답변을 반환
+    - 같은 질문(정규화 후)의 검색이 진행 중이면 그 결과를 함께 사용
+    """
+    if not question.strip():
+        raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
+    fusion, alpha = _fusion_params(fusion, alpha)
+
+    return await _retrieval_flights.do(
+        (_question_key(question), fusion, alpha),
+        lambda: _retrieve_and_lookup(question, fusion, alpha),
+    )
+
+
+async def _retrieve_and_lookup(question: str, fusion: str, alpha: float):
+    expansion = await expand_query(question)
+    context, cache_key, question_vector, debug = await run_in_threadpool(
+        _retrieve_for_question, question, fusion, alpha, expansion
     )
 
-    context = format_docs(docs[:8])
+    cached = _answer_cache.lookup(cache_key, question_vector)
+    if cached is not None:
+        answer, age = cached
+        logger.info("시맨틱 답변 캐시 hit (age %.0fs)", age)
+        debug["answer_cache_age_s"] = age
+        return answer, None, cache_key, question_vector, debug
+
     messages = [
         {
             "role": "system",
@@ -259,29 +1419,177 @@ def answer_question(question: str) -> str:
             "content": f"질문: {question}\n\n참고 문서:\n{context}",
         },
     ]
-    return _call_ollama_chat(messages)
+    return None, messages, cache_key, question_vector, debug
+
+
+async def answer_question_debug(
+    question: str, fusion: str | None = None, alpha: float | None = None
+):
+    """(답변, 검색 디버그 정보). 디버그 정보에는 rerank 점수 등이 포함됨."""
+    cached, messages, cache_key, question_vector, debug = await _prepare_answer(
+        question, fusion, alpha
+    )
+    if cached is not None:
+        return cached, debug
+
+    async def generate() -> str:
+        answer = await _call_ollama_chat(messages)
+        _answer_cache.store(cache_key, question_vector, answer)
+        return answer
+
+    # 같은 질문이 같은 참고 문서로 생성 중이면 그 답변을 함께 받음
+    answer = await _generation_flights.do(
+        ("chat", _question_key(question), cache_key), generate
+    )
+    return answer, debug
+
+
+async def answer_question(
+    question: str, fusion: str | None = None, alpha: float | None = None
+) -> str:
+    answer, _ = await answer_question_debug(question, fusion, alpha)
+    return answer
+
+
+async def answer_question_stream(
+    question: str, fusion: str | None = None, alpha: float | None = None
+) -> AsyncIterator[str]:
+    """
+    검색까지 마친 뒤 답변 토큰 스트림을 반환.
+    - 검색 단계 오류(빈 질문 등)는 스트림 시작 전에 HTTPException 으로 발생
+    - 스트림이 끝까지 소비되면 전체 답변을 답변 캐시에 저장
+    - 같은 질문이 같은 참고 문서로 스트리밍 중이면 그 생성을 함께 받음 (이미 나온 토큰부터)
+    """
+    cached, messages, cache_key, question_vector, _ = await _prepare_answer(
+        question, fusion, alpha
+    )
+
+    async def generate() -> AsyncIterator[str]:
+        pieces = []
+        async for piece in _stream_ollama_chat(messages):
+            pieces.append(piece)
+            yield piece
+        answer = "".join(pieces).strip()
+        if answer:
+            _answer_cache.store(cache_key, question_vector, answer)
+
+    async def tokens() -> AsyncIterator[str]:
+        if cached is not None:
+            yield cached
+            return
+        async for piece in _generation_flights.stream(
+            ("stream", _question_key(question), cache_key), generate
+        ):
+            yield piece
+
+    return tokens()
+
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a Fashion MD and an AI research assistant\n"
+    "about McKinsey & BoF 'State of Fashion' reports.\n"
+    "기존 요약에 새 대화 내용을 반영해 갱신된 요약만 한국어로 출력합니다.\n"
+    "사용자가 던진 질문과 AI 답변의 핵심 사실(수치, 연도, 브랜드, 트렌드)을 빠짐없이 bullet 로 남기고,\n"
+    "대화에 없는 내용은 추가하지 마세요."
+)
+
+_summary_cache = ConversationSummaryCache(
+    ttl_seconds=SOF_REPORT_SUMMARY_TTL, max_entries=SOF_REPORT_SUMMARY_MAX_ENTRIES
+)
+
+
+async def _fold_turns(summary: str, lines: List[str]) -> str:
+    """기존 누적 요약 + 새로 접히는 턴 -> 갱신된 요약 (LLM 한 번 호출)."""
+    lines = clip_texts(lines, _token_counter.get(), SOF_REPORT_HISTORY_TOKENS)
+    messages = [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"기존 요약:\n{summary or '(없음)'}\n\n"
+                "새 대화:\n" + "\n".join(lines) + "\n\n"
+                "갱신된 요약:"
+            ),
+        },
+    ]
+    return await _call_ollama_chat(messages, num_predict=SOF_REPORT_SUMMARY_TOKENS)
+
 
+async def _summarize_prefix(
+    turns: List[Dict[str, str]], lines: List[str], session_id: str | None
+):
+    """
+    앞쪽 턴들의 누적 요약과 요약된 턴 수.
+    - 가장 긴 캐시된 prefix 요약에서 시작해, 새로 접히는 턴만 SOF_REPORT_SUMMARY_BLOCK 단위로 모아 요약에 반영
+    - 한 번의 요약 호출 입력은 SOF_REPORT_HISTORY_TOKENS 안에서 블록을 최대한 묶음
+    """
+    folded = fold_boundary(len(turns), SOF_REPORT_RECENT_TURNS, SOF_REPORT_SUMMARY_BLOCK)
+    if folded == 0:
+        return "", 0
+    hashes = prefix_hashes(turns, session_id)
+    start, summary = _summary_cache.longest_prefix(hashes, folded)
+
+    count_tokens = _token_counter.get()
+    block = max(1, SOF_REPORT_SUMMARY_BLOCK)
+    while start < folded:
+        end = min(start + block, folded)
+        while end < folded:
+            next_end = min(end + block, folded)
+            if count_tokens("\n".join(lines[start:next_end])) > SOF_REPORT_HISTORY_TOKENS:
+                break
+            end = next_end
+        summary = await _fold_turns(summary, lines[start:end])
+        _summary_cache.store(hashes[end], summary, end - start)
+        start = end
+    return summary, folded
 
-def generate_conversation_report(history: List[Dict[str, str]]) -> str:
+
+async def _conversation_text(
+    history: List[Dict[str, str]], session_id: str | None = None
+) -> str:
+    """
+    리포트 프롬프트에 넣을 대화 로그.
+    - SOF_REPORT_HISTORY_TOKENS 안이면 전체 대화 원문
+    - 넘으면 [이전 대화 요약] + [최근 대화] 원문, 그래도 넘으면 긴 턴부터 잘라 상한에 맞춤
+    """
+    turns = [msg for msg in history if msg.get("content")]
+    lines = [format_turn(msg) for msg in turns]
+    conversation_text = "\n".join(lines)
+    if SOF_REPORT_HISTORY_TOKENS <= 0:
+        return conversation_text
+
+    count_tokens = _token_counter.get()
+    if count_tokens(conversation_text) <= SOF_REPORT_HISTORY_TOKENS:
+        return conversation_text
+
+    summary, folded = await _summarize_prefix(turns, lines, session_id)
+    headers = "[이전 대화 요약]\n\n[최근 대화]\n" if summary else ""
+    parts = ([summary] if summary else []) + lines[folded:]
+    parts = clip_texts(
+        parts,
+        count_tokens,
+        SOF_REPORT_HISTORY_TOKENS - count_tokens(headers) - len(parts),
+    )
+    if not summary:
+        return "\n".join(parts)
+    return f"[이전 대화 요약]\n{parts[0]}\n\n[최근 대화]\n" + "\n".join(parts[1:])
+
+
+async def _report_messages(
+    history: List[Dict[str, str]], session_id: str | None = None
+) -> List[Dict[str, str]]:
     if not history:
         raise HTTPException(
             status_code=400, detail="리포트를 생성할 대화 내용이 없습니다."
         )
 
-    lines = []
-    for msg in history:
-        role = msg.get("role")
-        content = msg.get("content", "")
-        if not content:
-            continue
-        role_label = "사용자" if role == "user" else "AI"
-        lines.append(f"{role_label}: {content}")
+    conversation_text = await _conversation_text(history, session_id)
 
-    conversation_text = "\n".join(lines)
-
-    _ = get_vectorstore()
+    if not SOF_RETRIEVAL_SOCKET:
+        # 검색 서비스를 쓰는 워커는 임베딩 모델/FAISS 를 로드하지 않음
+        _ = await run_in_threadpool(get_vectorstore)
 
-    messages = [
+    return [
         {
             "role": "system",
             "content": REPORT_SYSTEM_PROMPT,
@@ -305,4 +1613,17 @@ def generate_conversation_report(history: List[Dict[str, str]]) -> str:
         },
     ]
 
-    return _call_ollama_chat(messages)
+
+async def generate_conversation_report(
+    history: List[Dict[str, str]], session_id: str | None = None
+) -> str:
+    messages = await _report_messages(history, session_id)
+    return await _call_ollama_chat(messages)
+
+
+async def generate_conversation_report_stream(
+    history: List[Dict[str, str]], session_id: str | None = None
+) -> AsyncIterator[str]:
+    """리포트 토큰 스트림 반환 (입력 오류, 대화 요약 갱신은 스트림 시작 전에 처리)."""
+    messages = await _report_messages(history, session_id)
+    return _stream_ollama_chat(messages)
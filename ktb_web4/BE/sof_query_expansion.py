@@ -0,0 +1,125 @@
+"""
+검색 전 질의 확장 (한국어 질문 -> 영어 코퍼스 검색용 변형).
+
+- SoF 코퍼스는 영어인데 질문은 대부분 한국어라, all-MiniLM 임베딩과 BM25 모두 언어가 달라 매칭이 약함
+- 로컬 용어집(BE/sof_glossary.json, 패션/리테일 용어 -> 리포트 영어 표현)으로 두 가지 변형을 만듦
+  - english : 질문 어순대로 용어를 대표 번역으로 바꾸고, 용어집에 없는 한글 어절은 버림 (영문/숫자는 유지)
+  - keywords: 매칭된 용어의 동의어까지 모두 나열 (BM25 용)
+- 한글이 없는 질문은 확장하지 않음
+- (선택) LLM 재작성 결과는 호출 측(sof_langchain)에서 변형 목록에 추가하고, 여기의 LRU 캐시에 저장
+"""
+
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+_LATIN_WORD_RE = re.compile(r"[0-9A-Za-z][0-9A-Za-z&+\-']*")
+
+
+def has_hangul(text: str) -> bool:
+    return bool(_HANGUL_RE.search(text))
+
+
+def _term_pattern(term: str) -> str:
+    # 띄어쓰기 유무 모두 매칭 ("가격 인상" / "가격인상"), 영문 용어는 단어 경계에서만 ("ai" vs "chain")
+    pattern = r"\s*".join(re.escape(part) for part in term.split())
+    if re.search(r"[0-9a-z]", term):
+        pattern = rf"(?<![0-9a-z]){pattern}(?![0-9a-z])"
+    return pattern
+
+
+class Glossary:
+    def __init__(self, terms: Dict[str, List[str]]):
+        self.terms = {
+            unicodedata.normalize("NFKC", key).lower(): values
+            for key, values in terms.items()
+            if values
+        }
+        # 긴 용어 우선 ("생성형 ai" 가 "ai" 보다 먼저 매칭)
+        keys = sorted(self.terms, key=len, reverse=True)
+        self._pattern = re.compile("|".join(f"({_term_pattern(k)})" for k in keys))
+        self._keys = keys
+
+    @classmethod
+    def from_file(cls, path: str) -> "Glossary":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["terms"])
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def expand(self, question: str) -> Dict[str, Any]:
+        """
+        {"variants": [원문, english, keywords ...], "english": str | None, "terms": [매칭된 용어]}
+        - variants 는 중복/빈 문자열 제외, 원문이 항상 첫 번째
+        """
+        result: Dict[str, Any] = {"variants": [question], "english": None, "terms": []}
+        if not has_hangul(question):
+            return result
+
+        text = unicodedata.normalize("NFKC", question).lower()
+        english: List[str] = []
+        keywords: List[str] = []
+        pos = 0
+        for match in self._pattern.finditer(text):
+            english.extend(_LATIN_WORD_RE.findall(text[pos : match.start()]))
+            key = self._keys[match.lastindex - 1]
+            result["terms"].append(key)
+            english.append(self.terms[key][0])
+            keywords.extend(self.terms[key])
+            pos = match.end()
+        english.extend(_LATIN_WORD_RE.findall(text[pos:]))
+        if not result["terms"]:
+            return result
+
+        # 영문/숫자(연도, 브랜드명 등)는 키워드 변형에도 포함
+        keywords.extend(w for w in english if w not in keywords and _LATIN_WORD_RE.fullmatch(w))
+        english_query = " ".join(dict.fromkeys(english))
+        keyword_query = " ".join(dict.fromkeys(keywords))
+        result["english"] = english_query
+        for variant in (english_query, keyword_query):
+            if variant and variant not in result["variants"]:
+                result["variants"].append(variant)
+        return result
+
+
+class RewriteCache:
+    """질문 -> LLM 재작성 결과 LRU."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question: str) -> str | None:
+        with self._lock:
+            rewrite = self._entries.get(question)
+            if rewrite is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(question)
+            self.hits += 1
+            return rewrite
+
+    def put(self, question: str, rewrite: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[question] = rewrite
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,75 @@
+"""
+hybrid_search 결과 재정렬(rerank)용 CPU cross-encoder.
+
+- (질문, 청크 본문) 쌍을 배치로 채점해 관련도 순으로 다시 정렬
+- 시간 예산(ms)을 두고 배치마다 경과 시간을 확인해, 다음 배치가 예산을 넘길 것 같으면 채점을 중단
+  - 그때까지 채점한 앞부분 점수를 반환 (호출 측은 그 부분만 재정렬하고 나머지는 융합 순서 유지)
+  - 배치 하나는 중간에 끊을 수 없으므로 배치가 작을수록 예산을 정확히 지킴 (첫 배치는 항상 채점)
+- 통계: 호출 수, 예산 때문에 일부만 채점한 수, 채점 시간 p50/p95
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 4,
+        max_length: int = 512,
+    ):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+
+        self._lock = threading.Lock()
+        self._elapsed_ms: deque = deque(maxlen=500)
+        self.calls = 0
+        self.budget_exceeded = 0
+
+    def score(self, query: str, texts: List[str], budget_ms: float) -> np.ndarray:
+        """
+        texts 앞부분부터 관련도 점수 (클수록 관련).
+        - 예산 안에 다 채점하지 못하면 len(texts) 보다 짧은 배열 (앞에서부터 채점한 만큼)
+        """
+        started = time.perf_counter()
+        scores: List[np.ndarray] = []
+        for i in range(0, len(texts), self.batch_size):
+            if scores:
+                # 지금까지의 배치 평균으로 다음 배치까지 마칠 시간을 추정
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if elapsed_ms + elapsed_ms / len(scores) > budget_ms:
+                    break
+            pairs = [(query, text) for text in texts[i : i + self.batch_size]]
+            scores.append(
+                np.asarray(
+                    self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False),
+                    dtype=np.float32,
+                ).reshape(-1)
+            )
+        result = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+
+        with self._lock:
+            self.calls += 1
+            if len(result) < len(texts):
+                self.budget_exceeded += 1
+            self._elapsed_ms.append((time.perf_counter() - started) * 1000)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            values = np.asarray(self._elapsed_ms) if self._elapsed_ms else None
+            return {
+                "model": self.model_name,
+                "calls": self.calls,
+                "budget_exceeded": self.budget_exceeded,
+                "p50_ms": float(np.percentile(values, 50)) if values is not None else 0.0,
+                "p95_ms": float(np.percentile(values, 95)) if values is not None else 0.0,
+            }
@@ -0,0 +1,282 @@
+"""
+검색 전용 프로세스 (retrieval service) 와 웹 워커용 클라이언트.
+
+- `uvicorn --workers N` 으로 띄우면 워커마다 임베딩 모델, FAISS 인덱스, BM25, 그룹 행렬을 따로 로드함
+  -> 로컬 프로세스 하나(python -m BE.tools.serve_retrieval)가 이를 소유하고, 워커는 Unix socket 으로 요청
+- 워커는 검색 결과로 chunk id(FAISS row)만 받아 자신의 청크 저장소(memmap, OS 페이지 캐시를 공유)에서 본문을 읽음
+- 프로토콜: 4바이트 big-endian 길이 + UTF-8 JSON. 연결마다 요청/응답을 순서대로 주고받음
+  - 요청: {"op": ..., "queries": [...], "args": {...}}
+  - 응답: {"result": ...} 또는 {"error": {"status": int, "detail": str}} (HTTPException 으로 다시 발생)
+- 서버는 여러 연결에서 동시에 들어온 요청을 모아(최대 max_wait_ms 대기, 앞 배치를 처리하는 동안 쌓인 요청 포함)
+  모든 질의를 한 번의 인코더 배치로 임베딩한 뒤, 요청마다 그 벡터로 op 핸들러를 실행
+  - 인코딩/검색은 전용 스레드 하나에서 순서대로 실행
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+_SERVICE_UNAVAILABLE_DETAIL = (
+    "검색 서비스에 연결할 수 없습니다. python -m BE.tools.serve_retrieval 가 실행 중인지 확인해주세요."
+)
+
+
+def _encode_message(payload: Dict[str, Any]) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise ConnectionError("검색 서비스가 연결을 닫았습니다.")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+async def _read_message(reader: asyncio.StreamReader) -> Dict[str, Any] | None:
+    try:
+        (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    except asyncio.IncompleteReadError:
+        return None
+    if size > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"메시지가 너무 큽니다: {size} bytes")
+    return json.loads(await reader.readexactly(size))
+
+
+class RetrievalClient:
+    """
+    웹 워커 쪽 동기 클라이언트 (스레드풀에서 호출).
+    - 스레드마다 연결 하나를 유지하고, 서비스가 재시작되어 연결이 끊겼으면 한 번 다시 연결해 재시도
+    - 연결 실패/시간 초과는 503 HTTPException
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, op: str, queries: List[str] | None = None, **args: Any) -> Any:
+        message = _encode_message({"op": op, "queries": list(queries or []), "args": args})
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(message)
+                (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+                response = json.loads(_recv_exact(sock, size))
+                break
+            except socket.timeout as exc:
+                # 응답이 늦게 도착해 다음 요청과 섞이지 않도록 연결을 버림
+                self._close()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="검색 서비스 응답 시간이 초과되었습니다.",
+                ) from exc
+            except (ConnectionError, OSError) as exc:
+                self._close()
+                if attempt == 0 and isinstance(exc, ConnectionError):
+                    continue
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=_SERVICE_UNAVAILABLE_DETAIL,
+                ) from exc
+
+        error = response.get("error")
+        if error:
+            raise HTTPException(status_code=error["status"], detail=error["detail"])
+        return response["result"]
+
+
+class RetrievalServer:
+    """
+    - encode(queries) -> (len(queries), dim) 질의 벡터 (임베딩 캐시 경유)
+    - handlers[op](queries, vectors, **args) -> JSON 으로 보낼 결과
+    - "embed" (질의 벡터), "info", "stats" op 는 기본 제공
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        encode: Callable[[List[str]], np.ndarray],
+        handlers: Dict[str, Callable[..., Any]],
+        info: Callable[[], Dict[str, Any]] | None = None,
+        extra_stats: Callable[[], Dict[str, Any]] | None = None,
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        self.socket_path = socket_path
+        self.encode = encode
+        self.handlers = handlers
+        self.info = info or dict
+        self.extra_stats = extra_stats or dict
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrieval")
+        self._queue: asyncio.Queue | None = None
+
+        self.batches = 0
+        self.requests = 0
+        self.queries = 0
+        self.encoded_queries = 0
+        self.largest_batch = 0
+        self._batch_ms: deque = deque(maxlen=500)
+
+    async def serve_forever(self) -> None:
+        self._queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info("검색 서비스 시작: %s", self.socket_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await _read_message(reader)
+                if request is None:
+                    break
+                writer.write(_encode_message(await self._dispatch(request)))
+                await writer.drain()
+        except (ConnectionError, json.JSONDecodeError) as exc:
+            logger.warning("검색 서비스 연결 종료: %s", exc)
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "info":
+            return {"result": self.info()}
+        if op == "stats":
+            return {"result": {**self.stats(), **self.extra_stats()}}
+        if op != "embed" and op not in self.handlers:
+            return {"error": {"status": 400, "detail": f"알 수 없는 검색 서비스 요청입니다: {op}"}}
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            responses = await loop.run_in_executor(
+                self._executor, self._run_batch, [request for request, _ in batch]
+            )
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def _run_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """모든 요청의 질의를 한 번에 인코딩한 뒤 요청별 핸들러 실행 (전용 스레드)."""
+        started = time.perf_counter()
+        queries = list(dict.fromkeys(q for r in requests for q in r.get("queries", [])))
+        position = {q: i for i, q in enumerate(queries)}
+        try:
+            vectors = self.encode(queries) if queries else np.empty((0, 0), dtype=np.float32)
+        except Exception as exc:
+            return [self._error(exc)] * len(requests)
+
+        responses = []
+        for request in requests:
+            request_queries = request.get("queries", [])
+            request_vectors = vectors[[position[q] for q in request_queries]]
+            try:
+                if request["op"] == "embed":
+                    result = request_vectors.tolist()
+                else:
+                    result = self.handlers[request["op"]](
+                        request_queries, request_vectors, **request.get("args", {})
+                    )
+                responses.append({"result": result})
+            except Exception as exc:
+                responses.append(self._error(exc))
+
+        self.batches += 1
+        self.requests += len(requests)
+        self.queries += sum(len(r.get("queries", [])) for r in requests)
+        self.encoded_queries += len(queries)
+        self.largest_batch = max(self.largest_batch, len(requests))
+        self._batch_ms.append((time.perf_counter() - started) * 1000)
+        return responses
+
+    @staticmethod
+    def _error(exc: Exception) -> Dict[str, Any]:
+        if isinstance(exc, HTTPException):
+            return {"error": {"status": exc.status_code, "detail": exc.detail}}
+        logger.error("검색 서비스 요청 처리 실패: %s", exc, exc_info=exc)
+        return {"error": {"status": 500, "detail": "검색 서비스 처리 중 오류가 발생했습니다."}}
+
+    def stats(self) -> Dict[str, Any]:
+        values = np.asarray(self._batch_ms) if self._batch_ms else None
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "queries": self.queries,
+            "encoded_queries": self.encoded_queries,
+            "avg_batch_requests": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "batch_ms_p50": float(np.percentile(values, 50)) if values is not None else 0.0,
+            "batch_ms_p95": float(np.percentile(values, 95)) if values is not None else 0.0,
+        }
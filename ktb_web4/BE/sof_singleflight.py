@@ -0,0 +1,120 @@
+"""
+동시에 들어온 같은 요청 합치기 (single-flight).
+
+- 같은 key 로 진행 중인 작업이 있으면 새로 시작하지 않고 그 작업의 결과(또는 예외)를 함께 받음
+- 작업은 호출자와 분리된 Task 로 실행
+  - 기다리던 호출 하나가 취소(클라이언트 연결 끊김)되어도 나머지는 계속 결과를 받음
+  - 기다리는 호출이 모두 떠나면 작업도 취소 (Ollama 생성 중단)
+- 작업이 끝나면 key 를 지움 (끝난 결과의 재사용은 답변 캐시가 담당)
+- stream(): 원본 스트림을 한 번만 소비하고, 나중에 합류한 호출자는 이미 나온 조각부터 다시 받음
+- 워커(이벤트 루프) 단위
+"""
+
+import asyncio
+import functools
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.task: asyncio.Future | None = None
+        self.waiters = 0
+        # stream() 으로 지금까지 나온 조각
+        self.items: List[Any] = []
+        self.changed = asyncio.get_running_loop().create_future()
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.get_running_loop().create_future()
+        changed.set_result(None)
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+
+        self.started = 0  # 실제로 실행한 작업 수
+        self.joined = 0  # 진행 중인 작업에 합류한 호출 수
+        self.cancelled = 0  # 기다리는 호출이 모두 떠나 취소한 작업 수
+
+    def _join(self, key: Hashable, start: Callable[[_Call], Awaitable[Any]]) -> _Call:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call()
+            call.task = asyncio.ensure_future(start(call))
+            call.task.add_done_callback(functools.partial(self._finished, key, call))
+            self._calls[key] = call
+            self.started += 1
+        else:
+            self.joined += 1
+        call.waiters += 1
+        return call
+
+    def _leave(self, key: Hashable, call: _Call) -> None:
+        call.waiters -= 1
+        if call.waiters == 0 and not call.task.done():
+            # 취소가 끝나기 전에 들어온 같은 요청은 새 작업을 시작하도록 바로 지움
+            self._forget(key, call)
+            call.task.cancel()
+            self.cancelled += 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Hashable, call: _Call, task: asyncio.Future) -> None:
+        self._forget(key, call)
+        call.notify()
+        if not task.cancelled():
+            task.exception()  # 받을 호출자가 없어도 "exception was never retrieved" 경고가 남지 않도록
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """key 로 진행 중인 factory() 결과를 공유."""
+        if not self.enabled:
+            return await factory()
+        call = self._join(key, lambda _call: factory())
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            self._leave(key, call)
+
+    async def stream(
+        self, key: Hashable, factory: Callable[[], AsyncIterator[T]]
+    ) -> AsyncIterator[T]:
+        """key 로 진행 중인 factory() 스트림을 공유. 처음 반복할 때 합류."""
+        if not self.enabled:
+            async for item in factory():
+                yield item
+            return
+
+        call = self._join(key, lambda call: self._pump(call, factory()))
+        try:
+            position = 0
+            while True:
+                while position < len(call.items):
+                    yield call.items[position]
+                    position += 1
+                if call.task.done():
+                    break
+                # 이 호출자가 취소되어도 공유 future 는 취소되지 않도록 wait 사용
+                await asyncio.wait({call.changed})
+            call.task.result()  # 원본 스트림의 예외를 다시 발생
+        finally:
+            self._leave(key, call)
+
+    @staticmethod
+    async def _pump(call: _Call, source: AsyncIterator[Any]) -> None:
+        async for item in source:
+            call.items.append(item)
+            call.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "started": self.started,
+            "joined": self.joined,
+            "cancelled": self.cancelled,
+            "in_flight": len(self._calls),
+        }
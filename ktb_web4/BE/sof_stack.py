@@ -0,0 +1,54 @@
+"""
+채팅/리포트 검색 스택(BE.sof_langchain) 지연 import.
+
+- BE.sof_langchain 은 langchain, faiss, numpy (SOF_EMBED_BACKEND=torch 면 모델 로드 시 torch) 를 import 해
+  import 만으로 수백 ms 와 수십 MB 가 듦
+- 게시판/로그인 요청만 처리하는 워커는 채팅 기능을 처음 쓰거나 warm-up 할 때까지 import 하지 않음
+  (SOF_WARMUP=1 이 아니면 첫 /chat_report 요청 때 import, /chat_report/stats 는 import 하지 않음)
+- 라우트 핸들러는 load_sof() 로 스레드풀에서 import 해 이벤트 루프를 막지 않음
+- 회귀 검사: python -m BE.tools.check_import_time
+"""
+
+import importlib
+import logging
+from typing import Any, Dict
+
+from fastapi.concurrency import run_in_threadpool
+
+from BE.lazy_resource import LazyResource
+
+logger = logging.getLogger(__name__)
+
+sof_stack = LazyResource("sof_langchain", lambda: importlib.import_module("BE.sof_langchain"))
+
+_import_error: str | None = None
+
+
+async def load_sof() -> Any:
+    """BE.sof_langchain 모듈 (처음 호출 시 스레드풀에서 import)."""
+    if sof_stack.loaded:
+        return sof_stack.peek()
+    return await run_in_threadpool(sof_stack.get)
+
+
+def warm_up() -> None:
+    """스택 import 후 검색 계층 warm-up (main.py lifespan 의 백그라운드 스레드에서 실행)."""
+    global _import_error
+    try:
+        sof = sof_stack.get()
+    except Exception as exc:
+        _import_error = str(exc)
+        logger.error("검색 스택 import 실패: %s", _import_error, exc_info=True)
+        return
+    _import_error = None
+    sof.warm_up()
+
+
+def readiness() -> Dict[str, Any]:
+    """검색 계층 로드 상태. 스택을 아직 import 하지 않았으면 import 하지 않고 not ready."""
+    if not sof_stack.loaded:
+        status_: Dict[str, Any] = {"ready": False, "components": {sof_stack.name: False}}
+        if _import_error:
+            status_["error"] = _import_error
+        return status_
+    return sof_stack.peek().readiness()
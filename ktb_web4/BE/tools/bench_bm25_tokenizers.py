@@ -0,0 +1,101 @@
+"""
+BM25 토크나이저 벤치마크.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.bench_bm25_tokenizers [--k 10] [--samples 200] [--queries eval.jsonl]
+
+토크나이저(BE.sof_bm25.TOKENIZERS)별로 다음을 출력:
+- 인덱스 크기 (어휘 수, postings 수, 저장 시 디스크 크기)
+- 빌드 시간 (토크나이즈 + 통계 계산)
+- recall@k
+  - 기본: 청크 본문에서 뽑은 연속 단어 구간을 사용자가 입력하듯 소문자/구두점 제거해
+    쿼리로 쓰고, 원래 청크를 찾는지 (known-item)
+  - --queries: {"query": "...", "rows": [FAISS row, ...]} 형식 JSONL 평가셋 (한국어 질문 평가용)
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+from typing import List, Tuple
+
+from BE.sof_bm25 import TOKENIZERS, BM25Index
+from BE.sof_langchain import get_chunk_store
+
+
+def _known_item_queries(texts: List[str], samples: int, seed: int = 0):
+    rng = random.Random(seed)
+    candidates = [row for row, t in enumerate(texts) if len(t.split()) >= 12]
+    queries: List[Tuple[str, List[int]]] = []
+    for row in rng.sample(candidates, min(samples, len(candidates))):
+        words = texts[row].split()
+        start = rng.randrange(0, len(words) - 6)
+        query = re.sub(r"[^\w\s]", " ", " ".join(words[start : start + 6])).lower()
+        queries.append((query, [row]))
+    return queries
+
+
+def _load_queries(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [
+            (item["query"], item["rows"])
+            for item in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--queries", help="JSONL 평가셋 경로")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    texts = list(get_chunk_store().texts())
+    queries = (
+        _load_queries(args.queries)
+        if args.queries
+        else _known_item_queries(texts, args.samples)
+    )
+
+    logging.info(
+        "%-12s %10s %10s %10s %9s %10s",
+        "tokenizer", "vocab", "postings", "disk(KB)", "build(s)", f"recall@{args.k}",
+    )
+    for name, tokenize in TOKENIZERS.items():
+        started = time.perf_counter()
+        index = BM25Index.build(
+            (tokenize(t) for t in texts), fingerprint="bench", tokenizer=name
+        )
+        build_s = time.perf_counter() - started
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index.save(tmp)
+            disk_kb = _dir_size(tmp) / 1024
+
+        hits = 0
+        for query, rows in queries:
+            found = {doc for doc, _ in index.top_k(tokenize(query), args.k)}
+            hits += bool(found.intersection(rows))
+
+        logging.info(
+            "%-12s %10d %10d %10.0f %9.2f %10.3f",
+            name,
+            len(index.vocab),
+            len(index.postings_doc),
+            disk_kb,
+            build_s,
+            hits / len(queries),
+        )
+
+
+if __name__ == "__main__":
+    main()
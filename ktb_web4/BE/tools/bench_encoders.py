@@ -0,0 +1,163 @@
+"""
+질의 임베딩 백엔드 비교 (SOF_EMBED_BACKEND).
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.bench_encoders [--backends torch,onnx,onnx_int8] [--model ...] [--k 10] [--repeat 5]
+                                      [--threads 0] [--queries eval.jsonl]
+
+백엔드마다 별도 프로세스에서 모델을 로드해 다음을 출력:
+- load(s)      : 모델 로드 시간
+- RSS(MB)      : 로드 + 질의 인코딩 후 프로세스 resident memory (괄호 안은 모델 로드로 늘어난 양)
+- peak(MB)     : 최대 RSS (VmHWM)
+- p50 / p95    : 질의 1건 인코딩 지연 (ms, 임베딩 캐시 없이)
+- batch        : 질의 전체를 한 번에 인코딩할 때 질의당 지연 (ms)
+- dim          : 임베딩 차원 (faiss_index 차원과 다르면 표시)
+- cos / top-k  : 첫 번째 백엔드(기준) 대비 질의 벡터 코사인 평균, faiss_index 검색 top-k 겹침 비율
+- 질의: eval_query_expansion 의 한국어/영어 질문 쌍, --queries 면 {"query": ...} JSONL
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure(
+    backend: str, model: str, onnx_file: str, threads: int, queries: List[str], repeat: int
+) -> Dict[str, Any]:
+    """별도 프로세스에서 백엔드를 로드해 메모리/지연/질의 벡터를 측정."""
+    from BE.sof_encoders import load_encoder
+
+    before = _status_mb("VmRSS")
+    started = time.perf_counter()
+    encoder = load_encoder(backend, model, onnx_file=onnx_file, threads=threads)
+    encoder.embed_query("warm up")
+    load_s = time.perf_counter() - started
+    loaded = _status_mb("VmRSS")
+
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            encoder.embed_query(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    vectors = np.asarray(encoder.embed_documents(queries), dtype=np.float32)
+    batch_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    return {
+        "load_s": load_s,
+        "load_mb": loaded - before,
+        "rss_mb": _status_mb("VmRSS"),
+        "peak_mb": _status_mb("VmHWM"),
+        "latencies_ms": latencies,
+        "batch_ms": batch_ms,
+        "vectors": vectors,
+    }
+
+
+def _queries(path: str | None) -> List[str]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line)["query"] for line in f if line.strip()]
+
+    from BE.tools.eval_query_expansion import QUERY_PAIRS
+
+    return [q for pair in QUERY_PAIRS for q in pair]
+
+
+def main() -> None:
+    from BE.sof_encoders import ENCODER_BACKENDS
+    from BE.sof_langchain import (
+        FAISS_DIR,
+        SOF_EMBED_MODEL,
+        SOF_EMBED_ONNX_FILE,
+        SOF_EMBED_THREADS,
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default=",".join(ENCODER_BACKENDS))
+    parser.add_argument("--model", default=SOF_EMBED_MODEL)
+    parser.add_argument("--onnx-file", default=SOF_EMBED_ONNX_FILE)
+    parser.add_argument("--threads", type=int, default=SOF_EMBED_THREADS)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--queries", help="JSONL 질의 세트 경로")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    import faiss
+
+    queries = _queries(args.queries)
+    index = faiss.read_index(os.path.join(FAISS_DIR, "index.faiss"))
+    ctx = multiprocessing.get_context("spawn")
+
+    results = {}
+    for backend in args.backends.split(","):
+        try:
+            with ctx.Pool(1) as pool:
+                results[backend] = pool.apply(
+                    _measure,
+                    (backend, args.model, args.onnx_file, args.threads, queries, args.repeat),
+                )
+        except Exception as exc:
+            logging.info("%-10s 로드 실패: %s", backend, exc)
+
+    if not results:
+        return
+    reference_backend, reference = next(iter(results.items()))
+    reference_hits = None
+    if reference["vectors"].shape[1] == index.d:
+        _, reference_hits = index.search(reference["vectors"], args.k)
+
+    logging.info("모델 %s, 질의 %d개, 기준 백엔드 %s", args.model, len(queries), reference_backend)
+    logging.info(
+        "%-10s %8s %14s %9s %8s %8s %8s %6s %6s %6s",
+        "backend", "load(s)", "RSS(MB)", "peak(MB)", "p50(ms)", "p95(ms)", "batch", "dim", "cos",
+        f"top{args.k}",
+    )
+    for backend, result in results.items():
+        vectors = result["vectors"]
+        dim = vectors.shape[1]
+        cos = overlap = float("nan")
+        if dim == reference["vectors"].shape[1]:
+            a = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            b = reference["vectors"] / np.linalg.norm(reference["vectors"], axis=1, keepdims=True)
+            cos = float(np.mean(np.sum(a * b, axis=1)))
+        if reference_hits is not None and dim == index.d:
+            _, hits = index.search(vectors, args.k)
+            overlap = float(
+                np.mean([len(np.intersect1d(h, r)) / args.k for h, r in zip(hits, reference_hits)])
+            )
+        logging.info(
+            "%-10s %8.2f %14s %9.0f %8.2f %8.2f %8.2f %6s %6.3f %6.3f",
+            backend,
+            result["load_s"],
+            "%.0f (+%.0f)" % (result["rss_mb"], result["load_mb"]),
+            result["peak_mb"],
+            np.percentile(result["latencies_ms"], 50),
+            np.percentile(result["latencies_ms"], 95),
+            result["batch_ms"],
+            str(dim) if dim == index.d else f"{dim}!",
+            cos,
+            overlap,
+        )
+    if any(r["vectors"].shape[1] != index.d for r in results.values()):
+        logging.info("'!': faiss_index 차원(%d)과 다름 (이 모델로 다시 수집해야 사용 가능)", index.d)
+
+
+if __name__ == "__main__":
+    main()
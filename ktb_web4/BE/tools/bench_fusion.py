@@ -0,0 +1,120 @@
+"""
+하이브리드 검색 융합 단계 마이크로벤치마크.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.bench_fusion [--repeat 200] [--k 30] [--combined-k 12]
+
+- FAISS / BM25 검색은 미리 해 두고 융합 단계만 반복 측정 (쿼리당 평균 µs)
+  - before: 기존 hybrid_search 방식 (semantic/keyword 문서 전부를 꺼낸 뒤
+    (source, page, page_content) 키 dict 로 순위 선형 융합)
+  - after : 정수 chunk ID + NumPy 융합 후 상위 combined_k 문서만 꺼냄 (method 별)
+- "linear" 결과가 기존 방식과 같은 순서인지도 확인 (불일치가 있으면 종료 코드 1)
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from BE.sof_bm25 import get_tokenizer
+from BE.sof_fusion import FUSION_METHODS
+from BE.sof_langchain import (
+    _fuse,
+    _semantic_search_many,
+    get_bm25_index,
+    get_chunk_store,
+    get_vectorstore,
+)
+from BE.tools.check_bm25_regression import REGRESSION_QUERIES
+
+
+def _legacy_fuse(store, semantic, keyword_hits, combined_k: int, alpha: float = 0.6):
+    """기존 _fuse (문서 텍스트를 키로 쓰는 dict 기반, 순위 선형 점수)."""
+    semantic_docs = [store.chunk(row) for row in semantic[0]]
+    keyword_docs = [store.chunk(row) for row, _ in keyword_hits]
+
+    def make_key(doc):
+        return (
+            doc.metadata.get("source"),
+            doc.metadata.get("page"),
+            doc.page_content,
+        )
+
+    scores: dict = {}
+    n_sem = len(semantic_docs) or 1
+    n_kw = len(keyword_docs) or 1
+
+    for rank, doc in enumerate(semantic_docs):
+        key = make_key(doc)
+        sem_score = (n_sem - rank) / n_sem
+        prev_sem, prev_kw, prev_doc = scores.get(key, (0.0, 0.0, doc))
+        scores[key] = (max(prev_sem, sem_score), prev_kw, doc)
+
+    for rank, doc in enumerate(keyword_docs):
+        key = make_key(doc)
+        kw_score = (n_kw - rank) / n_kw
+        prev_sem, prev_kw, prev_doc = scores.get(key, (0.0, 0.0, doc))
+        scores[key] = (prev_sem, max(prev_kw, kw_score), doc)
+
+    scored_docs = [
+        (alpha * sem_score + (1 - alpha) * kw_score, doc)
+        for sem_score, kw_score, doc in scores.values()
+    ]
+    scored_docs.sort(key=lambda x: x[0], reverse=True)
+    return [d for _, d in scored_docs[:combined_k]]
+
+
+def _bench(fn, inputs, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for semantic, keyword_hits in inputs:
+            fn(semantic, keyword_hits)
+    return (time.perf_counter() - started) / (repeat * len(inputs)) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--k", type=int, default=30, help="semantic_k / keyword_k")
+    parser.add_argument("--combined-k", type=int, default=12)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    vs = get_vectorstore()
+    store = get_chunk_store()
+    bm25 = get_bm25_index()
+    tokenize = get_tokenizer(bm25.tokenizer)
+    queries = list(REGRESSION_QUERIES)
+    semantic = _semantic_search_many(vs, queries, args.k)
+    keyword = bm25.top_k_many([tokenize(q) for q in queries], args.k)
+    inputs = list(zip(semantic, keyword))
+
+    mismatches = 0
+    for query, (sem, kw) in zip(queries, inputs):
+        before = [d.id for d in _legacy_fuse(store, sem, kw, args.combined_k)]
+        after = [d.id for d in _fuse(sem, kw, args.combined_k, "linear", 0.6)]
+        if before != after:
+            mismatches += 1
+            logging.info("[불일치] %s\n  before: %s\n  after : %s", query, before, after)
+
+    logging.info("%-16s %12s", "fusion", "µs/query")
+    before_us = _bench(
+        lambda s, k: _legacy_fuse(store, s, k, args.combined_k), inputs, args.repeat
+    )
+    logging.info("%-16s %12.1f", "before (dict)", before_us)
+    for method in FUSION_METHODS:
+        after_us = _bench(
+            lambda s, k: _fuse(s, k, args.combined_k, method, 0.6),
+            inputs,
+            args.repeat,
+        )
+        logging.info(
+            "%-16s %12.1f  (x%.1f)", f"after ({method})", after_us, before_us / after_us
+        )
+
+    logging.info("linear 순서 불일치: %d / %d 쿼리", mismatches, len(queries))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+SoF BM25 키워드 인덱스 오프라인 빌드.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.build_bm25_index
+
+- faiss_index/ 의 docstore 청크를 토크나이즈해 BE/bm25_index/ 에 term 통계를 저장
+- faiss_index 를 다시 만들었다면 이 스크립트도 다시 실행해야 함 (fingerprint 불일치 시 서버가 로드를 거부)
+"""
+
+import logging
+import time
+
+from BE.sof_langchain import BM25_DIR, build_bm25_index
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    started = time.perf_counter()
+    index = build_bm25_index()
+    index.save(BM25_DIR)
+    elapsed = time.perf_counter() - started
+
+    logging.info(
+        "BM25 인덱스 저장 완료: %s (문서 %d개, 어휘 %d개, postings %d개, %.1fs)",
+        BM25_DIR,
+        index.n_docs,
+        len(index.vocab),
+        len(index.postings_doc),
+        elapsed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+SoF 청크 저장소 오프라인 빌드.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.build_chunk_store [--dedup-threshold 0.6]
+
+- faiss_index/index.pkl 의 docstore 청크를 FAISS row 순서대로 BE/chunk_store/ 에 저장
+  (UTF-8 본문 blob + offsets + source/page/year/chapter/region 컬럼)
+- 거의 같은 청크 그룹(MinHash 추정 Jaccard >= --dedup-threshold)을 함께 계산하고 중복 통계를 출력
+- 서버는 이 저장소만 memmap 으로 열고 index.pkl 은 역직렬화하지 않음
+- faiss_index 를 다시 만들었다면 이 스크립트도 다시 실행해야 함 (fingerprint 불일치 시 서버가 로드를 거부)
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from BE.sof_dedup import DEFAULT_DEDUP_THRESHOLD
+from BE.sof_langchain import CHUNK_STORE_DIR, build_chunk_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_DEDUP_THRESHOLD)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    started = time.perf_counter()
+    store = build_chunk_store(dedup_threshold=args.dedup_threshold)
+    store.save(CHUNK_STORE_DIR)
+    elapsed = time.perf_counter() - started
+
+    logging.info(
+        "청크 저장소 저장 완료: %s (청크 %d개, 본문 %.1fMB, %.1fs)",
+        CHUNK_STORE_DIR,
+        store.n_chunks,
+        store.text_offsets[-1] / 1024 / 1024,
+        elapsed,
+    )
+    logging.info("중복 청크 통계: %s", json.dumps(store.dedup, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
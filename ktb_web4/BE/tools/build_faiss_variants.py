@@ -0,0 +1,67 @@
+"""
+SoF FAISS 인덱스 변형 오프라인 빌드.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.build_faiss_variants [--variants ivf_flat ivf_pq hnsw] [--nlist N] [--pq-m 48] [--hnsw-m 32]
+
+- faiss_index/index.faiss (flat) 의 벡터를 같은 row 순서로 꺼내 IVF-Flat / IVF-PQ / HNSW 인덱스를 빌드
+- faiss_index/index.<variant>.faiss + index.<variant>.json 으로 저장
+- 서버에서는 SOF_FAISS_INDEX=<variant> 로 선택 (평가: python -m BE.tools.eval_faiss_variants)
+- faiss_index 를 다시 만들었다면 이 스크립트도 다시 실행해야 함 (fingerprint 불일치 시 서버가 flat 으로 대체)
+"""
+
+import argparse
+import logging
+import os
+import time
+
+import faiss
+
+from BE.sof_faiss_variants import FAISS_VARIANTS, build_variant, save_variant, variant_path
+from BE.sof_langchain import FAISS_DIR, get_index_fingerprint
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=[v for v in FAISS_VARIANTS if v != "flat"],
+        default=[v for v in FAISS_VARIANTS if v != "flat"],
+    )
+    parser.add_argument("--nlist", type=int, help="IVF 리스트 수 (기본 sqrt(N))")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ 서브양자화기 수 (기본 48)")
+    parser.add_argument("--pq-nbits", type=int, help="IVF-PQ 코드 비트 수 (기본: 코퍼스 크기에 맞춰 최대 8)")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW 이웃 수 (기본 32)")
+    parser.add_argument("--ef-construction", type=int, help="HNSW efConstruction (기본 80)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    flat = faiss.read_index(variant_path(FAISS_DIR, "flat"))
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    fingerprint = get_index_fingerprint()
+    options = {
+        "nlist": args.nlist,
+        "pq_m": args.pq_m,
+        "pq_nbits": args.pq_nbits,
+        "hnsw_m": args.hnsw_m,
+        "ef_construction": args.ef_construction,
+    }
+
+    for variant in args.variants:
+        started = time.perf_counter()
+        index = build_variant(vectors, variant, **options)
+        save_variant(index, FAISS_DIR, variant, fingerprint, options)
+        path = variant_path(FAISS_DIR, variant)
+        logging.info(
+            "%-8s 저장 완료: %s (벡터 %d개, %.1fMB, %.1fs)",
+            variant,
+            path,
+            index.ntotal,
+            os.path.getsize(path) / 1024 / 1024,
+            time.perf_counter() - started,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+BM25 키워드 엔진 회귀 검사.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.check_bm25_regression
+
+- 기존 BM25Retriever 백엔드(rank_bm25.BM25Okapi)와 BM25Index.top_k 의 랭킹을 쿼리 세트로 비교
+- rank_bm25 는 점수 0인 문서로 k개를 채우므로, 점수 > 0 인 구간만 비교
+- 동점 문서끼리의 순서는 정렬 알고리즘에 따라 달라질 수 있어 같은 점수 그룹 단위로 비교
+- 불일치가 있으면 종료 코드 1
+"""
+
+import logging
+import sys
+import time
+from itertools import groupby
+from typing import List, Tuple
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from BE.sof_bm25 import get_tokenizer
+from BE.sof_langchain import build_bm25_index, get_chunk_store
+
+
+REGRESSION_QUERIES = [
+    "2025 공급망 변화",
+    "럭셔리 수요",
+    "supply chain disruption 2025",
+    "luxury demand in China",
+    "generative AI in fashion",
+    "sustainability and circular fashion",
+    "resale second-hand market growth",
+    "Gen Z consumer shifts",
+    "inflation cost of living consumer confidence",
+    "nearshoring sourcing Bangladesh Vietnam",
+    "the of and to",
+    "India market opportunity",
+    "digital marketing social commerce TikTok",
+    "travel retail tourism recovery",
+    "존재하지않는단어",
+]
+
+
+def _tie_groups(ranked: List[Tuple[int, float]]):
+    return [
+        (score, sorted(doc for doc, _ in group))
+        for score, group in groupby(ranked, key=lambda x: x[1])
+    ]
+
+
+def main(k: int = 50) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    index = build_bm25_index()
+    tokenize = get_tokenizer(index.tokenizer)
+    texts = list(get_chunk_store().texts())
+    reference = BM25Okapi([tokenize(t) for t in texts])
+
+    failures = 0
+    ref_elapsed = new_elapsed = 0.0
+    for query in REGRESSION_QUERIES:
+        tokens = tokenize(query)
+
+        started = time.perf_counter()
+        scores = reference.get_scores(tokens)
+        top = np.argsort(scores)[::-1][:k]
+        ref_elapsed += time.perf_counter() - started
+        expected = [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+        started = time.perf_counter()
+        actual = [(d, s) for d, s in index.top_k(tokens, k) if s > 0]
+        new_elapsed += time.perf_counter() - started
+
+        # 마지막 동점 그룹은 k 경계에서 잘린 위치가 다를 수 있으므로 점수만 비교
+        exp_groups, act_groups = _tie_groups(expected), _tie_groups(actual)
+        ok = [s for s, _ in exp_groups] == [s for s, _ in act_groups] and (
+            exp_groups[:-1] == act_groups[:-1]
+        )
+        if not ok:
+            failures += 1
+        logging.info("%s %r (%d건)", "OK  " if ok else "FAIL", query, len(actual))
+
+    n = len(REGRESSION_QUERIES)
+    logging.info(
+        "rank_bm25: %.2f ms/query, BM25Index.top_k: %.2f ms/query, 불일치 %d/%d",
+        ref_elapsed / n * 1000,
+        new_elapsed / n * 1000,
+        failures,
+        n,
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+필터 검색이 FAISS 변형마다 k개를 채우는지 검사.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.check_filtered_search [--k 30] [--combined-k 12] [--queries 20]
+
+- 빌드된 변형(flat, ivf_flat, ivf_pq, hnsw)을 차례로 로드해 (chapter, year) / chapter / year / region 필터마다
+  - semantic 검색 hit 수가 min(k, 필터를 만족하는 청크 수)인지
+  - 하이브리드 융합 결과 수가 min(combined_k, 필터를 만족하는 청크 수)인지
+    (SOF_DEDUP 이면 필터 안의 중복 그룹 수 기준) 확인
+- hit 가 필터를 벗어나도 실패
+- 질의: 청크 벡터 샘플, BM25 질의는 그 청크 본문의 앞 단어들 (임베딩 모델 없이 실행)
+- 하나라도 실패하면 종료 코드 1 (빌드되지 않은 변형은 건너뜀)
+"""
+
+import argparse
+import logging
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from BE.sof_faiss_variants import FAISS_VARIANTS, load_variant
+
+
+def _filters(facet_rows) -> List[Tuple[Dict[str, object], np.ndarray]]:
+    """(필터 kwargs, 필터를 만족하는 rows) 목록."""
+    filters = []
+    for chapter, chapter_rows in facet_rows["chapter"].items():
+        filters.append(({"chapter_filter": chapter}, chapter_rows))
+        for year, year_rows in facet_rows["year"].items():
+            rows = np.intersect1d(chapter_rows, year_rows, assume_unique=True)
+            filters.append(({"chapter_filter": chapter, "year_filter": year}, rows))
+    for year, rows in facet_rows["year"].items():
+        filters.append(({"year_filter": year}, rows))
+    for region, rows in facet_rows["region"].items():
+        filters.append(({"region_filter": region}, rows))
+    return [(kwargs, rows) for kwargs, rows in filters if all(kwargs.values())]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--combined-k", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from BE import sof_langchain as sof
+
+    flat = load_variant(sof.FAISS_DIR, "flat", expected_fingerprint=sof.get_index_fingerprint())
+    rng = np.random.default_rng(0)
+    sample = rng.choice(flat.ntotal, size=min(args.queries, flat.ntotal), replace=False)
+    queries = flat.reconstruct_batch(sample).astype(np.float32)
+    store = sof.get_chunk_store()
+    texts = [" ".join(store.text(int(row)).split()[:8]) for row in sample]
+    filters = _filters(sof._facet_rows.get())
+
+    vs = sof.get_vectorstore()
+    failed = False
+    for variant in FAISS_VARIANTS:
+        try:
+            vs.index = load_variant(
+                sof.FAISS_DIR,
+                variant,
+                expected_fingerprint=sof.get_index_fingerprint(),
+                nprobe=sof.SOF_FAISS_NPROBE,
+                ef_search=sof.SOF_FAISS_EF_SEARCH,
+            )
+        except FileNotFoundError:
+            logging.info("%-8s 빌드되지 않음, 건너뜀", variant)
+            continue
+
+        short = fused_short = outside = 0
+        worst = None
+        for kwargs, rows in filters:
+            semantic = sof._semantic_search_many(
+                vs, texts, args.k, rows=sof._filtered_rows(**kwargs), vectors=queries
+            )
+            fused = sof.hybrid_rows_many(
+                texts, semantic_k=args.k, combined_k=args.combined_k, vectors=queries, **kwargs
+            )
+            expected = min(args.k, len(rows))
+            eligible = len(np.unique(store.dup_group[rows])) if sof.SOF_DEDUP else len(rows)
+            expected_fused = min(args.combined_k, eligible)
+            for (hits, _), fused_rows in zip(semantic, fused):
+                if len(hits) < expected:
+                    short += 1
+                    if worst is None or len(hits) - expected < worst[0]:
+                        worst = (len(hits) - expected, kwargs, len(hits), expected)
+                if len(fused_rows) < expected_fused:
+                    fused_short += 1
+                if not (np.isin(hits, rows).all() and np.isin(fused_rows, rows).all()):
+                    outside += 1
+        ok = short == 0 and fused_short == 0 and outside == 0 and bool(filters)
+        failed |= not ok
+        logging.info(
+            "%s %-8s 필터 %d개 x 질의 %d개: k 미달 %d, combined_k 미달 %d, 필터 위반 %d",
+            "OK  " if ok else "FAIL", variant, len(filters), len(queries), short, fused_short, outside,
+        )
+        if worst is not None:
+            logging.info("     가장 부족한 경우 %s: %d / %d", worst[1], worst[2], worst[3])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
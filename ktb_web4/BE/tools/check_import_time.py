@@ -0,0 +1,108 @@
+"""
+`import main` 의 import 시간/메모리 회귀 검사 (python -X importtime).
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.check_import_time [--max-ms 1500] [--top 15]
+
+- 새 프로세스에서 `python -X importtime -c "import main"` 을 실행해 모듈별 import 시간을 읽음
+- 채팅 검색 스택(BE.sof_langchain, langchain, faiss, numpy, torch 등)이 import 되면 실패
+  (BE/sof_stack.py 를 거쳐 채팅 기능을 처음 쓸 때만 import 되어야 함)
+- `import main` 누적 시간이 --max-ms 를 넘으면 실패
+- import 시간 상위 --top 개 모듈과 import 직후 RSS 출력
+- 하나라도 실패하면 종료 코드 1
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# import main 만으로는 로드되면 안 되는 모듈 (최상위 패키지 기준)
+HEAVY_MODULES = (
+    "BE.sof_langchain",
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_huggingface",
+    "langsmith",
+    "faiss",
+    "numpy",
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "onnxruntime",
+    "tokenizers",
+)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_PROBE = (
+    "import main\n"
+    "with open('/proc/self/status', encoding='utf-8') as f:\n"
+    "    print(next(l.split()[1] for l in f if l.startswith('VmRSS:')))\n"
+)
+
+
+def _profile() -> Tuple[List[Tuple[str, int, int]], float]:
+    """([(모듈, self us, cumulative us)], RSS MB)"""
+    pythonpath = os.pathsep.join(filter(None, [APP_DIR, os.getenv("PYTHONPATH")]))
+    env = dict(os.environ, PYTHONPATH=pythonpath)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():  # 헤더 줄
+            continue
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules, int(result.stdout.split()[-1]) / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-ms", type=float, default=1500, help="import main 누적 시간 상한 (ms)")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    modules, rss_mb = _profile()
+    cumulative: Dict[str, int] = {name: cum for name, _, cum in modules}
+    total_ms = cumulative.get("main", 0) / 1000
+
+    logging.info("%-50s %10s %10s", "module", "self(ms)", "cum(ms)")
+    for name, self_us, cum_us in sorted(modules, key=lambda m: m[2], reverse=True)[: args.top]:
+        logging.info("%-50s %10.1f %10.1f", name, self_us / 1000, cum_us / 1000)
+    logging.info("import main: %.0fms, RSS %.0fMB", total_ms, rss_mb)
+
+    failed = False
+    heavy = sorted(
+        {
+            h
+            for h in HEAVY_MODULES
+            for name in cumulative
+            if name == h or name.startswith(f"{h}.")
+        }
+    )
+    if heavy:
+        logging.error("import main 이 채팅 검색 스택을 import 합니다: %s", ", ".join(heavy))
+        failed = True
+    if total_ms > args.max_ms:
+        logging.error("import main 이 %.0fms 로 상한 %.0fms 를 넘었습니다.", total_ms, args.max_ms)
+        failed = True
+    if not failed:
+        logging.info("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+GET /chat_report/stats 가 느린 검색 서비스를 기다리는 동안 다른 요청이 막히지 않는지 검사.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.check_stats_blocking [--delay 2.0] [--max-ms 500]
+
+- "stats" 응답을 --delay 초 늦게 보내는 가짜 검색 서비스를 Unix socket 으로 띄우고 SOF_RETRIEVAL_SOCKET 으로 연결
+- /chat_report/stats 요청이 서비스 응답을 기다리는 동안 GET /ready 를 보내 지연을 측정
+- /ready 가 --max-ms 안에 응답하지 않으면(이벤트 루프가 막힘) 종료 코드 1
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SOF_WARMUP", "0")
+
+from BE.sof_retrieval_service import _HEADER, _encode_message, _recv_exact
+
+
+def _serve(path: str, fingerprint: str, delay: float, stats_requested: threading.Event) -> None:
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+
+    def handle(conn: socket.socket) -> None:
+        with conn:
+            while True:
+                try:
+                    (size,) = _HEADER.unpack(_recv_exact(conn, _HEADER.size))
+                    request = json.loads(_recv_exact(conn, size))
+                except ConnectionError:
+                    return
+                if request["op"] == "stats":
+                    stats_requested.set()
+                    time.sleep(delay)
+                    result = {"batches": 0}
+                else:
+                    result = {"index_fingerprint": fingerprint}
+                conn.sendall(_encode_message({"result": result}))
+
+    while True:
+        conn, _ = server.accept()
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--delay", type=float, default=2.0, help="가짜 검색 서비스의 stats 응답 지연 (초)")
+    parser.add_argument("--max-ms", type=float, default=500, help="/ready 응답 지연 상한 (ms)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+    from BE.sof_stack import sof_stack
+
+    sof = sof_stack.get()
+
+    path = os.path.join(tempfile.mkdtemp(), "retrieval.sock")
+    stats_requested = threading.Event()
+    threading.Thread(
+        target=_serve,
+        args=(path, sof.get_index_fingerprint(), args.delay, stats_requested),
+        daemon=True,
+    ).start()
+    while not os.path.exists(path):
+        time.sleep(0.01)
+    sof.SOF_RETRIEVAL_SOCKET = path
+    sof.SOF_RETRIEVAL_TIMEOUT = args.delay * 5
+    sof._retrieval_client.get()  # 검색 서비스 연결 (info)
+
+    with TestClient(app_main.app) as client:
+        slow = threading.Thread(target=client.get, args=("/chat_report/stats",))
+        slow.start()
+        stats_requested.wait(timeout=args.delay * 5)
+        started = time.perf_counter()
+        response = client.get("/ready")
+        ready_ms = (time.perf_counter() - started) * 1000
+        slow.join()
+
+    logging.info(
+        "stats 응답 %.1fs 지연 중 GET /ready: %d, %.0fms", args.delay, response.status_code, ready_ms
+    )
+    if ready_ms > args.max_ms:
+        logging.error("/chat_report/stats 가 이벤트 루프를 막습니다 (상한 %.0fms).", args.max_ms)
+        return 1
+    logging.info("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
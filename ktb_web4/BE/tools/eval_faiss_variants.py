@@ -0,0 +1,118 @@
+"""
+SoF FAISS 인덱스 변형 평가 (flat 대비).
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.eval_faiss_variants [--k 30] [--samples 500] [--nprobe 8] [--ef-search 64] [--embed]
+
+빌드된 변형(flat, ivf_flat, ivf_pq, hnsw)마다 다음을 출력:
+- recall@k : flat(정확한 L2 검색) top-k 중 변형 인덱스 top-k 에 포함된 비율
+- p50 / p99 : 질의 1건 search 지연 (ms)
+- RSS      : 인덱스 로드로 늘어난 resident memory (MB, 변형마다 별도 프로세스에서 측정)
+- 질의: 기본은 청크 벡터 샘플, --embed 면 회귀 질의 세트를 임베딩 모델로 인코딩해 사용
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict
+
+import faiss
+import numpy as np
+
+from BE.sof_faiss_variants import FAISS_VARIANTS, configure, variant_path
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure(
+    path: str, queries: np.ndarray, k: int, nprobe: int, ef_search: int
+) -> Dict[str, Any]:
+    """별도 프로세스에서 인덱스를 로드해 메모리/지연/결과를 측정."""
+    faiss.omp_set_num_threads(1)
+    before = _rss_mb()
+    index = configure(faiss.read_index(path), nprobe, ef_search)
+    rss = _rss_mb() - before
+
+    hits = np.empty((len(queries), k), dtype=np.int64)
+    latencies = []
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        _, hits[i] = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"rss_mb": rss, "latencies_ms": latencies, "hits": hits}
+
+
+def _queries(args) -> np.ndarray:
+    if args.embed:
+        from BE.sof_langchain import embed_queries
+        from BE.tools.check_bm25_regression import REGRESSION_QUERIES
+
+        return embed_queries(REGRESSION_QUERIES, use_service=False)
+
+    from BE.sof_langchain import FAISS_DIR
+
+    flat = faiss.read_index(variant_path(FAISS_DIR, "flat"))
+    rng = np.random.default_rng(0)
+    rows = rng.choice(flat.ntotal, size=min(args.samples, flat.ntotal), replace=False)
+    return np.vstack([flat.reconstruct(int(r)) for r in rows])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--embed", action="store_true", help="회귀 질의 세트를 임베딩해 질의로 사용")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from BE.sof_langchain import FAISS_DIR
+
+    queries = _queries(args)
+    ctx = multiprocessing.get_context("spawn")
+
+    results = {}
+    for variant in FAISS_VARIANTS:
+        path = variant_path(FAISS_DIR, variant)
+        if not os.path.exists(path):
+            logging.info("%-8s 인덱스 없음 (python -m BE.tools.build_faiss_variants)", variant)
+            continue
+        with ctx.Pool(1) as pool:
+            results[variant] = pool.apply(
+                _measure, (path, queries, args.k, args.nprobe, args.ef_search)
+            )
+
+    exact = results["flat"]["hits"]
+    logging.info(
+        "%-8s %10s %9s %9s %9s %9s  (질의 %d개)",
+        "index", f"recall@{args.k}", "p50(ms)", "p99(ms)", "RSS(MB)", "disk(MB)", len(queries),
+    )
+    for variant, result in results.items():
+        recall = np.mean(
+            [
+                len(np.intersect1d(found[found != -1], truth)) / len(truth)
+                for found, truth in zip(result["hits"], exact)
+            ]
+        )
+        logging.info(
+            "%-8s %10.3f %9.3f %9.3f %9.1f %9.1f",
+            variant,
+            recall,
+            np.percentile(result["latencies_ms"], 50),
+            np.percentile(result["latencies_ms"], 99),
+            result["rss_mb"],
+            os.path.getsize(variant_path(FAISS_DIR, variant)) / 1024 / 1024,
+        )
+
+
+if __name__ == "__main__":
+    main()
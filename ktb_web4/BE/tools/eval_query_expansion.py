@@ -0,0 +1,134 @@
+"""
+질의 확장(한국어 질문 -> 영어 변형) 전후 검색 recall 과 추가 지연 측정.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.eval_query_expansion [--k 12] [--repeat 5] [--queries eval.jsonl] [--llm]
+
+- 기본 평가셋: 한국어 질문과 같은 뜻의 영어 질문 쌍. 영어 질문의 hybrid_search 상위 k개를 정답으로 보고
+  한국어 질문 검색 결과가 이를 얼마나 찾는지 (recall@k) 비교
+  - raw      : 한국어 원문만 검색 (기존 방식)
+  - glossary : 원문 + 용어집 번역/키워드 변형을 배치 검색 후 RRF 융합
+  - llm      : glossary + LLM 영어 재작성 (--llm, Ollama 필요)
+- --queries: {"query": "...", "rows": [FAISS row, ...]} 형식 JSONL 평가셋 (bench_bm25_tokenizers 와 같은 형식)
+- 지연 p50/p95 (ms)
+  - expand: 질의 확장 단계
+  - encode: 변형 전체를 임베딩 모델로 한 번에 인코딩 (캐시 미사용)
+  - total : 확장 + 배치 검색 + 융합 (두 번째 실행부터라 질의 임베딩 캐시 hit 기준)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import BE.sof_langchain as sof
+from BE.sof_langchain import expand_query, expanded_search, hybrid_search
+
+# (한국어 질문, 같은 뜻의 영어 질문)
+QUERY_PAIRS = [
+    ("2025년 공급망 변화는?", "supply chain shifts in 2025"),
+    ("중국 명품 수요 둔화", "luxury demand slowdown in China"),
+    ("Z세대의 리세일 시장 성장 전망은?", "Gen Z resale market growth outlook"),
+    ("생성형 AI가 패션 업계에 미치는 영향", "impact of generative AI on the fashion industry"),
+    ("니어쇼어링과 방글라데시 소싱 리스크", "nearshoring and Bangladesh sourcing risks"),
+    ("지속가능성 규제와 그린워싱", "sustainability regulation and greenwashing"),
+    ("인플레이션이 소비 심리에 미친 영향", "impact of inflation on consumer confidence"),
+    ("틱톡 소셜 커머스 마케팅 전략", "TikTok social commerce marketing strategy"),
+    ("여행 리테일과 면세 회복", "travel retail and duty-free recovery"),
+    ("인도 시장 기회", "India market opportunity"),
+    ("스포츠웨어와 아웃도어 트렌드", "sportswear and outdoor trends"),
+    ("순환 경제와 재활용 기술", "circular economy and recycling technology"),
+    ("백화점과 도매 채널 변화", "department stores and wholesale channel shifts"),
+    ("듀프 소비와 가성비 트렌드", "dupes and value-seeking consumers"),
+    ("코로나 이후 매출 회복", "revenue recovery after Covid-19"),
+]
+
+
+def _load_queries(path: str) -> List[Tuple[str, List[int]]]:
+    with open(path, encoding="utf-8") as f:
+        return [
+            (item["query"], item["rows"])
+            for item in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+def _recall(found: List[int], relevant: List[int]) -> float:
+    return len(set(found) & set(relevant)) / len(relevant) if relevant else 0.0
+
+
+def _run(mode: str, question: str, k: int) -> Tuple[List[int], float, float, float]:
+    """(찾은 rows, 확장 단계 ms, 인코딩 ms, 전체 ms)"""
+    sof.SOF_QUERY_EXPANSION = mode
+    started = time.perf_counter()
+    expansion = asyncio.run(expand_query(question))
+    expand_ms = (time.perf_counter() - started) * 1000
+    docs = expanded_search(expansion["variants"], combined_k=k)
+    total_ms = (time.perf_counter() - started) * 1000
+
+    encoder = sof.get_vectorstore().embedding_function.embeddings
+    started = time.perf_counter()
+    encoder.embed_documents(expansion["variants"])
+    encode_ms = (time.perf_counter() - started) * 1000
+    return [d.id for d in docs], expand_ms, encode_ms, total_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5, help="지연 측정 반복 횟수")
+    parser.add_argument("--queries", help="JSONL 평가셋 경로")
+    parser.add_argument("--llm", action="store_true", help="LLM 재작성 모드도 평가")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    sof.warm_up()
+    if args.queries:
+        queries = _load_queries(args.queries)
+    else:
+        queries = [
+            (ko, [d.id for d in hybrid_search(en, combined_k=args.k)])
+            for ko, en in QUERY_PAIRS
+        ]
+
+    modes = ["off", "glossary"] + (["llm"] if args.llm else [])
+    results: Dict[str, Dict[str, List[float]]] = {
+        mode: {"recall": [], "expand_ms": [], "encode_ms": [], "total_ms": []}
+        for mode in modes
+    }
+    for question, relevant in queries:
+        for mode in modes:
+            # 첫 실행(임베딩 캐시/LLM 재작성 캐시 채우기)은 recall 만, 지연은 반복 실행으로 측정
+            found, _, _, _ = _run(mode, question, args.k)
+            results[mode]["recall"].append(_recall(found, relevant))
+            for _ in range(args.repeat):
+                _, expand_ms, encode_ms, total_ms = _run(mode, question, args.k)
+                results[mode]["expand_ms"].append(expand_ms)
+                results[mode]["encode_ms"].append(encode_ms)
+                results[mode]["total_ms"].append(total_ms)
+
+    columns = ("expand_ms", "encode_ms", "total_ms")
+    logging.info(
+        "%-10s %10s " + " ".join(["%20s"] * len(columns)),
+        "mode",
+        f"recall@{args.k}",
+        *(f"{c[:-3]} p50/p95(ms)" for c in columns),
+    )
+    for mode, values in results.items():
+        logging.info(
+            "%-10s %10.3f " + " ".join(["%20s"] * len(columns)),
+            "raw" if mode == "off" else mode,
+            float(np.mean(values["recall"])),
+            *(
+                "%.2f / %.2f"
+                % (np.percentile(values[c], 50), np.percentile(values[c], 95))
+                for c in columns
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
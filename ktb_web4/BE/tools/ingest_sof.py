@@ -0,0 +1,260 @@
+"""
+SoF 코퍼스 수집 및 증분 재인덱싱.
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.ingest_sof [--manifest BE/sof_sources.json] [--base-dir .] [--workers 4]
+                                  [--full] [--adopt-existing] [--dry-run]
+
+- 소스 목록(BE/sof_sources.json)의 PDF 를 읽어 청크로 나누고, year/chapter/region/source/page metadata 를 붙여
+  임베딩한 뒤 faiss_index/ (index.faiss + index.pkl), chunk_store/, bm25_index/ 를 다시 씀
+  (이미 빌드해 둔 FAISS 변형 인덱스도 같은 옵션으로 다시 빌드)
+- 증분 처리: PDF 내용 해시 + 소스 목록 항목이 그대로인 소스는 기존 벡터/청크를 재사용하고,
+  새로 추가되었거나 바뀐 소스만 다시 임베딩 (예: sof26.pdf 추가 시 2026 리포트만 임베딩)
+  - 재사용한 소스의 청크는 기존 순서대로 앞쪽에 두고, 새로 임베딩한 청크는 뒤에 붙임
+  - 청크 id(FAISS row)는 실행마다 이 순서로 다시 매김 (고정 id 아님):
+    바뀌었거나 빠진 소스보다 뒤에 있던 청크는 row 가 앞으로 당겨짐
+    (faiss_index fingerprint 가 바뀌므로 row 를 쓰는 청크 저장소/BM25/변형 인덱스는 여기서 함께 다시 쓰고,
+    답변 캐시와 검색 서비스는 fingerprint 로 이전 row 를 무효화)
+  - 소스 목록에서 빠진 소스의 청크는 제거
+  - PDF 파일이 없는 소스는 기존 청크가 있으면 유지
+- --full: 모든 소스를 다시 임베딩
+- --adopt-existing: 수집 기록이 없는 기존 인덱스(최초 배포본)의 소스를 현재 PDF 로 만든 것으로 보고
+  다시 임베딩하지 않고 해시만 기록
+- 임베딩 모델/청크 설정이 바뀌면 기존 벡터를 재사용하지 않음
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+
+from BE.sof_bm25 import BM25Index, faiss_fingerprint, get_tokenizer
+from BE.sof_chunk_store import ChunkStore
+from BE.sof_faiss_variants import FAISS_VARIANTS, build_variant, save_variant, saved_options
+from BE.sof_ingest import (
+    embed_texts,
+    file_sha256,
+    load_and_split,
+    load_manifest,
+    load_state,
+    pipeline_config,
+    save_state,
+    source_signature,
+)
+from BE.sof_langchain import (
+    BASE_DIR,
+    BM25_DIR,
+    CHUNK_STORE_DIR,
+    FAISS_DIR,
+    SOF_BM25_TOKENIZER,
+    SOF_EMBED_MODEL,
+    load_docstore_documents,
+)
+
+
+def _load_existing():
+    """현재 faiss_index 의 (Document 목록, 벡터 행렬). 인덱스가 없으면 빈 값."""
+    if not os.path.exists(os.path.join(FAISS_DIR, "index.faiss")):
+        return [], None
+    index = faiss.read_index(os.path.join(FAISS_DIR, "index.faiss"))
+    return load_docstore_documents(), index.reconstruct_n(0, index.ntotal)
+
+
+def _write_faiss(docs: List[Any], vectors: np.ndarray) -> None:
+    """
+    index.faiss + index.pkl 을 임시 파일에 쓴 뒤 교체.
+    - index.pkl 은 LangChain FAISS.save_local 과 같은 (docstore, index_to_docstore_id) 형식
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    for doc in docs:
+        doc.id = doc.id or str(uuid.uuid4())
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    docstore = InMemoryDocstore({doc.id: doc for doc in docs})
+    index_to_docstore_id = {row: doc.id for row, doc in enumerate(docs)}
+
+    os.makedirs(FAISS_DIR, exist_ok=True)
+    faiss_path = os.path.join(FAISS_DIR, "index.faiss")
+    pkl_path = os.path.join(FAISS_DIR, "index.pkl")
+    faiss.write_index(index, f"{faiss_path}.tmp")
+    with open(f"{pkl_path}.tmp", "wb") as f:
+        pickle.dump((docstore, index_to_docstore_id), f)
+    os.replace(f"{faiss_path}.tmp", faiss_path)
+    os.replace(f"{pkl_path}.tmp", pkl_path)
+
+
+def _save_sources(
+    config: Dict[str, Any],
+    keep: Dict[str, Dict[str, Any]],
+    embed: List[Dict[str, Any]],
+    n_chunks: Dict[str, int],
+) -> None:
+    sources = {source: dict(info) for source, info in keep.items()}
+    for entry in embed:
+        sources[entry["source"]] = {
+            "signature": entry["signature"],
+            "sha256": entry["sha256"],
+        }
+    for source, info in sources.items():
+        info["n_chunks"] = n_chunks.get(source, 0)
+    save_state(FAISS_DIR, {"config": config, "sources": sources})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--manifest", default=os.path.join(BASE_DIR, "sof_sources.json"))
+    parser.add_argument("--base-dir", default=".", help="소스 목록의 source 경로 기준 디렉토리")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--full", action="store_true", help="모든 소스 다시 임베딩")
+    parser.add_argument("--adopt-existing", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="계획만 출력")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    started = time.perf_counter()
+    manifest = load_manifest(args.manifest)
+    config = pipeline_config(SOF_EMBED_MODEL)
+    state = load_state(FAISS_DIR)
+    # 수집 기록이 없으면(최초 배포본) 같은 모델로 만든 인덱스로 간주
+    reusable = not args.full and (state is None or state.get("config") == config)
+    recorded = state.get("sources", {}) if state and reusable else {}
+
+    existing_docs, existing_vectors = _load_existing()
+    rows_by_source: Dict[str, List[int]] = defaultdict(list)
+    for row, doc in enumerate(existing_docs):
+        rows_by_source[doc.metadata.get("source")].append(row)
+
+    keep: Dict[str, Dict[str, Any]] = {}
+    embed: List[Dict[str, Any]] = []
+    for entry in manifest:
+        source = entry["source"]
+        path = os.path.join(args.base_dir, source)
+        in_index = reusable and source in rows_by_source
+        if not os.path.exists(path):
+            if not in_index:
+                logging.error("PDF 를 찾을 수 없습니다: %s", path)
+                return 1
+            logging.warning("PDF 가 없어 기존 청크를 유지합니다: %s", path)
+            keep[source] = recorded.get(source, {"signature": None, "sha256": None})
+            continue
+
+        sha256 = file_sha256(path)
+        signature = source_signature(entry, sha256)
+        unchanged = recorded.get(source, {}).get("signature") == signature
+        adopted = args.adopt_existing and source not in recorded
+        if in_index and (unchanged or adopted):
+            keep[source] = {"signature": signature, "sha256": sha256}
+        else:
+            embed.append({**entry, "path": path, "signature": signature, "sha256": sha256})
+
+    removed = [s for s in rows_by_source if s not in {e["source"] for e in manifest}]
+    logging.info(
+        "유지 %d개 / 임베딩 %d개 / 제거 %d개 소스",
+        len(keep),
+        len(embed),
+        len(removed),
+    )
+    for entry in embed:
+        logging.info("  + %s", entry["source"])
+    for source in removed:
+        logging.info("  - %s", source)
+    if args.dry_run:
+        return 0
+
+    n_chunks = {s: len(rows) for s, rows in rows_by_source.items()}
+    if not embed and not removed:
+        # 인덱스는 그대로, 해시 기록만 갱신 (--adopt-existing 등)
+        _save_sources(config, keep, [], n_chunks)
+        logging.info("변경된 소스가 없습니다.")
+        return 0
+
+    # 재사용하는 소스는 기존 순서 그대로, 새로 임베딩한 소스는 그 뒤에 (row 번호는 이 순서로 다시 매김)
+    kept_rows = [
+        row
+        for source, rows in rows_by_source.items()
+        if source in keep
+        for row in rows
+    ]
+    docs = [existing_docs[row] for row in kept_rows]
+    vector_parts = [existing_vectors[kept_rows]] if kept_rows else []
+
+    new_docs = []
+    for entry in embed:
+        chunks = load_and_split(entry["path"], entry)
+        logging.info("%s: 청크 %d개", entry["source"], len(chunks))
+        new_docs.extend(chunks)
+    if new_docs:
+        new_vectors = embed_texts(
+            [d.page_content for d in new_docs],
+            SOF_EMBED_MODEL,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+        if vector_parts and new_vectors.shape[1] != vector_parts[0].shape[1]:
+            logging.error(
+                "임베딩 차원이 기존 인덱스와 다릅니다: %d != %d (--full 로 전체 재수집 필요)",
+                new_vectors.shape[1],
+                vector_parts[0].shape[1],
+            )
+            return 1
+        vector_parts.append(new_vectors)
+        docs.extend(new_docs)
+
+    if not docs:
+        logging.error("수집된 청크가 없습니다.")
+        return 1
+    vectors = np.ascontiguousarray(np.vstack(vector_parts), dtype=np.float32)
+
+    _write_faiss(docs, vectors)
+    fingerprint = faiss_fingerprint(FAISS_DIR)
+    store = ChunkStore.build(docs, fingerprint=fingerprint)
+    store.save(CHUNK_STORE_DIR)
+    logging.info(
+        "거의 같은 청크 %d개 (그룹 %d개, 리포트 간 반복 %d개)",
+        store.dedup["duplicate_chunks"],
+        store.dedup["groups_with_duplicates"],
+        store.dedup["cross_source_groups"],
+    )
+    tokenize = get_tokenizer(SOF_BM25_TOKENIZER)
+    BM25Index.build(
+        (tokenize(d.page_content) for d in docs),
+        fingerprint=fingerprint,
+        tokenizer=SOF_BM25_TOKENIZER,
+    ).save(BM25_DIR)
+    for variant in FAISS_VARIANTS[1:]:
+        options = saved_options(FAISS_DIR, variant)
+        if options is not None:
+            save_variant(
+                build_variant(vectors, variant, **options),
+                FAISS_DIR,
+                variant,
+                fingerprint,
+                options,
+            )
+            logging.info("%s 인덱스 다시 빌드", variant)
+
+    n_chunks = defaultdict(int)
+    for doc in docs:
+        n_chunks[doc.metadata.get("source")] += 1
+    _save_sources(config, keep, embed, n_chunks)
+    logging.info(
+        "수집 완료: 청크 %d개 (새로 임베딩 %d개), %.1fs",
+        len(docs),
+        len(new_docs),
+        time.perf_counter() - started,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+검색 전용 프로세스 실행 (웹 워커들이 공유).
+
+사용법 (ktb_web4 디렉토리에서):
+    python -m BE.tools.serve_retrieval [--socket /tmp/sof_retrieval.sock] [--max-batch 64] [--max-wait-ms 2]
+    SOF_RETRIEVAL_SOCKET=/tmp/sof_retrieval.sock uvicorn main:app --workers 4
+
+- 임베딩 모델, FAISS 인덱스, BM25, 그룹 행렬을 이 프로세스에서만 로드하고 Unix socket 으로 검색 요청을 받음
+- 여러 워커에서 동시에 들어온 질의는 한 번의 인코더 배치로 임베딩 (BE/sof_retrieval_service.py)
+- 웹 워커와 같은 SOF_EMBED_* / SOF_FAISS_* / SOF_BM25_TOKENIZER / SOF_DEDUP 설정으로 실행해야 함
+- 통계: 웹 서버의 GET /chat_report/stats 의 retrieval_service
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from BE.sof_retrieval_service import RetrievalServer
+
+
+def main() -> int:
+    from BE import sof_langchain as sof
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--socket", default=sof.SOF_RETRIEVAL_SOCKET or "/tmp/sof_retrieval.sock")
+    parser.add_argument("--max-batch", type=int, default=sof.SOF_RETRIEVAL_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=sof.SOF_RETRIEVAL_BATCH_WAIT_MS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    # 이 프로세스는 직접 검색 (SOF_RETRIEVAL_SOCKET 이 설정되어 있어도 자기 자신에게 연결하지 않도록)
+    sof.warm_up(use_service=False)
+    state = sof.readiness(use_service=False)
+    if not state["ready"]:
+        logging.error("검색 계층을 로드할 수 없습니다: %s", state.get("error"))
+        return 1
+    vs = sof.get_vectorstore()
+
+    def search(queries, vectors, **kwargs):
+        return [
+            rows.tolist() for rows in sof.hybrid_rows_many(queries, vectors=vectors, **kwargs)
+        ]
+
+    def scoped_search(queries, vectors, scopes, **kwargs):
+        return [
+            rows.tolist()
+            for rows in sof.scoped_rows_many(queries[0], scopes, query_vector=vectors[0], **kwargs)
+        ]
+
+    server = RetrievalServer(
+        args.socket,
+        encode=lambda queries: sof.embed_queries(queries, use_service=False),
+        handlers={"search": search, "scoped_search": scoped_search},
+        info=lambda: {
+            "index_fingerprint": sof.get_index_fingerprint(),
+            "embed_model": sof.SOF_EMBED_MODEL,
+            "embed_backend": sof.SOF_EMBED_BACKEND,
+        },
+        extra_stats=lambda: {"embedding_cache": vs.embedding_function.stats()},
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
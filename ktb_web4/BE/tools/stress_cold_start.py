@@ -0,0 +1,64 @@
+"""
+검색 계층 동시 초기화 스트레스 테스트.
+
+사용법 (ktb_web4 디렉토리에서, SOF_WARMUP 과 무관하게 새 프로세스에서 실행):
+    python -m BE.tools.stress_cold_start [--concurrency 50]
+
+- 콜드 상태에서 N개 스레드가 동시에 첫 질문 검색을 시작
+- 임베딩 모델/FAISS, 인덱스 fingerprint, BM25, 그룹 행렬이 각각 정확히 한 번만 로드되었는지 확인
+- 한 번이라도 중복 로드되면 종료 코드 1
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from BE import sof_langchain
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    barrier = threading.Barrier(args.concurrency)
+
+    def first_request(i: int) -> int:
+        barrier.wait()
+        docs = sof_langchain.hybrid_search(f"2025 공급망 변화 {i}")
+        sof_langchain.scoped_search(f"consumer {i}", chapter="Consumer Shifts")
+        return len(docs)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(first_request, range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    resources = (
+        sof_langchain._vectorstore,
+        sof_langchain._index_fingerprint,
+        sof_langchain._chunk_store,
+        sof_langchain._bm25_index,
+        sof_langchain._doc_groups,
+    )
+    failed = False
+    for resource in resources:
+        ok = resource.load_count == 1
+        failed |= not ok
+        logging.info("%s %-18s load_count=%d", "OK  " if ok else "FAIL", resource.name, resource.load_count)
+    logging.info(
+        "동시 요청 %d건 완료 (%.1fs, 요청당 결과 %d~%d건)",
+        len(results),
+        elapsed,
+        min(results),
+        max(results),
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 import logging
 import os
+import threading
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse, FileResponse
@@ -21,14 +23,32 @@ from BE.routes.post_edit_route import router as post_edit_router
 from BE.routes.post_create_route import router as post_create_router
 from BE.routes.comment_route import router as comment_router
 from BE.routes.chat_report_route import router as chat_report_router
+from BE import llm_client
+from BE.sof_stack import readiness, warm_up
 
 BASE_DIR = os.path.dirname(__file__)
 STATIC_DIR = os.path.join(BASE_DIR, "FE", "static")
 
+# 채팅을 처리하는 워커는 SOF_WARMUP=1 로 시작 시 검색 계층(임베딩 모델, FAISS, BM25)을 백그라운드에서 미리 로드
+# 기본(0)은 검색 스택을 import 하지 않고 시작해 첫 채팅 요청 때 import/로드 (게시판/로그인만 처리하는 워커)
+SOF_WARMUP = os.getenv("SOF_WARMUP", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if SOF_WARMUP:
+        # 별도 스레드에서 로드하므로 HTTP 포트는 바로 열림 (준비 여부는 /ready 로 확인)
+        threading.Thread(target=warm_up, name="sof-warmup", daemon=True).start()
+    yield
+    # 종료 시 Ollama keep-alive 커넥션 풀 정리
+    await llm_client.aclose()
+
+
 app = FastAPI(
     title="Community Backend",
     description="Route - Controller - Model 패턴 연습용 커뮤니티 백엔드",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # 라우터 등록
@@ -57,6 +77,19 @@ async def root():
     index_path = os.path.join(STATIC_DIR, "index.html")
     return FileResponse(index_path)
 
+@app.get("/ready")
+async def ready():
+    """
+    로드밸런서 readiness probe
+    - SOF_WARMUP=1: 검색 계층이 모두 로드되면 200, 아니면 503
+    - SOF_WARMUP=0: 검색 계층은 첫 채팅 요청 때 로드하므로 항상 200 (검색 계층 상태는 참고용)
+    """
+    state = readiness()
+    if not SOF_WARMUP:
+        return JSONResponse(status_code=200, content={**state, "ready": True, "warmup": False})
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
 # 예상치 못한 모든 에러를 잡는 전역 예외 처리
 # HTTPException은 FastAPI가 자동으로 처리하므로 제외
 @app.exception_handler(Exception)